@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+from term_style import ctyle
+from bpdates import FlightLog, loadFlights, analyse, resultRecord, isArchive
+from batch_mode import BatchRow, batchHeader, batchLine
+from flight_archive import FlightArchive
+
+import sys, csv, time, itertools
+
+# Multi-applicant mode of the British Passport Abroad Dates Validator.
+#
+# One CSV file holds the flights of many applicants, in format
+#
+#   ApplicantId,FlightDate,Origin,OriginUK,Destination,DestinationUK,Airline,FlightNumber,Cancelled
+#
+# i.e. an applicant ID column in front of the usual 8 columns, the rows sorted
+# (or at least grouped) by applicant. The rows are read one at a time and
+# grouped as they come: each applicant is validated as soon as the next ID
+# shows up and only a summary row is kept, so a file of millions of rows goes
+# through in one pass with the memory of its longest single history.
+# An ID showing up again further down the file counts as another applicant.
+# With --engine numpy the applicants are evaluated BLOCK at a time with the
+# NumPy engine (day_matrix.py), their records then holding the rule values
+# only; without NumPy installed the prefix engine is used.
+# A flight archive of many applicants (flight_archive.py) is read applicant by
+# applicant from its index, in the order of their IDs.
+#
+# Please run script with --applicants, eg:
+#   >   BPDatesValidator.py 101220 --applicants -i export.csv
+#   >   export_all | BPDatesValidator.py 101220 --applicants -i - --format ndjson
+#   >   BPDatesValidator.py 101220 --applicants -i caseload.csv --engine numpy
+#   >   BPDatesValidator.py 101220 --applicants -i caseload.bpfa
+
+# applicants evaluated at once by the numpy engine: ~4 bytes per day of the 5 years each
+BLOCK = 2048
+
+
+def applicantGroups(rows):
+    """Yield (applicantId, rows) for every run of rows with the same ID, the ID column cut off.
+
+    Each group has to be read before the next one is asked for. The groups
+    of a FlightArchive are its applicants' FlightLogs.
+    """
+    if isinstance(rows, FlightArchive):
+        yield from rows.logs()
+        return
+    rows = (ro for ro in rows if ro and any(field.strip() for field in ro))
+    for applicant, group in itertools.groupby(rows, key=lambda ro: ro[0].strip()):
+        yield applicant, (ro[1:] for ro in group)
+
+
+def validateApplicant(applicant, rows, dateApply, engine='prefix', records=False, source=None):
+    """Validate the flights of one applicant, CSV rows or a FlightLog, and return their BatchRow.
+
+    With records the BatchRow also carries the full resultRecord, with the
+    applicant ID in front.
+    """
+    start = time.perf_counter()
+    try:
+        result = analyse(rows if isinstance(rows, FlightLog) else loadFlights(rows), dateApply, engine=engine)
+    except Exception as e:
+        return BatchRow(applicant, dateApply, seconds=time.perf_counter() - start, failure=f'{type(e).__name__}: {e}')
+    return BatchRow(applicant, dateApply, len(result.flights), result.total5Y, result.total1Y, result.cuntMax,
+                    len(result.errors), time.perf_counter() - start,
+                    record={'applicant': applicant, **resultRecord(result, source)} if records else None)
+
+
+def validateBlocks(rows, dateApply, records=False, source=None, block=BLOCK):
+    """Yield the BatchRow of every applicant of the CSV rows, in file order, evaluated `block` at a time.
+
+    With records the BatchRow carries a record of the rule values only, with
+    the applicant ID in front.
+    """
+    from day_matrix import ruleValues
+    groups = applicantGroups(rows)
+    while True:
+        start = time.perf_counter()
+        logs = [(applicant, group if isinstance(group, FlightLog) else loadFlights(group))
+                for applicant, group in itertools.islice(groups, block)]
+        if not logs:
+            return
+        values = ruleValues([log for _, log in logs], dateApply)
+        seconds = (time.perf_counter() - start) / len(logs)
+        for (applicant, log), (total5Y, total1Y, cuntMax, errors) in zip(logs, values):
+            row = BatchRow(applicant, dateApply, log.flightCount, total5Y, total1Y, cuntMax, errors + len(log.errors),
+                           seconds)
+            if records:
+                limits = {'5Y': total5Y < 450, '12M': total1Y < 90, 'any12M': cuntMax < 180}
+                row.record = {'applicant': applicant, 'source': source, 'dateApply': dateApply.isoformat(),
+                              'flights': log.flightCount, 'total5Y': total5Y, 'total1Y': total1Y, 'cuntMax': cuntMax,
+                              'limits': limits, 'passed': all(limits.values()), 'errorCount': row.errors}
+            yield row
+
+
+def validateApplicants(rows, dateApply, engine='prefix', records=False, source=None):
+    """Yield the BatchRow of every applicant of the CSV rows, in file order, as each group ends."""
+    if engine == 'numpy':
+        # NumPy takes a while to import, and only this engine needs it
+        import day_matrix
+        if day_matrix.numpy is not None:
+            yield from validateBlocks(rows, dateApply, records, source)
+            return
+        engine = 'prefix'
+    for applicant, group in applicantGroups(rows):
+        yield validateApplicant(applicant, group, dateApply, engine, records, source)
+
+
+def readApplicants(source, dateApply, engine='prefix', records=False):
+    """Yield the BatchRows of the applicants of a CSV file, of stdin for '-' or of a flight archive."""
+    if isArchive(source):
+        with FlightArchive(source) as archive:
+            yield from validateApplicants(archive, dateApply, engine, records, source)
+        return
+    if source == '-':
+        yield from validateApplicants(csv.reader(sys.stdin, delimiter=','), dateApply, engine, records, source)
+        return
+    with open(source) as csv_file:
+        yield from validateApplicants(csv.reader(csv_file, delimiter=','), dateApply, engine, records, source)
+
+
+def renderApplicants(rows, style=ctyle):
+    """Yield the summary table of the applicants' BatchRows, a line per applicant as it comes."""
+    c = style
+    start = time.perf_counter()
+    yield f'\n{c.U}APPLICANTS:{c.END}\n{batchHeader("Applicant")}\n'
+    count = passed = 0
+    for row in rows:
+        count += 1
+        passed += row.passed()
+        yield batchLine(row, row.path, c) + '\n'
+    seconds = time.perf_counter() - start
+    yield (f'{c.G}-----------------------------------------------{c.END}\n'
+           f'Applicants:             {count} ({passed} within limits, {count - passed} not)\n'
+           f'Time:                   {seconds:.2f}s{c.G} ({count/seconds if seconds else 0:.1f} applicants/s){c.END}\n\n')
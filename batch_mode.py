@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+from term_style import ctyle
+from bpdates import parseApplyDate, loadFlights, analyse, resultRecord
+from flight_cache import FlightCache
+from history_check import firstBreak
+
+import csv, os, fnmatch, time, itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Batch mode of the British Passport Abroad Dates Validator.
+#
+# Validates many flight histories at once, spread over a pool of worker
+# processes (or threads, on free-threaded builds of Python).
+# The histories are given as either:
+#   *   a directory: every *.csv file in it, all for the same application date
+#   *   a manifest file: one history per line, in format
+#
+#       CsvPath,ApplyDate
+#
+#       where:
+#           CsvPath => path of the CSV file, relative to the manifest
+#           ApplyDate => DDMMYY, may be left empty to use the date given
+#                        on the command line
+#
+# Please run script with --batch, eg:
+#   >   BPDatesValidator.py 101220 --batch histories/
+#   >   BPDatesValidator.py --batch manifest.csv --workers 8
+#   >   BPDatesValidator.py 101220 --batch histories/ --format ndjson > results.ndjson
+
+
+class BatchRow:
+    # Summary of one validated history, small enough to send back from a worker.
+    def __init__(self, path, dateApply, flights=0, total5Y=0, total1Y=0, cuntMax=0, errors=0,
+                 seconds=0.0, failure=None, record=None, unreadable=0):
+        self.path = path
+        self.dateApply = dateApply
+        self.flights = flights
+        self.total5Y = total5Y
+        self.total1Y = total1Y
+        self.cuntMax = cuntMax
+        self.errors = errors
+        self.seconds = seconds
+        self.failure = failure
+        self.record = record
+        self.unreadable = unreadable
+
+    def passed(self):
+        # a history is only within limits if every one of its rows was read
+        return (not self.failure and not self.unreadable and self.total5Y < 450 and self.total1Y < 90
+                and self.cuntMax < 180)
+
+    def asRecord(self):
+        """Return the resultRecord of the history, or a record of why it failed."""
+        if self.record is not None:
+            return self.record
+        return {'source': self.path, 'dateApply': self.dateApply.isoformat(), 'failure': self.failure,
+                'passed': False}
+
+
+def batchJobs(source, dateApply=None):
+    """Return the (path, dateApply) pairs of a directory or of a manifest file."""
+    if os.path.isdir(source):
+        if dateApply is None:
+            raise ValueError('an application date is needed to validate a directory')
+        return [(os.path.join(source, i), dateApply)
+                for i in sorted(os.listdir(source)) if fnmatch.fnmatch(i, "*.csv")]
+
+    jobs = []
+    root = os.path.dirname(os.path.abspath(source))
+    with open(source) as manifest:
+        for ro in csv.reader(manifest, delimiter=','):
+            if not ro or not ro[0].strip() or ro[0].startswith('#'):
+                continue
+            date = parseApplyDate(ro[1]) if len(ro) > 1 and ro[1].strip() else dateApply
+            if date is None:
+                raise ValueError(f'no application date for {ro[0].strip()}')
+            jobs.append((os.path.join(root, ro[0].strip()), date))
+    return jobs
+
+
+def validateFile(path, dateApply, engine='prefix', records=False, cache=None, failFast=False):
+    """Validate one history and return its BatchRow; runs inside a worker.
+
+    With records the BatchRow also carries the full resultRecord of the history,
+    with cache (a directory) the flights are read through a FlightCache. With
+    failFast the history is checked first, and not analysed at its first break.
+    """
+    start = time.perf_counter()
+    try:
+        brk = firstBreak([path]) if failFast else None
+        if brk is not None:
+            return BatchRow(path, dateApply, seconds=time.perf_counter() - start, failure=f'{brk.kind} break, {brk}')
+        log = FlightCache(cache).load(path, entries=False) if cache else loadFlights(path)
+        result = analyse(log, dateApply, engine=engine)
+    except Exception as e:
+        return BatchRow(path, dateApply, seconds=time.perf_counter() - start, failure=f'{type(e).__name__}: {e}')
+    if not len(result.flights):
+        return BatchRow(path, dateApply, errors=len(result.errors), seconds=time.perf_counter() - start,
+                        failure=f'no flights read, {len(log.errors)} rows could not be read', unreadable=len(log.errors))
+    row = BatchRow(path, dateApply, len(result.flights), result.total5Y, result.total1Y, result.cuntMax,
+                   len(result.errors), time.perf_counter() - start, unreadable=len(log.errors))
+    if records:
+        row.record = {**resultRecord(result, path), 'unreadable': row.unreadable, 'passed': row.passed()}
+    return row
+
+
+def runBatch(jobs, workers=None, threads=False, engine='prefix', records=False, cache=None, failFast=False):
+    """Validate every (path, dateApply) job in a pool, yielding BatchRows as they finish.
+
+    Jobs are taken lazily and only a few per worker are queued at a time, so
+    memory stays flat however many histories there are.
+    """
+    Pool = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    jobs = iter(jobs)
+    with Pool(max_workers=workers) as pool:
+        limit = 4 * (workers or os.cpu_count() or 1)
+        pending = set()
+        while True:
+            for path, dateApply in itertools.islice(jobs, limit - len(pending)):
+                pending.add(pool.submit(validateFile, path, dateApply, engine, records, cache, failFast))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def batchHeader(label='File'):
+    return f'{label:<40} {"Applying":>10} {"Flights":>7} {"5Y":>5} {"12M":>5} {"any-12M":>7} {"Errors":>6} {"Time":>8}'
+
+
+def batchLine(row, name, style=ctyle):
+    """Return the summary table line of a BatchRow."""
+    c = style
+    if row.failure:
+        return f'{name:<40} {row.dateApply!s:>10} {c.RED}{row.failure}{c.END}'
+    return (f'{name:<40} {row.dateApply!s:>10} {row.flights:>7} '
+            f'{c.GRN if row.total5Y<450 else c.RED}{row.total5Y:>5}{c.END} '
+            f'{c.GRN if row.total1Y<90 else c.RED}{row.total1Y:>5}{c.END} '
+            f'{c.GRN if row.cuntMax<180 else c.RED}{row.cuntMax:>7}{c.END} '
+            f'{row.errors:>6} {c.G}{1000*row.seconds:>6.1f}ms{c.END}')
+
+
+def renderBatch(rows, seconds, style=ctyle):
+    """Return the summary table of the BatchRows, sorted by file."""
+    c = style
+    rows = sorted(rows, key=lambda row: row.path)
+    lines = [f'\n{c.U}BATCH SUMMARY:{c.END}', batchHeader()]
+    lines += [batchLine(row, os.path.basename(row.path), c) for row in rows]
+    passed = sum(1 for row in rows if row.passed())
+    notPassed = [f'{count} {status}' for count, status in (
+        (sum(1 for row in rows if row.failure), 'failed'),
+        (sum(1 for row in rows if row.unreadable and not row.failure), 'with rows that could not be read'))
+        if count]
+    lines.append(f'{c.G}-----------------------------------------------{c.END}')
+    lines.append(f'Files:                  {len(rows)} ({passed} within limits, {len(rows) - passed} not'
+                 f'{": " + ", ".join(notPassed) if notPassed else ""})')
+    lines.append(f'Time:                   {seconds:.2f}s{c.G} ({len(rows)/seconds if seconds else 0:.1f} files/s){c.END}')
+    lines.append('')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1 @@
+# Benchmarks for British Passport Abroad Dates Validator
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the CSV DepartDateTime parsing: rows/second of the
+strptime cascade against parseDate() and the per-file dateParser(), with the
+speed-up of dateParser() over both
+"""
+import sys
+import os
+import random
+import timeit
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bpdates import dateX, parseDate, dateParser
+
+FORMATS = {
+    'DD/MM/YY HH:MM': '%d/%m/%y %H:%M',
+    'DD/MM/YY': '%d/%m/%y',
+    'DD/MM/YYYY': '%d/%m/%Y',
+}
+
+
+def strptimeCascade(text):
+    """The original triple strptime try/except cascade"""
+    for fmt in ('%d/%m/%y %H:%M', '%d/%m/%y', '%d/%m/%Y'):
+        try:
+            dateTemp = datetime.strptime(text.strip(), fmt).date()
+        except ValueError:
+            continue
+        return dateX(dateTemp.year, dateTemp.month, dateTemp.day)
+    return None
+
+
+def sampleDates(fmt, count, seed=1):
+    rnd = random.Random(seed)
+    start = datetime(2010, 1, 1)
+    return [(start + timedelta(days=rnd.randint(0, 5000), minutes=rnd.randint(0, 1439))).strftime(fmt)
+            for _ in range(count)]
+
+
+def rowsPerSecond(parsers, texts, repeat=15):
+    """Return the rows/second of every parser over texts, best of repeat runs.
+
+    The parsers take turns in every run, so a slow spell of the machine does
+    not fall on one of them only.
+    """
+    best = [None] * len(parsers)
+    for _ in range(repeat):
+        for i, parse in enumerate(parsers):
+            seconds = timeit.timeit(lambda: [parse(text) for text in texts], number=1)
+            best[i] = seconds if best[i] is None or seconds < best[i] else best[i]
+    return [len(texts) / seconds for seconds in best]
+
+
+def main(count=20000, repeat=15):
+    print(f'{"Format":<16} {"strptime":>12} {"parseDate":>12} {"dateParser":>12} {"vs strptime":>12} '
+          f'{"vs parseDate":>13}')
+    for name, fmt in FORMATS.items():
+        texts = sampleDates(fmt, count)
+        slow, fast, fixed = rowsPerSecond((strptimeCascade, parseDate, dateParser()), texts, repeat)
+        print(f'{name:<16} {slow:>12,.0f} {fast:>12,.0f} {fixed:>12,.0f} {fixed/slow:>11.1f}x {fixed/fast:>12.2f}x')
+    print(f'(rows/second, best of {repeat} runs over {count} rows)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
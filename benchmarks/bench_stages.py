@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark of every stage of a validation on synthetic histories: the parse
+of the CSV file, the sort of its flights in random order, the analysis loop
+over the flights, the absence periods and, for each engine, the day index and
+the 50-window scan. The dayList of the original script and its 50-window scan,
+a Day object for every day counted again for every window, are timed next to
+the engines as their baseline (slow on the largest histories).
+Reports operations/second and the peak memory of each stage.
+
+    python3 benchmarks/bench_stages.py
+    python3 benchmarks/bench_stages.py --sizes 10,1000,100000 --save base.json
+    python3 benchmarks/bench_stages.py --compare base.json
+"""
+import sys
+import os
+import json
+import argparse
+import random
+import tempfile
+import timeit
+import tracemalloc
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bpdates import (dateX, Day, FlightArray, ENGINES, loadFlights, analyse,
+                     absencePeriods, monthWindowMax, slidingWindowMax)
+from benchmarks.history import writeHistory
+
+DATE_APPLY = dateX(2020, 12, 10)
+
+
+def timeStage(stage, repeat=3, lap=None):
+    """Return the best time of one call of stage(), timeit autoranged.
+
+    With lap, stage() returns a Result and the time is the one its analysis
+    took for that stage, the best of as many calls as timeit would make.
+    """
+    timer = timeit.Timer(stage)
+    number, _ = timer.autorange()
+    if lap is not None:
+        return min(stage().timings[lap] for _ in range(repeat * number))
+    return min(timer.repeat(repeat, number)) / number
+
+
+def peakMemory(stage):
+    """Return the peak number of bytes allocated while stage() runs."""
+    tracemalloc.start()
+    try:
+        stage()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def dayList(rangeList, date5Y, dateApplyStar):
+    """Return the Day list of the original script: every day from date5Y to dateApplyStar, looked up in rangeList."""
+    days = []
+    dateTemp = date5Y
+    while dateTemp <= dateApplyStar:
+        days.append(Day(dateTemp, any(rg.dateFrom < dateTemp < rg.dateTo for rg in rangeList)))
+        dateTemp = dateTemp.shiftDay(1)
+    return days
+
+
+def dayListWindowMax(days, date5Y, months=50):
+    """Return monthWindowMax() as the original script counted it, going through the Day list for every window."""
+    cuntMax = 0
+    for month in range(0, months):
+        dateFrom = date5Y.shiftMonth(month).firstDay()
+        dateTo = date5Y.shiftMonth(month + 11).lastDay()
+        cunt = sum(1 for day in days if dateFrom <= day.date <= dateTo and day.abroad)
+        cuntMax = cuntMax if cuntMax > cunt else cunt
+    return cuntMax
+
+
+def stages(flights, engines):
+    """Yield (stage, engine, operations, unit, callable, lap) for a history of `flights` flights.
+
+    lap names the analyse() timing that is the time of the stage, for the
+    analysis loop, which has no function of its own; its peak memory is the
+    one of the whole analyse() call.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = writeHistory(os.path.join(directory, 'history.csv'), flights)
+        log = loadFlights(path)
+        rows = len(log.entries)
+        # sorted in random order, the flights of a day would lose the order of their times
+        shuffled = FlightArray(random.Random(1).sample(log.flights, len(log.flights)))
+        array = FlightArray(log.flights).sortedByDate()
+        result = analyse(array, DATE_APPLY)
+        date5Y, dateApplyStar = result.date5Y, result.dateApplyStar
+        rangeList = absencePeriods(array, date5Y)
+        days = (dateApplyStar - date5Y).days + 1
+        baseline = dayList(rangeList, date5Y, dateApplyStar)
+        # the baseline is only worth timing if it gives the result of the engines
+        assert dayListWindowMax(baseline, date5Y) == result.cuntMax
+
+        yield 'parse', '', rows, 'rows', lambda: loadFlights(path), None
+    yield 'arrays', '', len(array), 'flights', lambda: FlightArray(log.flights), None
+    yield 'sort', '', len(array), 'flights', shuffled.sortedByDate, None
+    yield 'analysis', '', len(array), 'flights', lambda: analyse(array, DATE_APPLY), 'analysis'
+    yield 'periods', '', len(array), 'flights', lambda: absencePeriods(array, date5Y), None
+    yield 'index', 'dayList', days, 'days', lambda: dayList(rangeList, date5Y, dateApplyStar), None
+    yield 'windows', 'dayList', 50, 'windows', lambda: dayListWindowMax(baseline, date5Y), None
+    for engine in engines:
+        Engine = ENGINES[engine]
+        index = Engine(rangeList, date5Y, result.dateApplyStar)
+        yield 'index', engine, days, 'days', lambda: Engine(rangeList, date5Y, result.dateApplyStar), None
+        yield 'windows', engine, 50, 'windows', lambda: monthWindowMax(index, date5Y), None
+        yield 'sliding', engine, days, 'windows', lambda: slidingWindowMax(index), None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the validation stages')
+    parser.add_argument('--sizes', default='10,1000,10000,100000',
+                        help='comma separated numbers of flights (default: 10,1000,10000,100000)')
+    parser.add_argument('--engine', choices=sorted(ENGINES) + ['all'], default='all')
+    parser.add_argument('--save', metavar='JSON', help='save the operations/second to a baseline file')
+    parser.add_argument('--compare', metavar='JSON', help='compare the operations/second with a baseline file')
+    args = parser.parse_args(argv)
+    engines = sorted(ENGINES) if args.engine == 'all' else [args.engine]
+    base = {}
+    if args.compare:
+        with open(args.compare) as json_file:
+            base = json.load(json_file)
+
+    results = {}
+    print(f'{"Flights":>8} {"Stage":<8} {"Engine":<7} {"ops/s":>14} {"unit":<8} {"time":>10} {"peak":>10}'
+          f'{" vs base" if base else ""}')
+    for flights in (int(size) for size in args.sizes.split(',')):
+        for stage, engine, operations, unit, call, lap in stages(flights, engines):
+            seconds = timeStage(call, lap=lap)
+            peak = peakMemory(call)
+            key = f'{flights}/{stage}/{engine}'
+            results[key] = operations / seconds
+            line = (f'{flights:>8} {stage:<8} {engine:<7} {results[key]:>14,.0f} {unit:<8} '
+                    f'{1000*seconds:>8.3f}ms {peak/1024:>8.1f}KiB')
+            if key in base:
+                line += f' {results[key]/base[key]:>7.2f}x'
+            print(line)
+
+    if args.save:
+        with open(args.save, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the start of BPDatesValidator.py against the script of a baseline
+git revision (by default the first commit of the repository): the time from
+launching the interpreter to the first byte written on stdout, and to the end
+of the run, for the usage error (no arguments) and for the report of the
+example history next to the script. With --importtime the slowest imports of a
+run are listed, as given by `python3 -X importtime`. The run fails when the
+script takes more than --target milliseconds longer than the baseline script
+to finish a command (medians); the first byte is only shown, as the baseline
+prints its report row by row.
+
+    python3 benchmarks/bench_startup.py
+    python3 benchmarks/bench_startup.py --repeat 50 --baseline HEAD~3
+    python3 benchmarks/bench_startup.py --importtime
+"""
+import sys
+import os
+import io
+import argparse
+import statistics
+import subprocess
+import compileall
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = 'BPDatesValidator.py'
+
+
+def checkout(revision, directory):
+    """Write the files of a git revision into directory, compiled as a first run would leave them."""
+    archive = subprocess.run(['git', 'archive', revision], capture_output=True, check=True, cwd=ROOT).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    compileall.compile_dir(directory, maxlevels=0, quiet=1)
+
+
+def commands(root):
+    """Yield (name, argv) of the timed command lines of the script in root."""
+    launch = [sys.executable, os.path.join(root, SCRIPT)]
+    yield 'usage', launch
+    yield 'report', launch + ['101220']
+
+
+def timeRun(argv):
+    """Return the seconds from starting argv to its first byte on stdout, and to its end."""
+    start = time.perf_counter()
+    process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdout.read(1)
+    first = time.perf_counter() - start
+    process.stdout.read()
+    process.wait()
+    return first, time.perf_counter() - start
+
+
+def importTimes(argv, top=15):
+    """Return the `top` slowest imports of argv as (cumulative us, self us, module)."""
+    run = subprocess.run([argv[0], '-X', 'importtime'] + argv[1:], stdout=subprocess.DEVNULL,
+                         stderr=subprocess.PIPE, text=True)
+    times = []
+    for line in run.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times.append((int(cumulative), int(own), name.rstrip()))
+    return sorted(times, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the script startup')
+    parser.add_argument('--repeat', type=int, default=20, help='runs of every command line (default: 20)')
+    parser.add_argument('--baseline', metavar='REV',
+                        help='git revision of the baseline script (default: the first commit)')
+    parser.add_argument('--target', type=float, default=2, metavar='MS',
+                        help='fail when the script takes more than MS milliseconds longer than the baseline '
+                             'script to finish a command (median, default: 2)')
+    parser.add_argument('--importtime', action='store_true', help='list the slowest imports of the report run')
+    args = parser.parse_args(argv)
+    baseline = args.baseline or subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], capture_output=True,
+                                               text=True, check=True, cwd=ROOT).stdout.split()[0]
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkout(baseline, directory)
+        # the bytecode of the modules is there after a first run (it is not written with PYTHONDONTWRITEBYTECODE)
+        compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+        timeRun([sys.executable, '-c', 'print()'])
+        runs = [('python', [sys.executable, '-c', 'print()'])]
+        for name, command in commands(directory):
+            runs.append((f'{name}/baseline', command))
+        runs += list(commands(ROOT))
+        medians = {}
+        print(f'{"Command":<16} {"first":>9} {"done":>9}  (medians)')
+        for name, command in runs:
+            times = [timeRun(command) for _ in range(args.repeat)]
+            medians[name] = [statistics.median(column) for column in zip(*times)]
+            print(f'{name:<16} {1000*medians[name][0]:>7.1f}ms {1000*medians[name][1]:>7.1f}ms')
+        if args.importtime:
+            print(f'\n{"cumulative":>10} {"self":>8}  module')
+            for cumulative, own, name in importTimes(dict(commands(ROOT))['report']):
+                print(f'{cumulative/1000:>8.1f}ms {own/1000:>6.1f}ms  {name}')
+
+    print(f'\nagainst the script of {baseline[:12]}, target {args.target:g}ms:')
+    slower = False
+    for name, _ in commands(ROOT):
+        for column, times in (('first', 0), ('done', 1)):
+            change = 1000 * (medians[name][times] - medians[f'{name}/baseline'][times])
+            slower = slower or (column == 'done' and change > args.target)
+            print(f'{name:<8} {column:<6} {change:>+7.1f}ms')
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Synthetic flight histories in the 8-column CSV format of the script:
+alternating UK / NON-UK flights, cancelled rows, all three date formats
+and a share of UK / NON-UK alternation errors.
+
+    python3 benchmarks/history.py 5000 history.csv
+"""
+import sys
+import os
+import csv
+import random
+from datetime import datetime, timedelta
+
+UK = ('EDI', 'GLA', 'LHR', 'MAN', 'BHX')
+ABROAD = ('LIS', 'GDN', 'LPA', 'WMI', 'BCN', 'AMS', 'DUB')
+AIRLINES = ('RyanAir', 'WizzAir', 'EasyJet', 'BA')
+DATE_FORMATS = ('%d/%m/%y %H:%M', '%d/%m/%y', '%d/%m/%Y')
+
+
+def syntheticRows(flights, seed=1, end=datetime(2020, 12, 1), years=10, cancelled=0.05, errors=0.01,
+                  formats=DATE_FORMATS):
+    """Yield the CSV rows of a history of `flights` flights over `years` years up to `end`.
+
+    About `cancelled` of the rows are extra cancelled flights, and about
+    `errors` of the flights leave from the wrong side (UK instead of NON-UK
+    or the other way round). Dates cycle through `formats`.
+    """
+    rnd = random.Random(seed)
+    start = end - timedelta(days=365 * years)
+    minutes = sorted(rnd.randrange(365 * years * 24 * 60) for _ in range(flights))
+    isUK = True
+    for i, minute in enumerate(minutes):
+        when = start + timedelta(minutes=minute)
+        originUK = isUK if rnd.random() >= errors else not isUK
+        while rnd.random() < cancelled:
+            yield flightRow(rnd, when, formats[rnd.randrange(len(formats))], originUK, True)
+        yield flightRow(rnd, when, formats[i % len(formats)], originUK, False)
+        isUK = not originUK
+
+
+def flightRow(rnd, when, fmt, originUK, cancelled):
+    return [when.strftime(fmt),
+            rnd.choice(UK if originUK else ABROAD), 'TRUE' if originUK else 'FALSE',
+            rnd.choice(ABROAD if originUK else UK), 'FALSE' if originUK else 'TRUE',
+            rnd.choice(AIRLINES), f'FR{rnd.randrange(1000, 10000)}', 'TRUE' if cancelled else 'FALSE']
+
+
+def writeHistory(path, flights, seed=1, **options):
+    """Write a synthetic history to a CSV file and return its path."""
+    with open(path, 'w', newline='') as csv_file:
+        csv.writer(csv_file).writerows(syntheticRows(flights, seed, **options))
+    return path
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(f'usage: {os.path.basename(sys.argv[0])} FLIGHTS [CSV]')
+    if len(sys.argv) > 2:
+        writeHistory(sys.argv[2], int(sys.argv[1]))
+    else:
+        csv.writer(sys.stdout).writerows(syntheticRows(int(sys.argv[1])))
@@ -0,0 +1,1576 @@
+from term_style import ctyle, TermBuffer
+
+# csv, json, argparse and the modules only some paths need are imported where used: startup counts
+import sys, os, bisect, functools, itertools, time, heapq
+from array import array
+from datetime import datetime, date, timedelta
+
+__author__ = "Marek Kujawa"
+
+# British Passport Abroad Dates Validator.
+#
+# author: Marek Kujawa
+#
+# This script helps with an application fo British Pasport / Citizenship.
+# There are several requirements for you if willing to apply.
+# In terms of your history of stay in the UK you must be:
+#   *   not more than 450 days in total outside of the UK in last 5 years
+#   *   not more than 3 months (~90 days) in total outside of the UK
+#       in last 12 months
+#   *   not more than 6 months in total (180 days) in total outside of
+#       the UK in ANY 12-month period within last 5 years
+#
+# This script calculates that for you. 
+# It needs a CSV file with list of your flights in format:
+#
+# DepartDateTime,DepartPlace,IsUK,ArrivePlace,IsUK,Airline,FlNumber,WasCancelled
+#
+#   where:
+#       DepartDateTime => DD/MM/YY HH:MM or DD/MM/YYYY or DD/MM/YY
+#       IsUK, IsUK, WasCancelled => "True" or "TRUE" or 1 for True, else False
+#       DepartPlace, ArrivePlace, Airline, FlNumber => not critical
+#
+#   CSV file example (example.scv):
+#       17/05/10 10:40,HHN,FALSE,EDI,TRUE,RyanAir,FR4382,TRUE
+# 
+# Please run script with date as additional arg, eg:
+#   >   BPDatesValidator.py 101220 flights.csv
+#   where:
+#       101220 translates to 10 October 2020 (format DDMMYY)
+#       flights.csv is the CSV file, by default the first one next to the script
+#
+# or use it from Python, eg:
+#   >>> from BPDatesValidator import loadFlights, analyse, render
+#   >>> result = analyse(loadFlights('example.csv'), date(2020, 12, 10))
+#   >>> result.total5Y, result.total1Y, result.cuntMax
+#
+# BPDatesValidator.py only runs main() of this module: Python compiles a script
+# from its source on every run, while the bytecode of a module is kept.
+
+
+def colOrCol(color_1, color_2, condition, text, style=ctyle):
+    return f'{color_1 if condition else color_2}{text}{style.END}'
+
+
+def grnOrRed(condition, text, style=ctyle):
+    return colOrCol(style.GRN, style.RED, condition, text, style)
+
+
+# Ordinal of the first day and number of days of every month from 1900 to 2100,
+# so month arithmetic on dateX becomes integer indexing. The table is built on
+# first use, not at import: most runs of the script never need it.
+MONTH_FIRST_YEAR = 1900
+MONTH_LAST_YEAR = 2100
+MONTH_COUNT = (MONTH_LAST_YEAR - MONTH_FIRST_YEAR + 1) * 12
+
+
+@functools.lru_cache(maxsize=None)
+def monthTable():
+    """Return MONTH_START and MONTH_LENGTH, the first ordinal and the days of every month of the table."""
+    start = [date(year, month, 1).toordinal()
+             for year in range(MONTH_FIRST_YEAR, MONTH_LAST_YEAR + 2) for month in range(1, 13)]
+    return start, [start[i + 1] - start[i] for i in range(MONTH_COUNT)]
+
+
+def __getattr__(name):
+    # MONTH_START and MONTH_LENGTH are still module attributes, read from the table once built
+    if name in ('MONTH_START', 'MONTH_LENGTH'):
+        return monthTable()[name == 'MONTH_LENGTH']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def monthIndex(year, month):
+    """Return the index of a month in MONTH_START / MONTH_LENGTH, or None outside the table."""
+    index = (year - MONTH_FIRST_YEAR) * 12 + month - 1
+    return index if 0 <= index < MONTH_COUNT else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _cachedDate(cls, ordinal):
+    return cls.fromordinal(ordinal)
+
+
+class dateX(date):
+    def __str__(self):
+        return f'{self:%d/%m/%Y}'
+    def firstDay(self):
+        return _cachedDate(type(self), self.toordinal() - self.day + 1)
+    def lastDay(self):
+        index = monthIndex(self.year, self.month)
+        if index is None:
+            next_month = self.replace(day=28) + timedelta(days=4)
+            return next_month - timedelta(days=next_month.day)
+        start, length = monthTable()
+        return _cachedDate(type(self), start[index] + length[index] - 1)
+    def shiftDay(self, days):
+        return self + timedelta(days=days)
+    def shiftMonth(self, months):
+        index = monthIndex(self.year, self.month)
+        if index is not None and 0 <= index + months < MONTH_COUNT:
+            index += months
+            start, length = monthTable()
+            if self.day > length[index]:
+                raise ValueError('day is out of range for month')
+            return _cachedDate(type(self), start[index] + self.day - 1)
+        month = self.month - 1 + months
+        year = self.year + month // 12
+        month = month % 12 + 1
+        return type(self)(year, month, self.day)
+    def shiftYear(self, years):
+        return self.shiftMonth(years * 12)
+    def replace(self, year=None, month=None, day=None):
+        """Return a new date with new values for the specified fields."""
+        if year is None:
+            year = self.year
+        if month is None:
+            month = self.month
+        if day is None:
+            day = self.day
+        return type(self)(year, month, day)
+
+class datetimeX(datetime):
+    def __str__(self):
+        return f'{self:%d/%m/%Y %H:%M}'
+
+class Flight:
+    __slots__ = ('date', 'origin', 'originUK', 'destin', 'destinUK', 'airline', 'number', 'cancelled')
+
+    def __init__(self, date, origin, originUK, destin, destinUK, airline=None, number=None, cancelled=False):
+        self.date = date
+        self.origin = origin
+        self.originUK = originUK
+        self.destin = destin
+        self.destinUK = destinUK
+        self.airline = airline
+        self.number = number
+        self.cancelled = cancelled
+
+    def getDate(self):
+        return self.date
+
+    def __reduce__(self):
+        # much quicker to pickle than the default state of a __slots__ class
+        return Flight, (self.date, self.origin, self.originUK, self.destin, self.destinUK, self.airline, self.number,
+                        self.cancelled)
+
+class Period:
+    __slots__ = ('dateFrom', 'dateTo')
+
+    def __init__(self, dateFrom, dateTo):
+        self.dateFrom = dateFrom
+        self.dateTo = dateTo
+
+    def getDateFrom(self):
+        return self.dateFrom
+
+class Day:
+    __slots__ = ('date', 'abroad')
+
+    def __init__(self, date, abroad):
+        self.date = date
+        self.abroad = abroad
+
+    def getDate(self):
+        return self.date
+
+
+class FlightArray:
+    # Struct-of-arrays form of a flight list: the day ordinals in an array('i'),
+    # the UK flags in bytearrays and the airport codes as ids into one table of
+    # interned strings, so a flight costs a few bytes instead of a Flight object.
+    __slots__ = ('ordinals', 'originUK', 'destinUK', 'origins', 'destins', 'codes', 'codeIds')
+
+    def __init__(self, flights=()):
+        flights = list(flights)
+        self.codes = []
+        self.codeIds = {}
+        self.ordinals = array('i', [flight.date.toordinal() for flight in flights])
+        self.originUK = bytearray([1 if flight.originUK else 0 for flight in flights])
+        self.destinUK = bytearray([1 if flight.destinUK else 0 for flight in flights])
+        self.origins = array('I', [self.codeId(flight.origin) for flight in flights])
+        self.destins = array('I', [self.codeId(flight.destin) for flight in flights])
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __iter__(self):
+        return (self.flight(i) for i in range(len(self.ordinals)))
+
+    def codeId(self, code):
+        codeId = self.codeIds.get(code)
+        if codeId is None:
+            codeId = self.codeIds[code] = len(self.codes)
+            self.codes.append(sys.intern(code))
+        return codeId
+
+    def append(self, flight):
+        self.ordinals.append(flight.date.toordinal())
+        self.originUK.append(1 if flight.originUK else 0)
+        self.destinUK.append(1 if flight.destinUK else 0)
+        self.origins.append(self.codeId(flight.origin))
+        self.destins.append(self.codeId(flight.destin))
+
+    @classmethod
+    def merged(cls, arrays):
+        """Return FlightArrays, each in date order, merged into one in date order.
+
+        A heapq k-way merge of the day ordinals; flights of the same day keep
+        the order of the arrays. The merge is read one flight at a time, each
+        written straight into the merged arrays.
+        """
+        merged = cls()
+        codeIds = [array('I', [merged.codeId(code) for code in flights.codes]) for flights in arrays]
+        ordinals, originUK, destinUK = merged.ordinals, merged.originUK, merged.destinUK
+        origins, destins = merged.origins, merged.destins
+        for ordinal, k, i in heapq.merge(*(zip(flights.ordinals, itertools.repeat(k), range(len(flights)))
+                                          for k, flights in enumerate(arrays))):
+            flights = arrays[k]
+            ordinals.append(ordinal)
+            originUK.append(flights.originUK[i])
+            destinUK.append(flights.destinUK[i])
+            origins.append(codeIds[k][flights.origins[i]])
+            destins.append(codeIds[k][flights.destins[i]])
+        return merged
+
+    def isSorted(self):
+        ordinals = self.ordinals
+        return all(ordinals[i - 1] <= ordinals[i] for i in range(1, len(ordinals)))
+
+    def sortedByDate(self):
+        """Return the flights in date order, those of the same day in their order here.
+
+        Only the indices are sorted, by their day ordinal, and the columns
+        then taken in that order: no Flight object is made.
+        """
+        if self.isSorted():
+            return self
+        ordinals = self.ordinals
+        order = sorted(range(len(ordinals)), key=ordinals.__getitem__)
+        flights = FlightArray()
+        flights.codes, flights.codeIds = list(self.codes), dict(self.codeIds)
+        flights.ordinals = array('i', [ordinals[i] for i in order])
+        flights.originUK = bytearray([self.originUK[i] for i in order])
+        flights.destinUK = bytearray([self.destinUK[i] for i in order])
+        flights.origins = array('I', [self.origins[i] for i in order])
+        flights.destins = array('I', [self.destins[i] for i in order])
+        return flights
+
+    def flight(self, i):
+        """Return the i-th flight as a Flight object."""
+        return Flight(dateX.fromordinal(self.ordinals[i]), self.codes[self.origins[i]], bool(self.originUK[i]),
+                      self.codes[self.destins[i]], bool(self.destinUK[i]))
+
+
+def absenceOrdinals(flights, ordinal5Y):
+    """Return the (dateFrom, dateTo) day ordinals of the absencePeriods of a FlightArray."""
+    ordinals, originUK, destinUK = flights.ordinals, flights.originUK, flights.destinUK
+    return [(max(ordinals[i - 1], ordinal5Y), ordinals[i]) for i in range(1, len(ordinals))
+            if ordinals[i] > ordinal5Y and not originUK[i] and not destinUK[i - 1]]
+
+
+def absencePeriods(flights, date5Y):
+    """Return the periods spent abroad (between two non-UK flights) after date5Y."""
+    rangeList = []
+    if isinstance(flights, FlightArray):
+        return [Period(dateX.fromordinal(dateFrom), dateX.fromordinal(dateTo))
+                for dateFrom, dateTo in absenceOrdinals(flights, date5Y.toordinal())]
+    for prev, ro in zip(flights, flights[1:]):
+        if ro.date > date5Y and not ro.originUK and not prev.destinUK:
+            rangeList.append(Period(prev.date if date5Y < prev.date else date5Y, ro.date))
+    return rangeList
+
+
+class AbsenceIndex:
+    # Cumulative count of days abroad on the axis dateFrom..dateTo (inclusive).
+    # A day is abroad when it lies strictly between the two flights of a Period,
+    # so the intervals go into a difference array once and any window is then
+    # answered with a single subtraction.
+    def __init__(self, rangeList, dateFrom, dateTo):
+        self.dateFrom = dateFrom
+        self.dateTo = dateTo
+        self.origin = dateFrom.toordinal()
+        size = max((dateTo - dateFrom).days + 1, 0)
+        diff = [0] * (size + 1)
+        for rg in rangeList:
+            start = max(rg.dateFrom.toordinal() + 1 - self.origin, 0)
+            end = min(rg.dateTo.toordinal() - self.origin, size)
+            if start < end:
+                diff[start] += 1
+                diff[end] -= 1
+        self.prefix = [0] * (size + 1)
+        cover = 0
+        for i in range(size):
+            cover += diff[i]
+            self.prefix[i + 1] = self.prefix[i] + (1 if cover > 0 else 0)
+
+    def count(self, dateFrom, dateTo):
+        """Return the number of days abroad between dateFrom and dateTo (inclusive)."""
+        start = max(dateFrom.toordinal() - self.origin, 0)
+        end = min(dateTo.toordinal() - self.origin + 1, len(self.prefix) - 1)
+        return self.prefix[end] - self.prefix[start] if start < end else 0
+
+    def slidingMax(self, months=12):
+        # A running sum of the per-day absences is kept between two pointers,
+        # the window start and the first day past its end, both only moving forward.
+        abroad = [self.prefix[i + 1] - self.prefix[i] for i in range(len(self.prefix) - 1)]
+        size = len(abroad)
+        best, bestFrom, bestTo = -1, self.dateFrom, self.dateFrom
+        cunt = 0
+        right = 0
+        for left in range(size):
+            dateFrom = self.dateFrom.shiftDay(left)
+            end = min(windowEnd(dateFrom, months).toordinal() - self.origin + 1, size)
+            while right < end:
+                cunt += abroad[right]
+                right += 1
+            if cunt > best:
+                best, bestFrom, bestTo = cunt, dateFrom, dateFrom.shiftDay(end - left - 1)
+            cunt -= abroad[left]
+        return max(best, 0), bestFrom, bestTo
+
+
+def monthWindowMax(index, date5Y, months=50):
+    """Return the most days abroad in any of the month-aligned 12-month windows."""
+    cuntMax = 0
+    monthFirst = date5Y.firstDay()
+    for month in range(0, months):
+        dateFrom = monthFirst.shiftMonth(month)
+        dateTo = monthFirst.shiftMonth(month + 11).lastDay()
+        cunt = index.count(dateFrom, dateTo)
+        cuntMax = cuntMax if cuntMax > cunt else cunt
+    return cuntMax
+
+
+def windowEnd(dateFrom, months=12):
+    """Return the last day of the window of `months` months starting on dateFrom."""
+    month = dateFrom.month - 1 + months
+    first = date(dateFrom.year + month // 12, month % 12 + 1, 1).toordinal()
+    # day 29-31 missing in the target month rolls over into the next one
+    return type(dateFrom).fromordinal(first + dateFrom.day - 2)
+
+
+def slidingWindowMax(index, months=12):
+    """Return (days, dateFrom, dateTo) of the worst window over every start day."""
+    return index.slidingMax(months)
+
+
+def absenceSlidingMax(index, months=12):
+    """Return slidingWindowMax() of an index holding its absences as sorted `starts` and `ends` ordinals.
+
+    Only a few start days are counted, the same window as a scan of every day
+    being found.
+    """
+    # Moving a window start off a day in the UK never loses a day, nor does moving it a day into an
+    # absence, unless windowEnd() jumps two days ahead (on the 1st of a month following a shorter
+    # February). So the most days are found starting on the axis start, on the first day of an
+    # absence or on the 1st of a month inside one; the days in the UK before that start count no
+    # more and no less as the start moves forward, so the first of them with as many days is bisected.
+    cls = type(index.dateFrom)
+    origin = index.dateFrom.toordinal()
+
+    def days(ordinal):
+        dateFrom = cls.fromordinal(ordinal)
+        return index.count(dateFrom, min(windowEnd(dateFrom, months), index.dateTo))
+    # (start day, first day of the days in the UK before it)
+    candidates = [(origin, origin)]
+    for k, (start, end) in enumerate(zip(index.starts, index.ends)):
+        candidates.append((start, index.ends[k - 1] + 1 if k else origin))
+        month = cls.fromordinal(start).firstDay().shiftMonth(1)
+        while month.toordinal() <= end:
+            candidates.append((month.toordinal(), month.toordinal()))
+            month = month.shiftMonth(1)
+    best, first, low = -1, origin, origin
+    for ordinal, uk in candidates:
+        cunt = days(ordinal)
+        if cunt > best:
+            best, first, low = cunt, ordinal, uk
+    while low < first:
+        middle = (low + first) // 2
+        if days(middle) == best:
+            first = middle
+        else:
+            low = middle + 1
+    dateFrom = cls.fromordinal(first)
+    return best, dateFrom, min(windowEnd(dateFrom, months), index.dateTo)
+
+
+class IntervalSweep:
+    # Same answers as AbsenceIndex, worked out from the sorted abroad intervals
+    # alone: no per-day series is built, windows are answered by clipping the
+    # intervals they overlap, so the cost follows the number of trips.
+    def __init__(self, rangeList, dateFrom, dateTo):
+        self.dateFrom = dateFrom
+        self.dateTo = dateTo
+        self.origin = dateFrom.toordinal()
+        self.last = dateTo.toordinal()
+        spans = sorted((max(rg.dateFrom.toordinal() + 1, self.origin), min(rg.dateTo.toordinal() - 1, self.last))
+                       for rg in rangeList)
+        self.starts = []
+        self.ends = []
+        for start, end in spans:
+            if start > end:
+                continue
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+        self.prefix = [0]
+        for start, end in zip(self.starts, self.ends):
+            self.prefix.append(self.prefix[-1] + end - start + 1)
+
+    def _upTo(self, ordinal):
+        # days abroad from the start of the axis up to and including `ordinal`
+        i = bisect.bisect_right(self.starts, ordinal)
+        if not i:
+            return 0
+        return self.prefix[i - 1] + min(ordinal, self.ends[i - 1]) - self.starts[i - 1] + 1
+
+    def count(self, dateFrom, dateTo):
+        """Return the number of days abroad between dateFrom and dateTo (inclusive)."""
+        start = max(dateFrom.toordinal(), self.origin)
+        end = min(dateTo.toordinal(), self.last)
+        return self._upTo(end) - self._upTo(start - 1) if start <= end else 0
+
+    def slidingMax(self, months=12):
+        return absenceSlidingMax(self, months)
+
+
+def fenwickTree(values):
+    """Return the 1-based Fenwick tree of the values, built in linear time."""
+    tree = [0] + list(values)
+    for i in range(1, len(tree)):
+        j = i + (i & -i)
+        if j < len(tree):
+            tree[j] += tree[i]
+    return tree
+
+
+class FenwickIndex:
+    # Same answers as AbsenceIndex, with the days abroad kept in Fenwick trees
+    # (range add, range sum) over the axis: Periods can be added and removed one
+    # at a time and any window counted, all in O(log n), so a tool editing the
+    # trips of a history never builds the index again.
+    # The periods must not overlap (those of a history never do), add() refuses
+    # one that would.
+    def __init__(self, rangeList, dateFrom, dateTo):
+        self.dateFrom = dateFrom
+        self.dateTo = dateTo
+        self.origin = dateFrom.toordinal()
+        self.last = dateTo.toordinal()
+        self.size = max(self.last - self.origin + 1, 0)
+        self.periods = {}
+        self.starts = []
+        self.ends = []
+        diff = [0] * (self.size + 2)
+        landings = [0] * self.size
+        for rg in rangeList:
+            start, end = self._keep(rg)
+            if start <= end:
+                diff[start - self.origin + 1] += 1
+                diff[end - self.origin + 2] -= 1
+            if self._lands(rg):
+                landings[rg.dateTo.toordinal() - self.origin] += 1
+        # days abroad up to position i: i * sum(diff) - sum(diff * (position - 1))
+        self.cover = fenwickTree(diff[1:self.size + 1])
+        self.weight = fenwickTree(diff[i] * (i - 1) for i in range(1, self.size + 1))
+        self.landings = fenwickTree(landings)
+
+    def _span(self, period):
+        # the days strictly between the two flights, on the axis
+        return (max(period.dateFrom.toordinal() + 1, self.origin), min(period.dateTo.toordinal() - 1, self.last))
+
+    def _lands(self, period):
+        # a trip back on the day it left adds nothing to the totals
+        return period.dateFrom < period.dateTo and self.origin <= period.dateTo.toordinal() <= self.last
+
+    def _keep(self, period):
+        key = (period.dateFrom.toordinal(), period.dateTo.toordinal())
+        start, end = self._span(period)
+        if start <= end:
+            i = bisect.bisect_left(self.starts, start)
+            if (i and self.ends[i - 1] >= start) or (i < len(self.starts) and self.starts[i] <= end):
+                raise ValueError(f'period {period.dateFrom} - {period.dateTo} overlaps another one')
+            self.starts.insert(i, start)
+            self.ends.insert(i, end)
+        self.periods[key] = self.periods.get(key, 0) + 1
+        return start, end
+
+    def _update(self, tree, i, value):
+        while i < len(tree):
+            tree[i] += value
+            i += i & -i
+
+    def _sum(self, tree, i):
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _upTo(self, ordinal):
+        # days abroad from the start of the axis up to and including `ordinal`
+        i = min(ordinal - self.origin + 1, self.size)
+        return self._sum(self.cover, i) * i - self._sum(self.weight, i) if i > 0 else 0
+
+    def _addSpan(self, start, end, value):
+        left, right = start - self.origin + 1, end - self.origin + 2
+        self._update(self.cover, left, value)
+        self._update(self.cover, right, -value)
+        self._update(self.weight, left, value * (left - 1))
+        self._update(self.weight, right, -value * (right - 1))
+
+    def add(self, period):
+        """Add the days abroad of a Period."""
+        start, end = self._keep(period)
+        if start <= end:
+            self._addSpan(start, end, 1)
+        if self._lands(period):
+            self._update(self.landings, period.dateTo.toordinal() - self.origin + 1, 1)
+
+    def remove(self, period):
+        """Remove a Period added before (or given to the constructor)."""
+        key = (period.dateFrom.toordinal(), period.dateTo.toordinal())
+        if not self.periods.get(key):
+            raise ValueError(f'no period {period.dateFrom} - {period.dateTo} to remove')
+        self.periods[key] -= 1
+        if not self.periods[key]:
+            del self.periods[key]
+        start, end = self._span(period)
+        if start <= end:
+            i = bisect.bisect_left(self.starts, start)
+            del self.starts[i], self.ends[i]
+            self._addSpan(start, end, -1)
+        if self._lands(period):
+            self._update(self.landings, period.dateTo.toordinal() - self.origin + 1, -1)
+
+    def count(self, dateFrom, dateTo):
+        """Return the number of days abroad between dateFrom and dateTo (inclusive)."""
+        start = max(dateFrom.toordinal(), self.origin)
+        end = min(dateTo.toordinal(), self.last)
+        return self._upTo(end) - self._upTo(start - 1) if start <= end else 0
+
+    def total(self, dateFrom):
+        """Return the days of the trips in the index after dateFrom.
+
+        Every period ending after dateFrom counts from its first flight (or from
+        dateFrom) up to its last flight, one more day than count() gives. For a
+        history without UK/NON-UK errors these are total5Y and total1Y; analyse()
+        also counts a leg leaving from the UK after landing abroad, which is no
+        trip of the index.
+        """
+        ordinal = dateFrom.toordinal()
+        landings = self._sum(self.landings, self.size) - self._sum(self.landings, max(ordinal - self.origin + 1, 0))
+        return self.count(dateFrom.shiftDay(1), self.dateTo) + landings
+
+    def slidingMax(self, months=12):
+        return absenceSlidingMax(self, months)
+
+
+ENGINES = {'prefix': AbsenceIndex, 'sweep': IntervalSweep, 'fenwick': FenwickIndex}
+
+    
+def parseApplyDate(text):
+    """Return the dateX of an application date given as DDMMYY."""
+    text = text.strip()
+    if len(text) == 6 and text.isdecimal():
+        # without strptime, whose import alone takes longer than the rest of a short run
+        dt = _dateOf(_century(int(text[4:6])), int(text[2:4]), int(text[0:2]))
+        if dt is not None:
+            return dt
+    dateTemp = datetimeX.strptime(text, '%d%m%y').date()
+    return dateX(dateTemp.year, dateTemp.month, dateTemp.day)
+
+
+def csvBool(value):
+    return True if value == "TRUE" or value == "True" or value == 1 else False
+
+
+def _century(yy):
+    # same pivot as strptime's %y: 69-99 => 1900s, 00-68 => 2000s
+    return yy + (1900 if yy >= 69 else 2000)
+
+
+# two-digit fields of the fixed-width formats, read with one dict lookup each
+_DAY = {f'{day:02d}': day for day in range(1, 32)}
+_MONTH = {f'{month:02d}': month for month in range(1, 13)}
+_YEAR = {f'{yy:02d}': _century(yy) for yy in range(100)}
+_HOUR = frozenset(f'{hour:02d}' for hour in range(24))
+_MINUTE = frozenset(f'{minute:02d}' for minute in range(60))
+
+
+def _dateHM(text):
+    # DD/MM/YY HH:MM
+    if (len(text) != 14 or text[2] != '/' or text[5] != '/' or text[8] != ' ' or text[11] != ':'
+            or text[9:11] not in _HOUR or text[12:14] not in _MINUTE):
+        return None
+    try:
+        return dateX(_YEAR.get(text[6:8]), _MONTH.get(text[3:5]), _DAY.get(text[0:2]))
+    except (TypeError, ValueError):  # a field that is not two digits in range
+        return None
+
+
+def _dateYY(text):
+    # DD/MM/YY
+    if len(text) != 8 or text[2] != '/' or text[5] != '/':
+        return None
+    try:
+        return dateX(_YEAR.get(text[6:8]), _MONTH.get(text[3:5]), _DAY.get(text[0:2]))
+    except (TypeError, ValueError):  # a field that is not two digits in range
+        return None
+
+
+def _dateYYYY(text):
+    # DD/MM/YYYY
+    if len(text) != 10 or text[2] != '/' or text[5] != '/' or not text[6:10].isdecimal():
+        return None
+    try:
+        return dateX(int(text[6:10]), _MONTH.get(text[3:5]), _DAY.get(text[0:2]))
+    except (TypeError, ValueError):  # a field that is not two digits in range
+        return None
+
+
+def _dateOf(year, month, day):
+    try:
+        return dateX(year, month, day)
+    except ValueError:
+        return None
+
+
+DATE_FORMATS = ((_dateHM, '%d/%m/%y %H:%M'), (_dateYY, '%d/%m/%y'), (_dateYYYY, '%d/%m/%Y'))
+
+
+def parseDate(text):
+    """Return the dateX of a CSV DepartDateTime field, or None if it has a wrong format."""
+    text = text.strip()
+    for fast, fmt in DATE_FORMATS:
+        dt = fast(text)
+        if dt is not None:
+            return dt
+    # not zero-padded or oddly spaced dates are still accepted by strptime
+    for fast, fmt in DATE_FORMATS:
+        try:
+            dateTemp = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return dateX(dateTemp.year, dateTemp.month, dateTemp.day)
+    return None
+
+
+def dateParser():
+    """Return parseDate() for the rows of one file.
+
+    The fixed-width format of the first readable row is bound once and tried
+    first on every following field as it is, the others (and the strip) only
+    when a field does not match it.
+    """
+    fast = None
+
+    def readDate(text):
+        nonlocal fast
+        if fast is not None:
+            dt = fast(text)
+            if dt is not None:
+                return dt
+        dt = parseDate(text)
+        if dt is not None and fast is None:
+            text = text.strip()
+            fast = next((parse for parse, fmt in DATE_FORMATS if parse(text) is not None), None)
+        return dt
+    return readDate
+
+
+class FlightLog:
+    # Entries read from a CSV file: every row in file order, the flights taken,
+    # the cancelled ones and the rows that could not be read.
+    def __init__(self, source=None):
+        self.source = source
+        self.entries = []
+        self.flights = []
+        self.cancelled = []
+        self.errors = []
+        self.flightCount = 0
+        self.cancelledCount = 0
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return iter(self.flights)
+
+    def add(self, flight):
+        self.entries.append(flight)
+        if flight.cancelled:
+            self.cancelled.append(flight)
+            self.cancelledCount += 1
+        else:
+            self.flights.append(flight)
+            self.flightCount += 1
+
+    def readRow(self, ro, readDate=parseDate):
+        """Add one CSV row and return its Flight, or None if the row can not be read."""
+        ro = list(ro) + [''] * (8 - len(ro))
+        dt = readDate(ro[0])
+        if dt is None:
+            self.errors.append([self.flightCount + self.cancelledCount,
+                                f'CSV file error: Flight Date {ro[0]} Has Wrong Format'])
+            return None
+        flight = Flight(dt, ro[1], csvBool(ro[2]), ro[3], csvBool(ro[4]), ro[5], ro[6], csvBool(ro[7]))
+        self.add(flight)
+        return flight
+
+    def readRows(self, rows):
+        start = time.perf_counter()
+        readDate = dateParser()
+        for ro in rows:
+            self.readRow(ro, readDate)
+        self.seconds += time.perf_counter() - start
+        return self
+
+
+class FlightStream(FlightLog):
+    # A FlightLog that keeps nothing it reads: iterating it reads the source
+    # again and hands the flights on one at a time, while cancelled flights are
+    # only counted and the first `sample` of them kept for the report.
+    def __init__(self, source='-', sample=10):
+        super().__init__(source)
+        self.sample = sample
+
+    def __iter__(self):
+        return iterFlights(self.source, self)
+
+    def add(self, flight):
+        if flight.cancelled:
+            if len(self.cancelled) < self.sample:
+                self.cancelled.append(flight)
+            self.cancelledCount += 1
+        else:
+            self.flightCount += 1
+
+
+# files read column by column by columnar.py, with pyarrow or pandas, instead of as CSV
+COLUMNAR_SUFFIXES = ('.parquet', '.feather', '.arrow')
+
+
+def isColumnar(source):
+    return isinstance(source, (str, os.PathLike)) and os.fspath(source).lower().endswith(COLUMNAR_SUFFIXES)
+
+
+# binary flight archives of flight_archive.py, mapped into memory instead of parsed
+ARCHIVE_SUFFIX = '.bpfa'
+
+
+def isArchive(source):
+    return isinstance(source, (str, os.PathLike)) and os.fspath(source).lower().endswith(ARCHIVE_SUFFIX)
+
+
+def iterFlights(stream, log=None):
+    """Yield the flights (not cancelled) of a CSV stream, one row at a time.
+
+    stream is an open file, a path or '-' for stdin. Cancelled flights and rows
+    that can not be read are recorded in log (a FlightStream) when one is given.
+    A Parquet or Arrow file, or a flight archive, is read whole, its flights
+    then handed on in date order.
+    """
+    if isColumnar(stream) or isArchive(stream):
+        part = loadFlights(stream)
+        log = FlightStream(stream) if log is None else log
+        log.errors += part.errors
+        for ca in part.cancelled:
+            log.add(ca)
+        log.flightCount += part.flightCount
+        yield from part.flights
+        return
+    if isinstance(stream, (str, os.PathLike)) and stream != '-':
+        with open(stream) as csv_file:
+            yield from iterFlights(csv_file, log)
+        return
+    import csv
+    log = FlightStream(stream) if log is None else log
+    readDate = dateParser()
+    for ro in csv.reader(sys.stdin if stream == '-' else stream, delimiter=','):
+        flight = log.readRow(ro, readDate)
+        if flight is not None and not flight.cancelled:
+            yield flight
+
+
+def loadFlights(source):
+    """Return a FlightLog read from a CSV (or Parquet, Arrow, archive) file path or from an iterable of CSV rows."""
+    if isColumnar(source):
+        from columnar import loadColumnar
+        return loadColumnar(source)
+    if isArchive(source):
+        from flight_archive import FlightArchive
+        start = time.perf_counter()
+        with FlightArchive(source) as archive:
+            log = archive.flights()
+        log.seconds = time.perf_counter() - start
+        return log
+    if isinstance(source, (str, os.PathLike)):
+        import csv
+        with open(source) as csv_file:
+            return FlightLog(source).readRows(csv.reader(csv_file, delimiter=','))
+    return FlightLog().readRows(source)
+
+
+def mergeFlights(streams):
+    """Merge flight streams, each in date order, into one stream in date order.
+
+    A heapq k-way merge: it only holds the next flight of every stream, and
+    flights of the same day keep the order of the streams.
+    """
+    return heapq.merge(*streams, key=Flight.getDate)
+
+
+class FlightStreams(FlightStream):
+    # Several CSV files read as one FlightStream, their flights merged by date
+    # as they are read, so only one row per file is held at a time.
+    def __init__(self, sources, sample=10):
+        super().__init__(', '.join(str(source) for source in sources), sample)
+        self.streams = [FlightStream(source, sample) for source in sources]
+
+    def __iter__(self):
+        yield from mergeFlights(iter(stream) for stream in self.streams)
+        self.flightCount = sum(stream.flightCount for stream in self.streams)
+        self.cancelledCount = sum(stream.cancelledCount for stream in self.streams)
+        self.cancelled = [ca for stream in self.streams for ca in stream.cancelled][:self.sample]
+        self.errors = [er for stream in self.streams for er in stream.errors]
+
+
+def loadSorted(source, load=loadFlights, entries=True):
+    """Return the FlightLog of a CSV file with its flights sorted into a FlightArray.
+
+    Without entries the log drops its list of rows, which makes it quick to
+    send back from a worker process.
+    """
+    log = load(source)
+    if not (isinstance(log.flights, FlightArray) and log.flights.isSorted()):
+        log.flights = FlightArray(sorted(log.flights, key=Flight.getDate))
+    if not entries:
+        log.entries = []
+    return log
+
+
+def loadFlightFiles(sources, workers=None, load=loadFlights, entries=True):
+    """Return one FlightLog of several CSV files, each parsed and sorted on its own.
+
+    The files are merged by date with FlightArray.merged(). With entries the
+    log keeps every row (for the report), the files one after the other, and
+    the files are parsed here: sending every row back from a worker process
+    takes about as long as parsing it. Without, they are parsed in parallel
+    processes.
+    """
+    sources = list(sources)
+    if len(sources) == 1:
+        return load(sources[0])
+    workers = 1 if entries else min(workers or os.cpu_count() or 1, len(sources))
+    parse = functools.partial(loadSorted, load=load, entries=entries)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            logs = list(pool.map(parse, sources))
+    else:
+        logs = [parse(source) for source in sources]
+    log = FlightLog(', '.join(str(source) for source in sources))
+    for part in logs:
+        offset = log.flightCount + log.cancelledCount
+        log.entries += part.entries
+        log.cancelled += part.cancelled
+        log.errors += [[offset + er[0], er[1]] for er in part.errors]
+        log.flightCount += part.flightCount
+        log.cancelledCount += part.cancelledCount
+        log.seconds += part.seconds
+    log.flights = FlightArray.merged([part.flights for part in logs])
+    return log
+
+
+class Step:
+    # One flight of the analysis: the days spent since the previous flight
+    # (delta1) and, when a period boundary falls in between, the days after it (delta2).
+    __slots__ = ('flight', 'wasUK', 'dateOld', 'destinOld', 'delta1', 'delta2',
+                 'boundaries', 'error', 'total5Y', 'total1Y')
+
+    def __init__(self, flight, wasUK, dateOld, destinOld, delta1, delta2, boundaries, error, total5Y, total1Y):
+        self.flight = flight
+        self.wasUK = wasUK
+        self.dateOld = dateOld
+        self.destinOld = destinOld
+        self.delta1 = delta1
+        self.delta2 = delta2
+        self.boundaries = boundaries
+        self.error = error
+        self.total5Y = total5Y
+        self.total1Y = total1Y
+
+    def errorText(self):
+        return (f'{self.delta1}d {self.destinOld}@{self.dateOld:%d/%m/%y} '
+                f'{"UK" if self.wasUK else "NON-UK"} - {"UK" if self.flight.originUK else "NON-UK"} '
+                f'{self.flight.origin}@{self.flight.date:%d/%m/%y}')
+
+
+class StepArray:
+    # The Steps of an analysis kept as arrays next to its FlightArray; a Step
+    # object is only built when one is looked at.
+    __slots__ = ('flights', 'wasUK', 'dateOld', 'destinOld', 'delta1', 'delta2', 'total5Y', 'total1Y', 'errors',
+                 'boundaries')
+
+    def __init__(self, flights, wasUK, dateOld, destinOld):
+        self.flights = flights
+        self.wasUK = wasUK
+        self.dateOld = dateOld
+        self.destinOld = destinOld
+        self.delta1 = array('i')
+        self.delta2 = array('i')
+        self.total5Y = array('i')
+        self.total1Y = array('i')
+        self.errors = bytearray()
+        self.boundaries = {}
+
+    def __len__(self):
+        return len(self.delta1)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.delta1)))
+
+    def __getitem__(self, i):
+        flights = self.flights
+        if i < 0:
+            i += len(self.delta1)
+        if not 0 <= i < len(self.delta1):
+            raise IndexError('step index out of range')
+        if i:
+            wasUK = flights.destinUK[i - 1]
+            dateOld = dateX.fromordinal(flights.ordinals[i - 1])
+            destinOld = flights.codes[flights.destins[i - 1]]
+        else:
+            wasUK = self.wasUK
+            dateOld = self.dateOld
+            destinOld = self.destinOld
+        return Step(flights.flight(i), wasUK, dateOld, destinOld, self.delta1[i], self.delta2[i],
+                    self.boundaries.get(i, ()), bool(self.errors[i]), self.total5Y[i], self.total1Y[i])
+
+
+class Stopwatch:
+    # Adds the time since the previous lap to timings[stage]; a handful of
+    # perf_counter() calls per analysis, so it is always on.
+    def __init__(self, timings):
+        self.timings = timings
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self.last
+        self.last = now
+
+
+class AnalysisState:
+    # What the analysis loop carries from one flight to the next, kept after the
+    # last flight so that flights appended to a history can be folded in later.
+    def __init__(self, count=0, dateOld=None, destinOld=None, wasUK=None, boundaries=(), total5Y=0, total1Y=0,
+                 totalUK=0, totalEUR=0, totalERR=0, errors=(), periods=()):
+        self.count = count
+        self.dateOld = dateOld
+        self.destinOld = destinOld
+        self.wasUK = wasUK
+        self.boundaries = list(boundaries)
+        self.total5Y = total5Y
+        self.total1Y = total1Y
+        self.totalUK = totalUK
+        self.totalEUR = totalEUR
+        self.totalERR = totalERR
+        self.errors = [list(er) for er in errors]
+        self.periods = [tuple(period) for period in periods]
+
+
+class Result:
+    # Outcome of analyse(): the period boundaries, the rule values and the steps behind them.
+    def __init__(self, dateApply):
+        self.dateApply = dateApply
+        self.dateApplyStar = dateApply.lastDay()
+        self.date5YStar = dateApply.lastDay().shiftYear(-5).shiftDay(1)
+        self.date1YStar = dateApply.lastDay().shiftYear(-1).shiftDay(1)
+        self.date5Y = dateApply.shiftYear(-5).shiftDay(1)
+        self.date1Y = dateApply.shiftYear(-1).shiftDay(1)
+        self.log = None
+        self.flights = []
+        self.steps = []
+        self.errors = []
+        self.total5Y = 0
+        self.total1Y = 0
+        self.cuntMax = 0
+        self.worst = None
+        self.index = None
+        self.totalUK = 0
+        self.totalEUR = 0
+        self.totalERR = 0
+        self.dateOld = self.date5Y.firstDay()
+        self.wasUK = True
+        self.timings = {}
+        self.state = None
+        self.resumed = False
+
+    def limits(self):
+        """Return whether each of the 450 day, 90 day and 180 day limits is kept."""
+        return {'5Y': self.total5Y < 450, '12M': self.total1Y < 90, 'any12M': self.cuntMax < 180}
+
+
+def analyse(flights, dateApply, engine='prefix', allWindows=False, state=None):
+    """Return the Result of checking the flights against an application on dateApply.
+
+    flights is a FlightLog or any iterable of (not cancelled) Flight objects.
+    Nothing is shared between calls, so analyses may run in parallel threads.
+    With state (the Result.state of an earlier analysis for the same dateApply,
+    updated in place) the flights are folded in after the ones analysed then,
+    and the steps only cover the new flights; the caller checks that none of
+    them comes before the last one analysed.
+    """
+    result = Result(dateX(dateApply.year, dateApply.month, dateApply.day))
+    log = flights if isinstance(flights, FlightLog) else None
+    stopwatch = Stopwatch(result.timings)
+    ordered = log.flights if log is not None else flights
+    if isinstance(ordered, FlightArray):
+        # already in the form the loop needs, e.g. from the flight cache
+        stopwatch.lap('read')
+        flights = ordered.sortedByDate()
+    else:
+        # every flight goes into the arrays as it is read, a stream keeping no Flight object
+        read = FlightArray()
+        for flight in flights:
+            read.append(flight)
+        stopwatch.lap('read')
+        flights = read.sortedByDate()
+    stopwatch.lap('sort')
+    if log is not None:
+        result.log = log
+        result.errors = [list(er) for er in log.errors]
+        result.timings['read'] += log.seconds
+    result.flights = flights
+    date5Y = result.date5Y
+    # the loop below only works on integer day ordinals and 0/1 flags
+    ordinal5Y, ordinal5YStar = date5Y.toordinal(), result.date5YStar.toordinal()
+    ordinal1Y, ordinal1YStar = result.date1Y.toordinal(), result.date1YStar.toordinal()
+    ordinals, originUK, destinUK = flights.ordinals, flights.originUK, flights.destinUK
+    resumed = state is not None and state.count > 0
+    if state is None:
+        state = AnalysisState()
+    if not resumed:
+        state.dateOld = result.dateOld.toordinal()
+        state.destinOld = "UK" if ordinals and originUK[0] else "NON-UK"
+        state.wasUK = originUK[0] if ordinals else 1
+    result.state = state
+    steps = result.steps = StepArray(flights, state.wasUK, dateX.fromordinal(state.dateOld), state.destinOld)
+
+    date5YDone, date5YStarDone, date1YDone, date1YStarDone = (
+        boundary in state.boundaries for boundary in ('5Y', '5Y*', '1Y', '1Y*'))
+    dateOld = state.dateOld
+    wasUK = state.wasUK
+    total5Y = state.total5Y
+    total1Y = state.total1Y
+    totalUK = state.totalUK
+    totalEUR = state.totalEUR
+    newErrors = []
+    for counter in range(len(ordinals)):
+        day = ordinals[counter]
+        boundaries = ()
+        delta_1 = day - dateOld if counter or resumed else 0
+        error = wasUK != originUK[counter]
+
+        delta_2 = 0
+        if day > ordinal5Y:
+            if not date5YDone:
+                date5YDone = True
+                delta_2 = day - ordinal5Y
+                boundaries += ('5Y',)
+                total5Y += 0 if wasUK else delta_2
+            else:
+                total5Y += 0 if wasUK else delta_1
+
+            if day > ordinal5YStar:
+                if not date5YStarDone:
+                    date5YStarDone = True
+                    delta_2 = delta_2 if delta_2 else day - ordinal5YStar
+                    boundaries += ('5Y*',)
+
+                if day > ordinal1Y:
+                    if not date1YDone:
+                        date1YDone = True
+                        delta_2 = delta_2 if delta_2 else day - ordinal1Y
+                        boundaries += ('1Y',)
+                        total1Y += 0 if wasUK else delta_2
+                    else:
+                        total1Y += 0 if wasUK else delta_1
+
+                    if day > ordinal1YStar:
+                        if not date1YStarDone:
+                            date1YStarDone = True
+                            delta_2 = delta_2 if delta_2 else day - ordinal1YStar
+                            boundaries += ('1Y*',)
+
+        delta_1 = delta_1 - delta_2
+        if not error:
+            if wasUK:
+                totalUK += delta_1
+            else:
+                totalEUR += delta_1
+        if not error and delta_2:
+            if wasUK:
+                totalUK += delta_1
+            else:
+                totalEUR += delta_1
+
+        steps.delta1.append(delta_1)
+        steps.delta2.append(delta_2)
+        steps.total5Y.append(total5Y)
+        steps.total1Y.append(total1Y)
+        steps.errors.append(error)
+        if boundaries:
+            steps.boundaries[counter] = boundaries
+            state.boundaries += boundaries
+        if error:
+            state.totalERR += delta_1
+            newErrors.append([counter, None])
+        dateOld = day
+        wasUK = destinUK[counter]
+
+    for er in newErrors:
+        er[:] = [state.count + er[0], steps[er[0]].errorText()]
+    state.errors += newErrors
+    result.errors += state.errors
+
+    ordinal5Y = date5Y.toordinal()
+    if resumed and ordinals and ordinals[0] > ordinal5Y and not originUK[0] and not state.wasUK:
+        # the stay abroad from the last flight folded in before to the first new one
+        state.periods.append((max(state.dateOld, ordinal5Y), ordinals[0]))
+    if ordinals:
+        state.destinOld = flights.codes[flights.destins[-1]]
+    state.count += len(ordinals)
+    state.dateOld = dateOld
+    state.wasUK = wasUK
+    result.dateOld = dateX.fromordinal(dateOld)
+    result.wasUK = wasUK
+    result.total5Y = state.total5Y = total5Y
+    result.total1Y = state.total1Y = total1Y
+    result.totalUK = state.totalUK = totalUK
+    result.totalEUR = state.totalEUR = totalEUR
+    result.totalERR = state.totalERR
+    stopwatch.lap('analysis')
+
+    state.periods += absenceOrdinals(flights, ordinal5Y)
+    rangeList = [Period(dateX.fromordinal(dateFrom), dateX.fromordinal(dateTo)) for dateFrom, dateTo in state.periods]
+    stopwatch.lap('periods')
+    absenceIndex = result.index = ENGINES[engine](rangeList, date5Y, result.dateApplyStar)
+    stopwatch.lap('index')
+    result.cuntMax = monthWindowMax(absenceIndex, date5Y)
+    stopwatch.lap('windows')
+    if allWindows:
+        result.worst = slidingWindowMax(absenceIndex)
+        stopwatch.lap('sliding')
+    return result
+
+
+def resultRecord(result, source=None):
+    """Return a Result as a dict of plain values, ready for json.dumps()."""
+    limits = result.limits()
+    log = result.log
+    record = {
+        'source': source if source is not None else (log.source if log is not None else None),
+        'dateApply': result.dateApply.isoformat(),
+        'date5Y': result.date5Y.isoformat(),
+        'date1Y': result.date1Y.isoformat(),
+        'dateApplyStar': result.dateApplyStar.isoformat(),
+        'date5YStar': result.date5YStar.isoformat(),
+        'date1YStar': result.date1YStar.isoformat(),
+        'flights': result.state.count if result.state is not None else len(result.flights),
+        'total5Y': result.total5Y,
+        'total1Y': result.total1Y,
+        'cuntMax': result.cuntMax,
+        'worst': None,
+        'totalUK': result.totalUK,
+        'totalEUR': result.totalEUR,
+        'totalERR': result.totalERR,
+        'limits': limits,
+        'passed': all(limits.values()),
+        'errors': [er[1] for er in result.errors],
+        'cancelledCount': log.cancelledCount if log is not None else 0,
+        'cancelled': [{'date': ca.date.isoformat(), 'origin': ca.origin, 'originUK': ca.originUK,
+                       'destin': ca.destin, 'destinUK': ca.destinUK, 'airline': ca.airline,
+                       'number': ca.number} for ca in (log.cancelled if log is not None else ())],
+    }
+    if result.worst is not None:
+        worstMax, worstFrom, worstTo = result.worst
+        record['worst'] = {'days': worstMax, 'dateFrom': worstFrom.isoformat(), 'dateTo': worstTo.isoformat()}
+    return record
+
+
+def render(result, style=ctyle, summaryOnly=False):
+    """Return the text report of a Result, as printed by the script.
+
+    style is ctyle for a coloured report or noctyle for plain text; summaryOnly
+    leaves out the list of entries and the flight by flight analysis.
+    """
+    c = style
+    lines = []
+    log = result.log
+    if log is not None and not summaryOnly:
+        source = '<stdin>' if log.source == '-' else log.source
+        lines.append(f'\n{c.U}READING ENTRIES (FLIGHTS) IN THE CSV FILE, \n{source}:{c.END}')
+        errors = {}
+        for er in log.errors:
+            errors.setdefault(er[0] if log.entries else 0, []).append(er[1])
+        flight_count = 0
+        for i, ro in enumerate(log.entries + [None]):
+            for errorTxt in errors.get(i, []):
+                lines.append(f'{c._RED} Error {c.END} {c.RED}{errorTxt}{c.END}')
+            if ro is None:
+                break
+            flight_count += 0 if ro.cancelled else 1
+            airline = ro.airline if ro.airline else f'{c.PNK_D}unknown{c.END}'
+            number = ro.number if ro.number else f'{c.PNK_D}unknown{c.END}'
+            lines.append(f'{c.G+"CANCELd" if ro.cancelled else flight_count}\tFlight on {ro.date}'
+                         f' from {grnOrRed(ro.originUK, ro.origin, c)}'
+                         f'{c.G if ro.cancelled else ""} to {grnOrRed(ro.destinUK, ro.destin, c)}'
+                         f'{c.G if ro.cancelled else ""} by {airline} with number {number}{c.END}')
+        lines.append(f'Processed {log.flightCount + log.cancelledCount} lines '
+                     f'({log.flightCount} flights + {log.cancelledCount} cancelled).')
+
+        if log.cancelled:
+            lines.append(f'{c.G}-----------------------------------------------{c.END}')
+            lines.append("CANCELLED:")
+            for i, ca in enumerate(log.cancelled, 1):
+                lines.append(f"{i}. \t{ca.date:%d/%m/%y}: from {ca.origin} "
+                             f"({'UK' if ca.originUK else 'NON-UK'}) to {ca.destin} "
+                             f"({'UK' if ca.destinUK else 'NON-Uk'}) ")
+            if log.cancelledCount > len(log.cancelled):
+                lines.append(f"{c.G}... and {log.cancelledCount - len(log.cancelled)} more{c.END}")
+
+    boundaryText = {
+        '5Y': f'{c.YEL}------- {result.date5Y} 5 year --------{c.END}',
+        '5Y*': f'{c.G}------- {result.date5YStar} 5 year (*) ----{c.END}',
+        '1Y': f'{c.YEL}------- {result.date1Y} 12 month ------{c.END}',
+        '1Y*': f'{c.G}------- {result.date1YStar} 12 month (*) --{c.END}',
+    }
+    wasUK, dateApply, dateApplyStar = result.wasUK, result.dateApply, result.dateApplyStar
+    if not summaryOnly:
+        lines.append(f'{c.G}-----------------------------------------------{c.END}')
+        lines.append(f'\n{c.U}ANALYSING THE FLIGHTS:{c.END}')
+        for step in result.steps:
+            if not step.error:
+                if step.wasUK:
+                    lines.append(f'{c.BLU}UK \t{step.delta1} days{c.END}')
+                else:
+                    lines.append(f'{c.PNK}NON-UK \t{step.delta1} days{c.END}')
+            for boundary in step.boundaries:
+                lines.append(boundaryText[boundary])
+            if not step.error and step.delta2:
+                if step.wasUK:
+                    lines.append(f'{c.BLU}UK \t{step.delta2} days{c.END}')
+                else:
+                    lines.append(f'{c.PNK}NON-UK \t{step.delta2} days{c.END}')
+            if step.error:
+                ro = step.flight
+                lines.append(f'{c._RED} Error {c.END} '
+                             f'{c.RED}{step.delta1}d {step.destinOld}@{step.dateOld:%d/%m/%y}{c.END} '
+                             f'{"UK" if step.wasUK else "NON-UK"} - {"UK" if ro.originUK else "NON-UK"} '
+                             f'{ro.origin}@{ro.date:%d/%m/%y}')
+            lines.append(f'\t{step.flight.date} from {step.flight.origin}'
+                         f' to {step.flight.destin} {c.G}{step.total5Y}, {step.total1Y}{c.END}')
+
+        lines.append(f'{c.GRN if wasUK else c.RED}{(dateApply - result.dateOld).days} days stay in UK{c.END}')
+        lines.append(f'{c.YEL}------- {dateApply} Applying ------{c.END}')
+        if not dateApply == dateApplyStar:
+            lines.append(f'{c.GRN if wasUK else c.RED}{(dateApplyStar - dateApply).days} days stay in UK{c.END}')
+            lines.append(f'{c.G}------- {dateApplyStar} Applying (*) --{c.END}')
+
+    total5Y, total1Y, cuntMax = result.total5Y, result.total1Y, result.cuntMax
+    totalUK, totalEUR, totalERR = result.totalUK, result.totalEUR, result.totalERR
+    lines.append(f'{c.G}-----------------------------------------------{c.END}')
+    lines.append(f'Applying Period:        {result.date5Y} - {dateApply}')
+    lines.append(f'12-Month Period:        {result.date1Y} - {dateApply}')
+    lines.append(f'{c.G}-----------------------------------------------{c.END}')
+    lines.append(f'Total outside UK (12M): '
+                 f'{c.GRN if total1Y<90 else c.RED}{total1Y}{c.G}d (Max 3M) ≈> {10*total1Y/9:.1f}%{c.END}')
+    lines.append(f'Total outside UK (5Y):  '
+                 f'{c.GRN if total5Y<450 else c.RED}{total5Y}{c.G}d (Max 450d) => {10*total5Y/45:.1f}%{c.END}')
+    lines.append(f'Outside UK (any 12-M):  '
+                 f'{c.GRN if cuntMax<180 else c.RED}{cuntMax}{c.G}d (Max 6M) ≈> {10*cuntMax/18:.1f}%{c.END}')
+    if result.worst is not None:
+        worstMax, worstFrom, worstTo = result.worst
+        lines.append(f'Worst 12-M (any day):   '
+                     f'{c.GRN if worstMax<180 else c.RED}{worstMax}{c.G}d ({worstFrom} - {worstTo}){c.END}')
+    lines.append(f'{c.G}-----------------------------------------------{c.END}')
+    lines.append(f'Total outside UK:       {totalEUR}{c.G}d ({totalEUR/365:.1f} year){c.END}')
+    lines.append(f'Total in UK:            {totalUK}{c.G}d ({totalUK/365:.1f} year){c.END}')
+    if result.errors:
+        lines.append(f'{c.G}-----------------------------------------------{c.END}')
+        lines.append(f'Total in ERR:           {totalERR}{c.G}d ({totalERR/365:.1f} year){c.END}')
+        for i, er in enumerate(result.errors, 1):
+            lines.append(f'{i}. \t{c.RED}{er[1]}{c.END}')
+    lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def renderMissingDate(script, style=ctyle):
+    """Return the error printed when the script is run without an application date."""
+    c = style
+    return (f'{c._RED} Error:{c.END}{c.RED} Missing Argument{c.END}{c.G}\n\tEnter the date of UK passport application, '
+            f'in format {c.END}{c.GRN}DDMMYY{c.END}{c.G}, e.g:{c.END}\n\t> {c.BLU}python3 {script.strip()} {c.GRN}020223{c.END}\n')
+
+
+def renderTimings(timings, style=ctyle):
+    """Return the time spent in each stage of a run, as printed by --profile."""
+    c = style
+    total = sum(timings.values())
+    lines = [f'{c.U}STAGES:{c.END}']
+    for stage, seconds in timings.items():
+        lines.append(f'{stage:<10} {1000*seconds:>9.3f}ms {c.G}{100*seconds/total if total else 0:>5.1f}%{c.END}')
+    lines.append(f'{"total":<10} {1000*total:>9.3f}ms')
+    return '\n'.join(lines) + '\n'
+
+    
+#######################################################
+
+def main():
+    """Run the command line of BPDatesValidator.py."""
+    if len(sys.argv) == 1:
+        # shell integrations call the script often: the usage error goes out before argparse is loaded
+        out = TermBuffer()
+        out.write(renderMissingDate(sys.argv[0], out.style))
+        out.flush()
+        sys.exit()
+    import argparse
+    parser = argparse.ArgumentParser(description='British Passport Abroad Dates Validator')
+    parser.add_argument('date', nargs='?', help='date of the UK passport application, DDMMYY')
+    parser.add_argument('csv', nargs='?', metavar='CSV',
+                        help="CSV (or Parquet, Arrow, .bpfa archive) file with the flights, '-' for stdin "
+                             "(default: the first CSV next to the script)")
+    parser.add_argument('--all-windows', action='store_true',
+                        help='also report the worst 12-month window over every start day')
+    parser.add_argument('--engine', choices=sorted(ENGINES) + ['numpy'], default='prefix',
+                        help='absence counting: prefix-sum day index, interval sweep or Fenwick trees (default: '
+                             'prefix); numpy evaluates --applicants in blocks, if NumPy is installed')
+    parser.add_argument('-i', '--input', metavar='CSV', nargs='+',
+                        help="more CSV files or globs with the flights, all merged by date, '-' for stdin")
+    parser.add_argument('--stream', action='store_true',
+                        help='read the CSV row by row without keeping or listing every entry')
+    parser.add_argument('--format', choices=['text', 'json', 'ndjson'], default='text',
+                        help='report as coloured text, a JSON document or one JSON record per line')
+    parser.add_argument('--summary-only', action='store_true',
+                        help='print only the totals, without listing the entries and the analysis')
+    parser.add_argument('--cache', metavar='DIR',
+                        help='keep the parsed flights of every CSV in DIR, to skip parsing them again')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='save the analysis state to FILE and, next time, only read the rows added since')
+    parser.add_argument('--profile', nargs='?', const='', metavar='STATS',
+                        help='print the time spent in each stage, and save cProfile stats to STATS if given')
+    parser.add_argument('--batch', metavar='DIR|MANIFEST',
+                        help='validate every CSV in a directory, or the files listed in a manifest')
+    parser.add_argument('--applicants', action='store_true',
+                        help='the CSV starts with an applicant ID column: validate every applicant on their own')
+    parser.add_argument('--applicant', metavar='ID',
+                        help='validate only this applicant of a flight archive of many applicants')
+    parser.add_argument('--archive', metavar='FILE',
+                        help='write the flights (with --applicants, of every applicant) into a binary flight '
+                             'archive FILE, read much faster than CSV')
+    parser.add_argument('--check', action='store_true',
+                        help='only check the history: report every unreadable date, row out of order and UK/non-UK break')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='stop at the first break of the history and exit with status 1, before any analysis')
+    parser.add_argument('--plan-trip', metavar='DDMMYY',
+                        help='find the longest trip leaving the UK on this date that keeps every limit')
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                        help='run as an HTTP service validating the flights POSTed to /validate (localhost by default)')
+    parser.add_argument('--max-concurrent', type=int, metavar='N',
+                        help='validations the service runs at once (default: one per worker)')
+    parser.add_argument('--workers', type=int, help='number of batch, service or CSV parsing workers (default: one per core)')
+    parser.add_argument('--threads', action='store_true',
+                        help='run batch or service workers as threads instead of processes (free-threaded builds)')
+    args = parser.parse_args()
+    if args.format != 'text':
+        import json
+    if args.engine == 'numpy' and not args.applicants:
+        parser.error('--engine numpy evaluates many applicants at once, it takes --applicants')
+    if (args.check or args.archive) and args.date and args.csv is None and not args.date.isdigit():
+        # these take no date: a single positional argument is the CSV file
+        args.date, args.csv = None, args.date
+    out = TermBuffer()
+    c = out.style
+    dateApply = parseApplyDate(args.date) if args.date else None
+    if args.serve:
+        from http_service import serve
+        serve(args.serve, workers=args.workers, threads=args.threads, maxConcurrent=args.max_concurrent,
+              engine=args.engine)
+        sys.exit()
+
+    if dateApply is None and not (args.batch or args.check or args.archive):
+        out.write(renderMissingDate(sys.argv[0], c))
+        out.flush()
+        sys.exit();
+
+    if args.batch:
+        if args.check:
+            parser.error('--check takes the CSV files of one history, not --batch (use --fail-fast)')
+        from batch_mode import batchJobs, runBatch, renderBatch
+        start = time.perf_counter()
+        try:
+            jobs = batchJobs(args.batch, dateApply)
+        except (OSError, ValueError) as e:
+            parser.error(f'--batch {args.batch}: {e}')
+        if args.format == 'text':
+            rows = list(runBatch(jobs, args.workers, args.threads, args.engine, cache=args.cache,
+                                 failFast=args.fail_fast))
+            out.write(renderBatch(rows, time.perf_counter() - start, c))
+            out.flush()
+            sys.exit()
+        # records are written as they finish and never kept, whatever the number of histories
+        asArray = args.format == 'json'
+        sys.stdout.write('[' if asArray else '')
+        for i, row in enumerate(runBatch(jobs, args.workers, args.threads, args.engine, True, args.cache,
+                                         args.fail_fast)):
+            record = json.dumps(row.asRecord())
+            sys.stdout.write(f'{"," if i else ""}\n{record}' if asArray else f'{record}\n')
+        sys.stdout.write('\n]\n' if asArray else '')
+        sys.exit()
+
+    if args.csv or args.input:
+        my_files = []
+        for pattern in ([args.csv] if args.csv else []) + (args.input or []):
+            found = [pattern]
+            if any(ch in pattern for ch in '*?['):
+                import glob
+                found = sorted(glob.glob(pattern))
+            if not found:
+                parser.error(f'no CSV file matches {pattern}')
+            my_files += found
+    else:
+        path = os.path.dirname(os.path.abspath(__file__))
+        with os.scandir(path) as entries:
+            my_files = [next((entry.path for entry in entries if entry.name.endswith('.csv')), None)]
+        if my_files[0] is None:
+            parser.error(f'no CSV file given, and none in {path}')
+    my_file = my_files[0] if len(my_files) == 1 else ', '.join(my_files)
+    if any(isColumnar(f) or isArchive(f) for f in my_files) and (args.check or args.fail_fast or args.checkpoint):
+        parser.error('--check, --fail-fast and --checkpoint read CSV files only')
+    if any(isColumnar(f) for f in my_files) and args.applicants:
+        parser.error('--applicants reads CSV files or flight archives only')
+    if args.checkpoint and len(my_files) > 1:
+        parser.error('--checkpoint takes a single CSV file')
+    if args.applicant is not None and (len(my_files) > 1 or not isArchive(my_file) or args.applicants
+                                       or args.plan_trip):
+        parser.error('--applicant takes a single flight archive, without --applicants or --plan-trip')
+
+    if args.archive:
+        from flight_archive import convertFlights
+        if len(my_files) > 1 or isArchive(my_file):
+            parser.error('--archive takes a single CSV (or Parquet, Arrow) file')
+        applicants, records = convertFlights(my_file, args.archive, args.applicants)
+        out.print(f'{c.G}Archived{c.END} {records} flights of {applicants} applicant{"s" if applicants != 1 else ""} '
+                  f'into {args.archive} ({os.path.getsize(args.archive)} bytes)')
+        out.flush()
+        sys.exit()
+
+    if args.applicants:
+        from applicants import readApplicants, renderApplicants
+        if args.check or args.fail_fast:
+            parser.error('--check and --fail-fast do not take --applicants')
+        if len(my_files) > 1:
+            parser.error('--applicants takes a single CSV file')
+        # every applicant is written out as soon as their rows end
+        if args.format == 'text':
+            for text in renderApplicants(readApplicants(my_file, dateApply, args.engine), c):
+                out.write(text)
+                out.flush()
+            sys.exit()
+        asArray = args.format == 'json'
+        sys.stdout.write('[' if asArray else '')
+        for i, row in enumerate(readApplicants(my_file, dateApply, args.engine, True)):
+            record = json.dumps(row.asRecord())
+            sys.stdout.write(f'{"," if i else ""}\n{record}' if asArray else f'{record}\n')
+        sys.stdout.write('\n]\n' if asArray else '')
+        sys.exit()
+
+    if args.check or args.fail_fast:
+        from history_check import checkFiles, renderBreaks
+        if not args.check:
+            # the history is read once to be checked and once more to be analysed
+            if '-' in my_files:
+                parser.error('--fail-fast can not read stdin twice, use --check --fail-fast')
+            brk = next(checkFiles(my_files, True), None)
+            if brk is not None:
+                err = TermBuffer(sys.stderr)
+                err.write(f'{err.style.RED}Flight history break{err.style.END} in {brk.source}, {brk}\n')
+                err.flush()
+                sys.exit(1)
+        elif args.format == 'text':
+            breaks = list(checkFiles(my_files, args.fail_fast))
+            out.write(renderBreaks(breaks, c))
+            out.flush()
+            sys.exit(1 if breaks else 0)
+        else:
+            asArray = args.format == 'json'
+            breaks = 0
+            sys.stdout.write('[' if asArray else '')
+            for breaks, brk in enumerate(checkFiles(my_files, args.fail_fast), 1):
+                record = json.dumps(brk.asRecord())
+                sys.stdout.write(f'{"," if breaks > 1 else ""}\n{record}' if asArray else f'{record}\n')
+            sys.stdout.write('\n]\n' if asArray else '')
+            sys.exit(1 if breaks else 0)
+
+    if args.plan_trip:
+        from trip_planner import planTrip, tripRecord, renderTrip
+        log = FlightStream(my_file) if len(my_files) == 1 else FlightStreams(my_files)
+        try:
+            departure = parseApplyDate(args.plan_trip)
+        except ValueError:
+            parser.error(f'wrong --plan-trip date {args.plan_trip}, expected DDMMYY')
+        try:
+            plan = planTrip(log, dateApply, departure, args.engine)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.format == 'text':
+            out.write(renderTrip(plan, c))
+        else:
+            out.print(json.dumps(tripRecord(plan), indent=2 if args.format == 'json' else None))
+        out.flush()
+        sys.exit()
+
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    stream = args.stream or args.summary_only or '-' in my_files
+    if args.checkpoint and my_file != '-':
+        # the steps before the checkpoint are not kept, so only the summary can be printed
+        from checkpoint import analyseIncremental
+        result = analyseIncremental(my_file, dateApply, args.checkpoint, args.engine, args.all_windows)
+        args.summary_only = True
+    else:
+        if args.applicant is not None:
+            from flight_archive import FlightArchive
+            with FlightArchive(my_file) as archive:
+                try:
+                    log = archive.flights(args.applicant)
+                except KeyError:
+                    parser.error(f'no applicant {args.applicant} in {my_file}')
+        elif args.cache and '-' not in my_files:
+            from flight_cache import FlightCache
+            # the rows of a cached file are read back only for the report that lists them
+            entries = args.format == 'text' and not args.summary_only
+            log = loadFlightFiles(my_files, args.workers, functools.partial(FlightCache(args.cache).load,
+                                                                            entries=entries), entries)
+        elif stream:
+            log = FlightStream(my_file) if len(my_files) == 1 else FlightStreams(my_files)
+        else:
+            log = loadFlightFiles(my_files, args.workers, entries=args.format == 'text')
+        result = analyse(log, dateApply, engine=args.engine, allWindows=args.all_windows)
+    stopwatch = Stopwatch(result.timings)
+    if args.format == 'text':
+        out.write(render(result, c, args.summary_only))
+    else:
+        out.print(json.dumps(resultRecord(result, my_file), indent=2 if args.format == 'json' else None))
+    stopwatch.lap('render')
+    if args.profile:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    out.flush()
+    if args.profile is not None:
+        err = TermBuffer(sys.stderr)
+        err.write(renderTimings(result.timings, err.style))
+        err.flush()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+from bpdates import dateX, Flight, FlightLog, AnalysisState, analyse
+
+import os, io, csv, json, hashlib, tempfile
+
+# Incremental re-evaluation of the British Passport Abroad Dates Validator.
+#
+# Histories only grow at the end, so after a run the state of the analysis
+# at the last row (the running totals, wasUK, dateOld, the periods abroad,
+# the errors) is saved to a checkpoint file, along with the length and a hash
+# of the CSV content it covers. The next run checks that the file still starts
+# with that content, parses only the rows appended since and folds them into
+# the saved state; the 12-month windows are then scanned again from the saved
+# periods. When the file was edited before its end, the application date is
+# another one, or a new flight comes before the last one analysed, everything
+# is computed again from the first row.
+# A checkpoint only ever covers whole lines: while the last line of the file
+# has no line break yet, it is read on every run and the checkpoint kept.
+#
+# Please run script with --checkpoint, eg:
+#   >   BPDatesValidator.py 101220 --checkpoint history.ckpt
+
+VERSION = 1
+
+
+def analyseIncremental(path, dateApply, checkpointPath, engine='prefix', allWindows=False):
+    """Return the Result of a CSV history, parsing only the rows added since its checkpoint.
+
+    The checkpoint file is written (or updated) on the way; Result.resumed
+    tells whether the earlier state could be used.
+    """
+    with open(path, 'rb') as csv_file:
+        data = csv_file.read()
+    dateApply = dateX(dateApply.year, dateApply.month, dateApply.day)
+    restored = restoreCheckpoint(checkpointPath, data, dateApply)
+    result = None
+    if restored is not None:
+        log, state, offset = restored
+        log.source = path
+        log.readRows(csvRows(data[offset:]))
+        if not state.count or all(flight.date.toordinal() >= state.dateOld for flight in log.flights):
+            result = analyse(log, dateApply, engine, allWindows, state)
+    if result is None:
+        log = FlightLog(path).readRows(csvRows(data))
+        result = analyse(log, dateApply, engine, allWindows)
+    result.resumed = restored is not None and result.state is restored[1]
+    if not data or data.endswith(b'\n'):
+        saveCheckpoint(checkpointPath, data, dateApply, result)
+    return result
+
+
+def csvRows(data):
+    return csv.reader(io.TextIOWrapper(io.BytesIO(data)), delimiter=',')
+
+
+def restoreCheckpoint(checkpointPath, data, dateApply):
+    """Return the (FlightLog, AnalysisState, offset) of a checkpoint matching data, or None."""
+    try:
+        with open(checkpointPath) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint['version'] != VERSION or checkpoint['dateApply'] != dateApply.isoformat():
+            return None
+        offset = checkpoint['offset']
+        if len(data) < offset or hashlib.sha256(data[:offset]).hexdigest() != checkpoint['digest']:
+            return None
+        log = FlightLog()
+        log.flightCount = checkpoint['flightCount']
+        log.cancelledCount = checkpoint['cancelledCount']
+        log.cancelled = [Flight(dateX.fromordinal(ca[0]), *ca[1:], cancelled=True) for ca in checkpoint['cancelled']]
+        log.errors = checkpoint['errors']
+        return log, AnalysisState(**checkpoint['state']), offset
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def saveCheckpoint(checkpointPath, data, dateApply, result):
+    """Write the checkpoint of a Result covering all of data, replacing the old one at once."""
+    log = result.log
+    checkpoint = {
+        'version': VERSION,
+        'dateApply': dateApply.isoformat(),
+        'offset': len(data),
+        'digest': hashlib.sha256(data).hexdigest(),
+        'flightCount': log.flightCount,
+        'cancelledCount': log.cancelledCount,
+        'cancelled': [[ca.date.toordinal(), ca.origin, ca.originUK, ca.destin, ca.destinUK, ca.airline, ca.number]
+                      for ca in log.cancelled],
+        'errors': log.errors,
+        'state': vars(result.state),
+    }
+    handle, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(checkpointPath)), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temp, checkpointPath)
+    except BaseException:
+        os.unlink(temp)
+        raise
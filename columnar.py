@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+from bpdates import Flight, FlightArray, FlightLog, dateParser, dateX
+
+import time
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:  # DataFrames are then read with pandas alone, Parquet files with pandas.read_parquet()
+    pyarrow = None
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+# Columnar input of the British Passport Abroad Dates Validator.
+#
+# Reads flight histories kept as Parquet or Arrow (Feather) files, Arrow
+# tables or pandas DataFrames, with pyarrow or pandas, whichever is installed.
+# The columns are taken in the order of the CSV file:
+#
+#   DepartDateTime,DepartPlace,IsUK,ArrivePlace,IsUK,Airline,FlNumber,WasCancelled
+#
+#   where:
+#       DepartDateTime => a date or timestamp column, or strings in one of
+#                         the formats of the CSV file
+#       IsUK, IsUK, WasCancelled => booleans, numbers (1 for True) or
+#                         strings ("True" or "TRUE" for True)
+#       Airline, FlNumber => may be left out
+#
+# Every column is converted as a whole: dates to day ordinals, flags to
+# boolean arrays, airport codes to ids into their distinct values. Only the
+# distinct date strings are parsed, one at a time. The flights then go
+# straight into a FlightArray in date order, without a row or a Flight object
+# for each of them.
+#
+# Please run script with a .parquet, .feather or .arrow file, eg:
+#   >   BPDatesValidator.py 101220 flights.parquet
+#   >   BPDatesValidator.py 101220 -i 'warehouse/*.parquet' --summary-only
+
+# day ordinal of 1970-01-01, day 0 of date32 and datetime64[D]
+EPOCH = dateX(1970, 1, 1).toordinal()
+
+
+class Columns:
+    # The 8 columns of a flight history as NumPy arrays: the day ordinals (0
+    # where a date can not be read, its text then in `unread`), the flags as
+    # booleans and the text columns as (ids, distinct values).
+    def __init__(self, ordinals, unread, origins, originUK, destins, destinUK, airlines, numbers, cancelled):
+        self.ordinals = ordinals
+        self.unread = unread
+        self.origins = origins
+        self.originUK = originUK
+        self.destins = destins
+        self.destinUK = destinUK
+        self.airlines = airlines
+        self.numbers = numbers
+        self.cancelled = cancelled
+
+
+def readDates(values, ids):
+    """Return the day ordinals of the distinct date values, 0 for those that can not be read."""
+    readDate = dateParser()
+    ordinals = numpy.zeros(len(values) + 1, dtype=numpy.int64)
+    for i, value in enumerate(values):
+        if isinstance(value, str):
+            dt = readDate(value)
+            ordinals[i] = dt.toordinal() if dt is not None else 0
+        elif hasattr(value, 'toordinal'):
+            ordinals[i] = value.toordinal()
+    return ordinals[ids]
+
+
+def unreadTexts(ordinals, ids, values):
+    texts = values + ['']
+    return {int(i): str(texts[ids[i]]) for i in numpy.flatnonzero(ordinals == 0)}
+
+
+def arrowCodes(column):
+    """Return the (ids, distinct values) of an Arrow column, None values as ''."""
+    if column is None:
+        return None
+    encoded = pyarrow.compute.dictionary_encode(column.cast(pyarrow.string())).combine_chunks()
+    values = encoded.dictionary.to_pylist()
+    ids = encoded.indices.fill_null(len(values)).to_numpy(zero_copy_only=False)
+    return ids, values + ['']
+
+
+def arrowFlags(column, rows):
+    """Return an Arrow column as booleans, as csvBool() reads each value."""
+    if column is None or pyarrow.types.is_null(column.type):
+        return numpy.zeros(rows, dtype=bool)
+    if pyarrow.types.is_boolean(column.type):
+        flags = column
+    elif pyarrow.types.is_integer(column.type) or pyarrow.types.is_floating(column.type):
+        flags = pyarrow.compute.equal(column, 1)
+    else:
+        flags = pyarrow.compute.is_in(column.cast(pyarrow.string()), value_set=pyarrow.array(['TRUE', 'True']))
+    return flags.fill_null(False).to_numpy(zero_copy_only=False).astype(bool)
+
+
+def arrowColumns(table):
+    """Return the Columns of an Arrow table."""
+    rows = table.num_rows
+    columns = [table.column(i) if i < table.num_columns else None for i in range(8)]
+    dates = columns[0]
+    if pyarrow.types.is_date(dates.type) or pyarrow.types.is_timestamp(dates.type):
+        days = pyarrow.compute.cast(dates.cast(pyarrow.date32()), pyarrow.int32())
+        ordinals = days.fill_null(-EPOCH).to_numpy(zero_copy_only=False).astype(numpy.int64) + EPOCH
+        unread = {int(i): '' for i in numpy.flatnonzero(ordinals == 0)}
+    else:
+        ids, values = arrowCodes(dates)
+        ordinals = readDates(values[:-1], ids)
+        unread = unreadTexts(ordinals, ids, values[:-1])
+    return Columns(ordinals, unread, arrowCodes(columns[1]), arrowFlags(columns[2], rows), arrowCodes(columns[3]),
+                   arrowFlags(columns[4], rows), arrowCodes(columns[5]), arrowCodes(columns[6]),
+                   arrowFlags(columns[7], rows))
+
+
+def frameCodes(column):
+    """Return the (ids, distinct values) of a DataFrame column, missing values as ''."""
+    if column is None:
+        return None
+    ids, values = pandas.factorize(column)
+    values = [str(value) for value in values]
+    return numpy.where(ids < 0, len(values), ids), values + ['']
+
+
+def frameFlags(column, rows):
+    """Return a DataFrame column as booleans, as csvBool() reads each value."""
+    if column is None:
+        return numpy.zeros(rows, dtype=bool)
+    if pandas.api.types.is_bool_dtype(column):
+        return column.fillna(False).to_numpy(dtype=bool)
+    if pandas.api.types.is_numeric_dtype(column):
+        return (column == 1).to_numpy(dtype=bool)
+    return column.isin(['TRUE', 'True', 1]).to_numpy(dtype=bool)
+
+
+def frameColumns(frame):
+    """Return the Columns of a pandas DataFrame."""
+    rows = len(frame)
+    columns = [frame.iloc[:, i] if i < frame.shape[1] else None for i in range(8)]
+    dates = columns[0]
+    if pandas.api.types.is_datetime64_any_dtype(dates):
+        missing = dates.isna().to_numpy()
+        days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(numpy.int64)
+        ordinals = numpy.where(missing, 0, days + EPOCH)
+        unread = {int(i): '' for i in numpy.flatnonzero(missing)}
+    else:
+        ids, values = pandas.factorize(dates)
+        ids = numpy.where(ids < 0, len(values), ids)
+        ordinals = readDates(list(values), ids)
+        unread = unreadTexts(ordinals, ids, [str(value) for value in values])
+    return Columns(ordinals, unread, frameCodes(columns[1]), frameFlags(columns[2], rows), frameCodes(columns[3]),
+                   frameFlags(columns[4], rows), frameCodes(columns[5]), frameCodes(columns[6]),
+                   frameFlags(columns[7], rows))
+
+
+def columnsLog(columns, source=None):
+    """Return the FlightLog of Columns, its flights a FlightArray in date order and no entries kept."""
+    if columns.origins is None or columns.destins is None:
+        raise ValueError(f'{source or "the table"}: a flight history needs at least the first 5 columns')
+    log = FlightLog(source)
+    readable = columns.ordinals != 0
+    # an error is placed before the row read after it, as FlightLog.readRow() places it
+    for k, i in enumerate(sorted(columns.unread)):
+        log.errors.append([i - k, f'CSV file error: Flight Date {columns.unread[i]} Has Wrong Format'])
+    cancelled = columns.cancelled & readable
+    taken = numpy.flatnonzero(readable & ~cancelled)
+    order = taken[numpy.argsort(columns.ordinals[taken], kind='stable')]
+
+    flights = log.flights = FlightArray()
+    (originIds, origins), (destinIds, destins) = columns.origins, columns.destins
+    originCodes = numpy.array([flights.codeId(code) for code in origins], dtype=numpy.uintc)
+    destinCodes = numpy.array([flights.codeId(code) for code in destins], dtype=numpy.uintc)
+    flights.ordinals.frombytes(columns.ordinals[order].astype(numpy.intc).tobytes())
+    flights.originUK = bytearray(columns.originUK[order].astype(numpy.uint8).tobytes())
+    flights.destinUK = bytearray(columns.destinUK[order].astype(numpy.uint8).tobytes())
+    flights.origins.frombytes(originCodes[originIds[order]].tobytes())
+    flights.destins.frombytes(destinCodes[destinIds[order]].tobytes())
+    log.flightCount = len(order)
+
+    def text(codes, i):
+        return codes[1][codes[0][i]] if codes is not None else ''
+    for i in numpy.flatnonzero(cancelled):
+        log.cancelled.append(Flight(dateX.fromordinal(int(columns.ordinals[i])), text(columns.origins, i),
+                                    bool(columns.originUK[i]), text(columns.destins, i), bool(columns.destinUK[i]),
+                                    text(columns.airlines, i), text(columns.numbers, i), True))
+    log.cancelledCount = len(log.cancelled)
+    return log
+
+
+def loadTable(table, source=None):
+    """Return the FlightLog of an Arrow table or of a pandas DataFrame."""
+    start = time.perf_counter()
+    if pandas is not None and isinstance(table, pandas.DataFrame):
+        log = columnsLog(frameColumns(table), source)
+    elif pyarrow is not None and isinstance(table, pyarrow.Table):
+        if numpy is None:
+            raise ValueError('reading Arrow tables needs NumPy installed')
+        log = columnsLog(arrowColumns(table), source)
+    else:
+        raise TypeError(f'not an Arrow table nor a pandas DataFrame: {type(table).__name__}')
+    log.seconds = time.perf_counter() - start
+    return log
+
+
+def loadColumnar(source):
+    """Return the FlightLog of a Parquet, Feather or Arrow file."""
+    start = time.perf_counter()
+    parquet = str(source).lower().endswith('.parquet')
+    if pyarrow is not None:
+        table = pyarrow.parquet.read_table(source) if parquet else pyarrow.feather.read_table(source)
+    elif pandas is not None:
+        table = pandas.read_parquet(source) if parquet else pandas.read_feather(source)
+    else:
+        raise ValueError(f'{source}: reading Parquet or Arrow files needs pyarrow or pandas installed')
+    log = loadTable(table, source)
+    log.seconds = time.perf_counter() - start
+    return log
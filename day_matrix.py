@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+from bpdates import Flight, FlightArray, FlightLog, Result, analyse
+
+from array import array
+try:
+    import numpy
+except ImportError:  # the histories are then analysed one by one, in pure Python
+    numpy = None
+
+# NumPy engine of the British Passport Abroad Dates Validator.
+#
+# Evaluates many flight histories for the same application date at once, e.g.
+# a whole caseload re-screened after a rules change. The flights of all the
+# histories go into flat NumPy arrays:
+#   *   total5Y and total1Y are summed per history from the gap before every
+#       flight, the way the analysis loop counts them (first boundary
+#       crossings included), in a few whole-array operations
+#   *   the days abroad go into a DayMatrix: a uint8 row per history on the
+#       day axis date5Y..dateApplyStar, and its cumulative sums along the
+#       axis, so each of the 12-month windows is counted for every history
+#       with one subtraction of two columns
+# Only the rule values come out (and the number of UK / NON-UK errors), not
+# the flight by flight analysis.
+# Without NumPy installed every history is analysed on its own instead, with
+# the same results.
+#
+# Please run script with --engine numpy and --applicants, eg:
+#   >   BPDatesValidator.py 101220 --applicants -i caseload.csv --engine numpy
+
+
+def flightColumns(history):
+    """Return the day ordinals and UK flags of the flights of a history, in date order.
+
+    history is a FlightLog or an iterable of Flights; the airport codes, which
+    a FlightArray would intern, are not needed here.
+    """
+    flights = history.flights if isinstance(history, FlightLog) else history
+    if isinstance(flights, FlightArray) and flights.isSorted():
+        return flights.ordinals, flights.originUK, flights.destinUK
+    flights = sorted(flights, key=Flight.getDate)
+    return (array('i', [flight.date.toordinal() for flight in flights]),
+            bytes([1 if flight.originUK else 0 for flight in flights]),
+            bytes([1 if flight.destinUK else 0 for flight in flights]))
+
+
+class DayMatrix:
+    # The days abroad of many histories for one application date: a row of
+    # 0/1 per history over the days date5Y..dateApplyStar, counted as an
+    # AbsenceIndex counts them, and the cumulative sums of every row. history
+    # gives the row (0..rows-1) of every flight, the flights in date order
+    # within a row and first marking the first flight of each.
+    def __init__(self, rows, history, ordinals, originUK, destinUK, first, dateApply):
+        bounds = Result(dateApply)
+        self.dateFrom = bounds.date5Y
+        self.dateTo = bounds.dateApplyStar
+        self.origin = self.dateFrom.toordinal()
+        size = max((self.dateTo - self.dateFrom).days + 1, 0)
+        # the periods of absenceOrdinals(), flight days not counted, clipped to the axis
+        previous = numpy.roll(ordinals, 1)
+        stays = ~first & (ordinals > self.origin) & (originUK == 0) & (numpy.roll(destinUK, 1) == 0)
+        start = numpy.maximum(numpy.maximum(previous[stays], self.origin) + 1 - self.origin, 0)
+        end = numpy.minimum(ordinals[stays] - self.origin, size)
+        kept = start < end
+        # the stays of a history never overlap: the running sum of +1/-1 marks is 0 or 1 on every day
+        marks = numpy.zeros((rows, size + 1), dtype=numpy.int8)
+        numpy.add.at(marks, (history[stays][kept], start[kept]), 1)
+        numpy.add.at(marks, (history[stays][kept], end[kept]), -1)
+        self.abroad = numpy.cumsum(marks[:, :size], axis=1, dtype=numpy.int8).view(numpy.uint8)
+        self.prefix = numpy.zeros((rows, size + 1), dtype=numpy.int16)
+        numpy.cumsum(self.abroad, axis=1, dtype=numpy.int16, out=self.prefix[:, 1:])
+
+    def count(self, dateFrom, dateTo):
+        """Return the days abroad of every history between dateFrom and dateTo (inclusive)."""
+        start = max(dateFrom.toordinal() - self.origin, 0)
+        end = min(dateTo.toordinal() - self.origin + 1, self.prefix.shape[1] - 1)
+        if start >= end:
+            return numpy.zeros(self.prefix.shape[0], dtype=numpy.int64)
+        return self.prefix[:, end].astype(numpy.int64) - self.prefix[:, start]
+
+    def monthWindowMax(self, months=50):
+        """Return the monthWindowMax() of every history."""
+        cuntMax = numpy.zeros(self.prefix.shape[0], dtype=numpy.int64)
+        monthFirst = self.dateFrom.firstDay()
+        for month in range(0, months):
+            numpy.maximum(cuntMax, self.count(monthFirst.shiftMonth(month), monthFirst.shiftMonth(month + 11).lastDay()),
+                          out=cuntMax)
+        return cuntMax
+
+
+def ruleValues(histories, dateApply, engine='prefix'):
+    """Return (total5Y, total1Y, cuntMax, errors) of every history for an application on dateApply.
+
+    histories are FlightLogs or iterables of (not cancelled) Flights, errors the
+    number of flights leaving from the wrong side. With NumPy installed they
+    are all evaluated at once, else each is analysed with the given engine.
+    """
+    if numpy is None:
+        values = []
+        for history in histories:
+            result = analyse(history.flights if isinstance(history, FlightLog) else history, dateApply, engine=engine)
+            values.append((result.total5Y, result.total1Y, result.cuntMax, sum(result.steps.errors)))
+        return values
+
+    columns = [flightColumns(history) for history in histories]
+    if not columns:
+        return []
+    bounds = Result(dateApply)
+    ordinal5Y, ordinal5YStar = bounds.date5Y.toordinal(), bounds.date5YStar.toordinal()
+    ordinal1Y = bounds.date1Y.toordinal()
+    counts = numpy.array([len(ordinals) for ordinals, _, _ in columns], dtype=numpy.int64)
+    history = numpy.repeat(numpy.arange(len(columns)), counts)
+    ordinals = numpy.concatenate([numpy.frombuffer(ordinals, dtype=numpy.intc) for ordinals, _, _ in columns]
+                                 ).astype(numpy.int64)
+    originUK = numpy.concatenate([numpy.frombuffer(originUK, dtype=numpy.uint8) for _, originUK, _ in columns])
+    destinUK = numpy.concatenate([numpy.frombuffer(destinUK, dtype=numpy.uint8) for _, _, destinUK in columns])
+    first = numpy.zeros(len(ordinals), dtype=bool)
+    first[(numpy.cumsum(counts) - counts)[counts > 0]] = True
+
+    # the loop of analyse(): the gap before a flight counts when the one before landed abroad
+    previous, landedUK = numpy.roll(ordinals, 1), numpy.roll(destinUK, 1)
+    wasUK = numpy.where(first, originUK, landedUK) == 1
+    errors = ~first & (landedUK != originUK)
+    gap5Y = numpy.where(first, ordinal5Y, numpy.maximum(previous, ordinal5Y))
+    total5Y = numpy.where(~wasUK & (ordinals > ordinal5Y), ordinals - gap5Y, 0)
+    # crossing 1Y counts from the first boundary the flight crosses: 5Y, 5Y* or 1Y
+    crossed = numpy.where(first | (previous <= ordinal5Y), ordinal5Y,
+                          numpy.where(previous <= ordinal5YStar, ordinal5YStar, ordinal1Y))
+    gap1Y = numpy.where(~first & (previous > ordinal1Y), previous, crossed)
+    total1Y = numpy.where(~wasUK & (ordinals > ordinal1Y), ordinals - gap1Y, 0)
+
+    cuntMax = DayMatrix(len(columns), history, ordinals, originUK, destinUK, first, dateApply).monthWindowMax()
+    total5Y, total1Y, errors = (numpy.bincount(history, weights=values, minlength=len(columns)).astype(numpy.int64)
+                                for values in (total5Y, total1Y, errors))
+    return list(zip(total5Y.tolist(), total1Y.tolist(), cuntMax.tolist(), errors.tolist()))
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+from bpdates import dateX, Flight, FlightArray, FlightLog, loadFlights
+
+import os, sys, json, mmap, struct, tempfile
+from array import array
+
+# Binary flight archive of the British Passport Abroad Dates Validator.
+#
+# Keeps the flights of one history, or of many applicants, in fixed-size
+# binary records, so a large archive is read without parsing any text. The
+# file is mapped into memory and read in place: an applicant's records are
+# found through the index and unpacked straight from the page cache.
+#
+#       MAGIC (8 bytes), HEADER: records, applicants and the offsets of the
+#                        sections below (6 x uint64), padding to 64 bytes
+#       records          N x RECORD: day ordinal (int32), origin and
+#                        destination code ids (2 x uint32), flags (uint8:
+#                        1 origin UK, 2 destination UK, 4 cancelled), 3 bytes
+#                        padding; an applicant's records together, by date
+#       index            M x INDEX: offset and length of the applicant ID in
+#                        the ids section, number of records, first record;
+#                        ordered by applicant ID, for a binary search
+#       ids              the applicant IDs, UTF-8
+#       meta             {"codes": [...], "errors": [[applicant, index, text], ...],
+#                         "cancelled": [[applicant, record, airline, number], ...]}
+#
+# A single history is stored as the one applicant ''. The entries of the CSV
+# file are not kept, so the report of an archive does not list them.
+#
+# Please run script with --archive to write an archive, then give it as the
+# CSV file, eg:
+#   >   BPDatesValidator.py --archive history.bpfa history.csv
+#   >   BPDatesValidator.py 101220 history.bpfa
+#   >   BPDatesValidator.py --archive caseload.bpfa --applicants caseload.csv
+#   >   BPDatesValidator.py 101220 caseload.bpfa --applicant A1234
+#   >   BPDatesValidator.py 101220 --applicants -i caseload.bpfa
+
+MAGIC = b'BPFA1\n\0\0'
+HEADER = struct.Struct('<6Q')
+RECORD = struct.Struct('<iIIB3x')
+INDEX = struct.Struct('<QIIQ')
+RECORDS_AT = 64
+
+ORIGIN_UK, DESTIN_UK, CANCELLED = 1, 2, 4
+ORIGIN_FLAGS = bytes(flag & ORIGIN_UK for flag in range(256))
+DESTIN_FLAGS = bytes((flag & DESTIN_UK) >> 1 for flag in range(256))
+CANCELLED_MARKS = bytes((flag & CANCELLED) >> 2 for flag in range(256))
+# the columns are sliced out of the records as native 32-bit words where those are little-endian
+NATIVE = sys.byteorder == 'little' and array('i').itemsize == array('I').itemsize == 4
+
+
+def packHistory(log, codeIds):
+    """Return the records of a FlightLog, its flights and cancelled flights by date, as bytes.
+
+    Also returns the [airline, number] of the cancelled flights, by record position.
+    """
+    flights = sorted([*log.flights, *log.cancelled], key=Flight.getDate)
+    records = b''.join(RECORD.pack(flight.date.toordinal(), codeIds.setdefault(flight.origin, len(codeIds)),
+                                   codeIds.setdefault(flight.destin, len(codeIds)),
+                                   (ORIGIN_UK if flight.originUK else 0) | (DESTIN_UK if flight.destinUK else 0) |
+                                   (CANCELLED if flight.cancelled else 0)) for flight in flights)
+    return records, {i: [flight.airline or '', flight.number or ''] for i, flight in enumerate(flights)
+                     if flight.cancelled}
+
+
+def writeArchive(path, histories):
+    """Write (applicantId, FlightLog) pairs into a flight archive; return (applicants, records).
+
+    The records of an applicant ID showing up more than once are merged by date.
+    """
+    codeIds = {}
+    pending = {}
+    for applicant, log in histories:
+        records, details = packHistory(log, codeIds)
+        if applicant in pending:
+            before, errors, detailsBefore = pending[applicant]
+            offset = len(before) // RECORD.size
+            errors += [[offset + er[0], er[1]] for er in log.errors]
+            details = {**detailsBefore, **{offset + i: detail for i, detail in details.items()}}
+            merged = sorted(enumerate(RECORD.iter_unpack(before + records)), key=lambda item: item[1][0])
+            pending[applicant] = [b''.join(RECORD.pack(*record) for _, record in merged), errors,
+                                  {i: details[j] for i, (j, _) in enumerate(merged) if j in details}]
+        else:
+            pending[applicant] = [records, [list(er) for er in log.errors], details]
+
+    # UTF-8 keeps the order of the code points, so the sorted IDs are also sorted as bytes
+    applicants = sorted(pending)
+    keys = [applicant.encode() for applicant in applicants]
+    index = bytearray()
+    first = idOffset = 0
+    for key, applicant in zip(keys, applicants):
+        count = len(pending[applicant][0]) // RECORD.size
+        index += INDEX.pack(idOffset, len(key), count, first)
+        first += count
+        idOffset += len(key)
+    indexAt = RECORDS_AT + first * RECORD.size
+    idsAt = indexAt + len(index)
+    metaAt = idsAt + idOffset
+    meta = {'codes': list(codeIds),
+            'errors': [[k, *er] for k, applicant in enumerate(applicants) for er in pending[applicant][1]],
+            'cancelled': [[k, i, *detail] for k, applicant in enumerate(applicants)
+                          for i, detail in sorted(pending[applicant][2].items())]}
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as archive_file:
+            archive_file.write(MAGIC + HEADER.pack(first, len(applicants), RECORDS_AT, indexAt, idsAt, metaAt))
+            archive_file.write(bytes(RECORDS_AT - len(MAGIC) - HEADER.size))
+            for applicant in applicants:
+                archive_file.write(pending[applicant][0])
+            archive_file.write(index)
+            archive_file.write(b''.join(keys))
+            archive_file.write(json.dumps(meta).encode())
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return len(applicants), first
+
+
+def convertFlights(source, path, applicants=False):
+    """Write the flights of a CSV file (or stdin for '-') into a flight archive; return (applicants, records).
+
+    With applicants the CSV starts with an applicant ID column, as for --applicants.
+    """
+    import csv
+    from applicants import applicantGroups
+    if not applicants and source != '-':
+        return writeArchive(path, [('', loadFlights(source))])
+    csv_file = sys.stdin if source == '-' else open(source)
+    try:
+        rows = csv.reader(csv_file, delimiter=',')
+        if not applicants:
+            return writeArchive(path, [('', loadFlights(rows))])
+        return writeArchive(path, ((applicant, loadFlights(group)) for applicant, group in applicantGroups(rows)))
+    finally:
+        if csv_file is not sys.stdin:
+            csv_file.close()
+
+
+class FlightArchive:
+    # A flight archive mapped into memory. The records are never read as a
+    # whole: an applicant's are located through the index and read from the
+    # mapping, either as columns sliced out of the records or unpacked one
+    # at a time.
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as archive_file:
+            self.map = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self.map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f'{path}: not a flight archive')
+            (self.recordCount, self.applicantCount, self.recordsAt, self.indexAt, self.idsAt,
+             self.metaAt) = HEADER.unpack_from(self.map, len(MAGIC))
+            meta = json.loads(self.map[self.metaAt:])
+        except BaseException:
+            self.map.close()
+            raise
+        self.view = memoryview(self.map)
+        # every FlightArray read shares the one code table
+        self.codes = [sys.intern(code) for code in meta['codes']]
+        self.codeIds = {code: i for i, code in enumerate(self.codes)}
+        self.errors = {}
+        for k, i, text in meta['errors']:
+            self.errors.setdefault(k, []).append([i, text])
+        self.details = {(k, i): (airline, number) for k, i, airline, number in meta['cancelled']}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.applicantCount
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+    def entry(self, k):
+        """Return (applicantId, first record, number of records) of the k-th applicant of the index."""
+        idOffset, idLength, count, first = INDEX.unpack_from(self.map, self.indexAt + k * INDEX.size)
+        start = self.idsAt + idOffset
+        return self.map[start:start + idLength].decode(), first, count
+
+    def find(self, applicant):
+        """Return the position of an applicant in the index, with a binary search on the IDs."""
+        key = applicant.encode()
+        low, high = 0, self.applicantCount
+        while low < high:
+            middle = (low + high) // 2
+            idOffset, idLength, _, _ = INDEX.unpack_from(self.map, self.indexAt + middle * INDEX.size)
+            start = self.idsAt + idOffset
+            if self.map[start:start + idLength] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.applicantCount or self.entry(low)[0] != applicant:
+            raise KeyError(applicant)
+        return low
+
+    def applicants(self):
+        """Yield the applicant IDs, in the order of the index."""
+        for k in range(self.applicantCount):
+            yield self.entry(k)[0]
+
+    def records(self, applicant=''):
+        """Yield the (ordinal, origin id, destination id, flags) records of an applicant, by date."""
+        _, first, count = self.entry(self.find(applicant))
+        start = self.recordsAt + first * RECORD.size
+        yield from RECORD.iter_unpack(self.view[start:start + count * RECORD.size])
+
+    def flights(self, applicant=None):
+        """Return the FlightLog of an applicant, or of the only history of the archive."""
+        if applicant is None:
+            if self.applicantCount != 1:
+                raise ValueError(f'{self.path}: holds {self.applicantCount} applicants, choose one')
+            return self.log(0)
+        return self.log(self.find(applicant))
+
+    def logs(self):
+        """Yield (applicantId, FlightLog) of every applicant, in the order of the index."""
+        for k in range(self.applicantCount):
+            yield self.entry(k)[0], self.log(k)
+
+    def log(self, k):
+        """Return the FlightLog of the k-th applicant of the index, without entries."""
+        _, first, count = self.entry(k)
+        log = FlightLog(self.path)
+        flights = log.flights = FlightArray()
+        flights.codes, flights.codeIds = self.codes, self.codeIds
+        log.errors = [list(er) for er in self.errors.get(k, [])]
+        start = self.recordsAt + first * RECORD.size
+        with self.view[start:start + count * RECORD.size] as records:
+            if NATIVE:
+                # each column is one strided copy out of the mapping
+                flags = records[RECORD.size - 4::RECORD.size].tobytes()
+                with records.cast('I') as words:
+                    flights.ordinals.frombytes(words[0::4].tobytes())
+                    flights.origins.frombytes(words[1::4].tobytes())
+                    flights.destins.frombytes(words[2::4].tobytes())
+                flights.originUK = bytearray(flags.translate(ORIGIN_FLAGS))
+                flights.destinUK = bytearray(flags.translate(DESTIN_FLAGS))
+                self.cutCancelled(log, k, flags.translate(CANCELLED_MARKS))
+            else:
+                codes = self.codes
+                for i, (ordinal, origin, destin, flag) in enumerate(RECORD.iter_unpack(records)):
+                    if flag & CANCELLED:
+                        log.cancelled.append(Flight(dateX.fromordinal(ordinal), codes[origin], bool(flag & ORIGIN_UK),
+                                                    codes[destin], bool(flag & DESTIN_UK), *self.details[k, i],
+                                                    cancelled=True))
+                        continue
+                    flights.ordinals.append(ordinal)
+                    flights.originUK.append(flag & ORIGIN_UK)
+                    flights.destinUK.append((flag & DESTIN_UK) >> 1)
+                    flights.origins.append(origin)
+                    flights.destins.append(destin)
+        log.flightCount = len(flights)
+        log.cancelledCount = len(log.cancelled)
+        return log
+
+    def cutCancelled(self, log, k, marks):
+        # the cancelled flights, marked 1, go to log.cancelled and the columns keep the runs between them
+        positions = []
+        i = marks.find(1)
+        while i >= 0:
+            positions.append(i)
+            i = marks.find(1, i + 1)
+        if not positions:
+            return
+        flights = log.flights
+        for i in positions:
+            log.cancelled.append(Flight(dateX.fromordinal(flights.ordinals[i]), self.codes[flights.origins[i]],
+                                        bool(flights.originUK[i]), self.codes[flights.destins[i]],
+                                        bool(flights.destinUK[i]), *self.details[k, i], cancelled=True))
+        for name in ('ordinals', 'originUK', 'destinUK', 'origins', 'destins'):
+            column = getattr(flights, name)
+            kept = column[:0]
+            start = 0
+            for i in positions + [len(column)]:
+                kept += column[start:i]
+                start = i + 1
+            setattr(flights, name, kept)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+from bpdates import dateX, Flight, FlightArray, FlightLog, loadFlights, isColumnar, isArchive
+
+import os, io, csv, json, hashlib, tempfile, time
+from array import array
+try:
+    import fcntl
+except ImportError:  # no flock() on Windows, writes are still atomic renames
+    fcntl = None
+
+# Parsed flight cache of the British Passport Abroad Dates Validator.
+#
+# Keeps the parsed, sorted, not cancelled flights of every CSV file read in a
+# cache directory, in a compact binary form (day ordinals, UK flags and airport
+# codes), so validating the same history again, for another application date,
+# skips the CSV parsing entirely.
+# An entry is named after the size, the modification time and a hash of the
+# content of its CSV file, and holds:
+#
+#       {"flights": N, "codes": [...], "cancelled": N, "cancelledFlights": [...], "errors": [...],
+#        "entries": E, "entryTexts": BYTES}\n
+#       ordinals (N x int32), originUK (N x 1), destinUK (N x 1),
+#       origins (N x uint32), destins (N x uint32),
+#       the E rows of the CSV file, only read for the report that lists them:
+#       ordinals (E x int32), origins (E x uint32), destins (E x uint32),
+#       flags (E x 1: 1 origin UK, 2 destination UK, 4 cancelled) and
+#       [[airlines], [numbers]] as JSON (BYTES long)
+#
+# Entries are written to a temporary file and renamed into place, with a lock
+# file held while writing and evicting, so several runs can share the cache.
+# When the cache grows over its size limit, the least recently used entries
+# (oldest modification time, bumped on every hit) are removed. Temporary files
+# count towards the limit, and those left by a writer killed mid-way (older
+# than STALE seconds) are removed too.
+#
+# Please run script with --cache, eg:
+#   >   BPDatesValidator.py 101220 --cache ~/.cache/bpdates
+
+MAGIC = b'BPFC2\n'
+SUFFIX = '.flights'
+TEMP_SUFFIX = '.tmp'
+STALE = 600
+
+
+class FlightCache:
+    def __init__(self, directory, maxBytes=64 << 20):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, path, data):
+        """Return the name of the entry of a CSV file, given its stat and content."""
+        stat = os.stat(path)
+        return f'{hashlib.blake2b(data, digest_size=16).hexdigest()}-{stat.st_size}-{stat.st_mtime_ns}{SUFFIX}'
+
+    def load(self, path, entries=True):
+        """Return the FlightLog of a CSV file, from the cache or parsed and then cached.
+
+        Without entries a cached log comes without the rows of the CSV file.
+        """
+        with open(path, 'rb') as csv_file:
+            data = csv_file.read()
+        key = self.key(path, data)
+        log = self.get(key, path, entries)
+        if log is None:
+            if isColumnar(path) or isArchive(path):
+                log = loadFlights(path)
+            else:
+                log = loadFlights(csv.reader(io.TextIOWrapper(io.BytesIO(data)), delimiter=','))
+            log.source = path
+            self.put(key, log)
+        return log
+
+    def get(self, key, source=None, entries=True):
+        """Return the cached FlightLog of an entry, or None if there is none."""
+        entry = os.path.join(self.directory, key)
+        start = time.perf_counter()
+        try:
+            with open(entry, 'rb') as entry_file:
+                if entry_file.readline() != MAGIC:
+                    return None
+                header = json.loads(entry_file.readline())
+                body = entry_file.read()
+            log = readEntry(header, body, source, entries)
+            os.utime(entry)
+        except (OSError, ValueError, KeyError):
+            return None
+        log.seconds = time.perf_counter() - start
+        return log
+
+    def put(self, key, log):
+        """Store the flights of a FlightLog as an entry, then evict to the size limit."""
+        flights = log.flights if isinstance(log.flights, FlightArray) else FlightArray(
+            sorted(log.flights, key=Flight.getDate))
+        # the rows of the CSV file as columns, their airport codes in the same table as the flights
+        entries = log.entries
+        rows = [array('i', [ro.date.toordinal() for ro in entries]),
+                array('I', [flights.codeId(ro.origin) for ro in entries]),
+                array('I', [flights.codeId(ro.destin) for ro in entries]),
+                bytes([(1 if ro.originUK else 0) | (2 if ro.destinUK else 0) | (4 if ro.cancelled else 0)
+                       for ro in entries])]
+        texts = json.dumps([[ro.airline for ro in entries], [ro.number for ro in entries]]).encode()
+        header = {'flights': len(flights), 'codes': flights.codes, 'cancelled': log.cancelledCount,
+                  'cancelledFlights': [[ca.date.toordinal(), ca.origin, ca.originUK, ca.destin, ca.destinUK,
+                                        ca.airline, ca.number] for ca in log.cancelled],
+                  'errors': log.errors, 'entries': len(entries), 'entryTexts': len(texts)}
+        with self.locked():
+            handle, temp = tempfile.mkstemp(dir=self.directory, suffix=TEMP_SUFFIX)
+            try:
+                with os.fdopen(handle, 'wb') as entry_file:
+                    entry_file.write(MAGIC)
+                    entry_file.write(json.dumps(header).encode() + b'\n')
+                    entry_file.write(flights.ordinals.tobytes())
+                    entry_file.write(flights.originUK)
+                    entry_file.write(flights.destinUK)
+                    entry_file.write(flights.origins.tobytes())
+                    entry_file.write(flights.destins.tobytes())
+                    for column in rows:
+                        entry_file.write(column)
+                    entry_file.write(texts)
+                os.replace(temp, os.path.join(self.directory, key))
+            except BaseException:
+                os.unlink(temp)
+                raise
+            self.evict()
+
+    def evict(self):
+        """Remove stale temporary files, then the least recently used entries until the cache fits in maxBytes."""
+        entries = []
+        total = 0
+        stale = time.time() - STALE
+        for name in os.listdir(self.directory):
+            if not name.endswith((SUFFIX, TEMP_SUFFIX)):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+                if name.endswith(TEMP_SUFFIX) and stat.st_mtime < stale:
+                    os.unlink(os.path.join(self.directory, name))
+                    continue
+            except OSError:
+                continue
+            total += stat.st_size
+            if name.endswith(SUFFIX):
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        for _, size, name in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def locked(self):
+        return CacheLock(os.path.join(self.directory, '.lock'))
+
+
+class CacheLock:
+    # Exclusive flock() on the lock file of a cache directory, where there is one.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+def readEntry(header, body, source=None, entries=True):
+    """Return the FlightLog of the header and body of a cache entry, with the rows of its CSV file if entries."""
+    count = header['flights']
+    flights = FlightArray()
+    for code in header['codes']:
+        flights.codeId(code)
+    offset = 0
+    for name, typecode in (('ordinals', 'i'), ('originUK', None), ('destinUK', None),
+                           ('origins', 'I'), ('destins', 'I')):
+        if typecode is None:
+            setattr(flights, name, bytearray(body[offset:offset + count]))
+            offset += count
+        else:
+            values = array(typecode)
+            values.frombytes(body[offset:offset + count * values.itemsize])
+            setattr(flights, name, values)
+            offset += count * values.itemsize
+    rowCount = header['entries']
+    if offset + rowCount * 13 + header['entryTexts'] != len(body):
+        raise ValueError('cache entry of the wrong size')
+    log = FlightLog(source)
+    log.flights = flights
+    log.flightCount = count
+    log.cancelledCount = header['cancelled']
+    log.cancelled = [Flight(dateX.fromordinal(ca[0]), *ca[1:], cancelled=True) for ca in header['cancelledFlights']]
+    log.errors = header['errors']
+    if entries:
+        columns = []
+        for typecode in ('i', 'I', 'I'):
+            values = array(typecode)
+            values.frombytes(body[offset:offset + rowCount * values.itemsize])
+            columns.append(values)
+            offset += rowCount * values.itemsize
+        flags = body[offset:offset + rowCount]
+        airlines, numbers = json.loads(body[offset + rowCount:])
+        dates = {ordinal: dateX.fromordinal(ordinal) for ordinal in set(columns[0])}
+        codes = flights.codes
+        log.entries = [Flight(dates[ordinal], codes[origin], bool(flag & 1), codes[destin], bool(flag & 2), airline,
+                              number, bool(flag & 4))
+                       for ordinal, origin, destin, flag, airline, number in zip(*columns, flags, airlines, numbers)]
+    return log
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+from term_style import ctyle
+from bpdates import FlightArray, dateParser, csvBool, dateX, grnOrRed
+
+import sys, heapq, itertools
+from array import array
+
+# Consistency check of the British Passport Abroad Dates Validator.
+#
+# Reads a flight history once and reports what makes it malformed, before
+# (or instead of) analysing it:
+#   *   date:       a DepartDateTime that can not be read
+#   *   order:      a flight dated before a flight above it in the file
+#   *   continuity: a flight leaving from the UK after one that landed
+#                   abroad, or leaving from abroad after one that landed
+#                   in the UK
+#
+# Continuity is checked in date order, the order analyse() sees the flights
+# in. While the rows come in date order that is the file order and every
+# break is found as it is read; once a row is out of order, or when several
+# files are merged, the flights are put in date order at the end and
+# checked then. Cancelled flights are not checked beyond their date.
+# With --fail-fast the check stops at the first break and the script exits
+# with status 1, before any analysis.
+#
+# Please run script with --check or --fail-fast, eg:
+#   >   BPDatesValidator.py 101220 flights.csv --check
+#   >   BPDatesValidator.py 101220 flights.csv --check --format ndjson
+#   >   BPDatesValidator.py 101220 flights.csv --fail-fast
+#   >   BPDatesValidator.py 101220 --batch histories/ --fail-fast
+
+
+# the values csvBool() reads as True
+UK = ("TRUE", "True", 1)
+
+
+class Break:
+    # One break of a flight history: its kind ('date', 'order' or
+    # 'continuity'), the file and the 1-based CSV row of the flight, and the
+    # flight date when it could be read.
+    def __init__(self, kind, row, text, date=None, source=None):
+        self.kind = kind
+        self.row = row
+        self.text = text
+        self.date = date
+        self.source = source
+
+    def __str__(self):
+        return f'row {self.row}: {self.text}'
+
+    def asRecord(self):
+        return {'source': self.source, 'row': self.row, 'kind': self.kind,
+                'date': self.date.isoformat() if self.date is not None else None, 'text': self.text}
+
+
+class HistoryCheck:
+    # The flights taken of one CSV file, kept in a FlightArray with the CSV
+    # row of each, as checkRows() reads them.
+    def __init__(self, source=None):
+        self.source = source
+        self.flights = FlightArray()
+        self.rows = array('I')
+        self.ordered = True
+
+    def continuity(self, before, i):
+        """Return the continuity Break of flight i after flight `before` (of any HistoryCheck), or None."""
+        check, j = before
+        if check.flights.destinUK[j] == self.flights.originUK[i]:
+            return None
+        flights, previous = self.flights, check.flights
+        text = (f'{previous.codes[previous.destins[j]]}@{dateX.fromordinal(previous.ordinals[j]):%d/%m/%y} '
+                f'{"UK" if previous.destinUK[j] else "NON-UK"} - {"UK" if flights.originUK[i] else "NON-UK"} '
+                f'{flights.codes[flights.origins[i]]}@{dateX.fromordinal(flights.ordinals[i]):%d/%m/%y}')
+        if check.source != self.source:
+            text += f' (after row {check.rows[j]} of {check.source})'
+        elif check.rows[j] != self.rows[i] - 1:
+            text += f' (after row {check.rows[j]})'
+        return Break('continuity', self.rows[i], text, dateX.fromordinal(flights.ordinals[i]), self.source)
+
+    def readRows(self, rows, failFast=False, continuity=True):
+        """Yield the date and order Breaks of the CSV rows, and the continuity ones while the rows are in order.
+
+        A continuity Break is only final once every row is read in order: they
+        come at the end, unless failFast, which also stops after the first Break.
+        """
+        readDate = dateParser()
+        flights, lines = self.flights, self.rows
+        ordinals, originUK, destinUK = flights.ordinals, flights.originUK, flights.destinUK
+        origins, destins = flights.origins, flights.destins
+        found = []
+        latest = 0
+        for row, ro in enumerate(rows, 1):
+            ro = list(ro) + [''] * (8 - len(ro))
+            dt = readDate(ro[0])
+            if dt is None:
+                yield Break('date', row, f'Flight Date {ro[0]} Has Wrong Format', source=self.source)
+                if failFast:
+                    return
+                continue
+            if csvBool(ro[7]):
+                continue
+            # straight into the arrays, without a Flight object per row
+            ordinals.append(dt.toordinal())
+            originUK.append(ro[2] in UK)
+            destinUK.append(ro[4] in UK)
+            origins.append(flights.codeId(ro[1]))
+            destins.append(flights.codeId(ro[3]))
+            lines.append(row)
+            i = len(lines) - 1
+            if i and ordinals[i] < ordinals[latest]:
+                self.ordered = False
+                text = (f'Flight Date {dt:%d/%m/%y} is before {dateX.fromordinal(ordinals[latest]):%d/%m/%y} '
+                        f'of row {lines[latest]}')
+                yield Break('order', row, text, dt, self.source)
+                if failFast:
+                    return
+                continue
+            if i and continuity and self.ordered:
+                brk = self.continuity((self, latest), i)
+                if brk is not None:
+                    if failFast:
+                        yield brk
+                        return
+                    found.append(brk)
+            latest = i
+        if self.ordered:
+            yield from found
+
+
+def continuityBreaks(checks):
+    """Yield the continuity Breaks of the flights of HistoryChecks, merged in date order.
+
+    Flights of the same day keep the order of their file, and of the checks.
+    """
+    if all(check.ordered for check in checks):
+        order = heapq.merge(*(zip(check.flights.ordinals, itertools.repeat(k), range(len(check.flights)))
+                              for k, check in enumerate(checks)))
+    else:
+        order = sorted((ordinal, k, i) for k, check in enumerate(checks)
+                       for i, ordinal in enumerate(check.flights.ordinals))
+    before = None
+    for _, k, i in order:
+        if before is not None:
+            brk = checks[k].continuity(before, i)
+            if brk is not None:
+                yield brk
+        before = (checks[k], i)
+
+
+def checkRows(rows, source=None, failFast=False):
+    """Yield the Breaks of the CSV rows of one history, in one pass over them."""
+    check = HistoryCheck(source)
+    yield from check.readRows(rows, failFast)
+    if not check.ordered and not failFast:
+        yield from continuityBreaks([check])
+
+
+def checkFiles(sources, failFast=False):
+    """Yield the Breaks of a history kept in one or several CSV files ('-' for stdin).
+
+    The date and order of the rows are checked file by file, the continuity of
+    the flights of every file merged by date, as the analysis merges them.
+    """
+    import csv
+    sources = list(sources)
+    if len(sources) == 1:
+        with _open(sources[0]) as csv_file:
+            yield from checkRows(csv.reader(csv_file, delimiter=','), sources[0], failFast)
+        return
+    checks = []
+    for source in sources:
+        checks.append(HistoryCheck(source))
+        with _open(source) as csv_file:
+            for brk in checks[-1].readRows(csv.reader(csv_file, delimiter=','), failFast, continuity=False):
+                yield brk
+                if failFast:
+                    return
+    for brk in continuityBreaks(checks):
+        yield brk
+        if failFast:
+            return
+
+
+def firstBreak(sources):
+    """Return the first Break of a history in CSV files, or None if it has none."""
+    return next(checkFiles(sources, failFast=True), None)
+
+
+def _open(source):
+    # stdin is left open once read
+    return open(source) if source != '-' else open(sys.stdin.fileno(), closefd=False)
+
+
+def renderBreaks(breaks, style=ctyle):
+    """Return the report of the Breaks of a history."""
+    c = style
+    lines = [f'\n{c.U}CONSISTENCY CHECK:{c.END}']
+    counts = {'date': 0, 'order': 0, 'continuity': 0}
+    for brk in breaks:
+        counts[brk.kind] += 1
+        lines.append(f'{c.RED}{brk.kind:<11}{c.END} {brk.source}, {brk}')
+    total = sum(counts.values())
+    lines.append(f'{c.G}-----------------------------------------------{c.END}')
+    lines.append(f'Breaks:                 {grnOrRed(total == 0, total, c)} '
+                 f'({counts["date"]} date, {counts["order"]} order, {counts["continuity"]} continuity)')
+    lines.append('')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+from bpdates import ENGINES, parseApplyDate, dateX, loadFlights, analyse, resultRecord
+
+import os, io, csv, json, asyncio
+from datetime import date
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# HTTP service of the British Passport Abroad Dates Validator.
+#
+# A small asyncio HTTP/1.1 server (standard library only, meant for localhost)
+# answering with the JSON record of --format json:
+#
+#   GET  /health                      => {"status": "ok", "active": N, "waiting": N, ...}
+#   POST /validate?date=DDMMYY        => body: the CSV file of the flights (text/csv)
+#   POST /validate                    => body: {"date": "DDMMYY" or "YYYY-MM-DD",
+#                                               "flights": [[CSV row], ...] or
+#                                                          [{"date": ..., "origin": ..., "originUK": ...,
+#                                                            "destin": ..., "destinUK": ..., "airline": ...,
+#                                                            "number": ..., "cancelled": ...}, ...],
+#                                               "engine": "prefix", "allWindows": false}
+#
+# The values of a JSON flight are strings, true/false or null (an empty value).
+# engine and allWindows may also be given in the query string. The validations
+# run in a pool of worker processes (or threads), at most maxConcurrent at a
+# time; up to `backlog` more wait for a free worker, and any further request is
+# turned away with 503 until one finishes.
+#
+# Please run script with --serve, eg:
+#   >   BPDatesValidator.py --serve 8080
+#   >   curl --data-binary @example.csv -H 'Content-Type: text/csv' 'localhost:8080/validate?date=101220'
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 408: 'Request Timeout',
+           413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+FIELDS = ('date', 'origin', 'originUK', 'destin', 'destinUK', 'airline', 'number', 'cancelled')
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def validateRows(rows, dateApply, engine='prefix', allWindows=False):
+    """Return the resultRecord of the CSV rows of a request; runs inside a worker."""
+    return resultRecord(analyse(loadFlights(rows), dateApply, engine=engine, allWindows=allWindows), '<request>')
+
+
+def requestDate(text):
+    """Return the dateX of an application date given as DDMMYY or YYYY-MM-DD."""
+    try:
+        if len(text.strip()) == 6:
+            return parseApplyDate(text)
+        dateTemp = date.fromisoformat(text.strip())
+        return dateX(dateTemp.year, dateTemp.month, dateTemp.day)
+    except (ValueError, AttributeError):
+        raise HttpError(400, f'wrong application date {text!r}, expected DDMMYY or YYYY-MM-DD')
+
+
+def requestRows(body, contentType):
+    """Return (rows, options) of a request body: a CSV file or a JSON document."""
+    if 'json' not in contentType:
+        try:
+            return list(csv.reader(io.StringIO(body.decode()), delimiter=',')), {}
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HttpError(400, f'unreadable CSV: {e}')
+    try:
+        document = json.loads(body)
+        flights = document.pop('flights')
+    except (ValueError, KeyError, AttributeError, TypeError):
+        raise HttpError(400, 'expected a JSON object with a "flights" list')
+    if not isinstance(flights, list):
+        raise HttpError(400, '"flights" must be a list')
+    rows = []
+    for k, flight in enumerate(flights):
+        if isinstance(flight, dict):
+            flight = [flight.get(field) for field in FIELDS]
+        elif not isinstance(flight, list):
+            raise HttpError(400, 'every flight must be a CSV row (list) or an object')
+        rows.append([csvValue(value, k, i) for i, value in enumerate(flight)])
+    return rows, document
+
+
+def csvValue(value, k, i):
+    """Return a JSON value of a flight as the text of its CSV field."""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    field = FIELDS[i] if i < len(FIELDS) else f'field {i + 1}'
+    raise HttpError(400, f'flight {k + 1}: {field} must be a string, true/false or null, not {value!r}')
+
+
+class ValidationService:
+    def __init__(self, workers=None, threads=False, maxConcurrent=None, backlog=64, maxBody=8 << 20,
+                 timeout=30.0, engine='prefix'):
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.maxConcurrent = maxConcurrent or self.workers
+        self.backlog = backlog
+        self.maxBody = maxBody
+        self.timeout = timeout
+        self.engine = engine
+        self.active = 0
+        self.waiting = 0
+        self.served = 0
+        self.pool = None
+        self.slots = None
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """Start listening and return the asyncio server."""
+        Pool = ThreadPoolExecutor if self.threads else ProcessPoolExecutor
+        self.pool = Pool(max_workers=self.workers)
+        self.slots = asyncio.Semaphore(self.maxConcurrent)
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection, keeping it open between them."""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.readRequest(reader, writer), self.timeout)
+                except asyncio.TimeoutError:
+                    await self.respond(writer, 408, {'error': 'request not received in time'}, False)
+                    break
+                except HttpError as e:
+                    await self.respond(writer, e.status, {'error': str(e)}, False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keepAlive = headers.get('connection', '').lower() != 'close'
+                try:
+                    status, payload = 200, await self.route(method, target, headers, body)
+                except HttpError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+                await self.respond(writer, status, payload, keepAlive)
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def readLine(self, reader, status, what):
+        # readline() gives up on a line longer than the buffer of the reader
+        try:
+            return await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise HttpError(status, f'{what} too long')
+
+    async def readRequest(self, reader, writer):
+        line = await self.readLine(reader, 400, 'request line')
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, 'malformed request line')
+        headers = {}
+        while True:
+            line = await self.readLine(reader, 431, 'header line')
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise HttpError(400, 'malformed Content-Length')
+        if length > self.maxBody:
+            raise HttpError(413, f'request body over {self.maxBody} bytes')
+        if length and headers.get('expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            await writer.drain()
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    async def route(self, method, target, headers, body):
+        url = urlsplit(target)
+        if url.path == '/health':
+            if method != 'GET':
+                raise HttpError(405, 'use GET')
+            return {'status': 'ok', 'active': self.active, 'waiting': self.waiting, 'served': self.served,
+                    'maxConcurrent': self.maxConcurrent, 'backlog': self.backlog}
+        if url.path != '/validate':
+            raise HttpError(404, f'no such endpoint {url.path}')
+        if method != 'POST':
+            raise HttpError(405, 'use POST')
+
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        rows, options = requestRows(body, headers.get('content-type', ''))
+        options = {**query, **options}
+        if 'date' not in options:
+            raise HttpError(400, 'the application date is missing')
+        dateApply = requestDate(options['date'])
+        engine = options.get('engine', self.engine)
+        if engine not in ENGINES:
+            raise HttpError(400, f'unknown engine {engine!r}')
+        allWindows = options.get('allWindows', False) in (True, 'true', '1', 1)
+        return await self.evaluate(rows, dateApply, engine, allWindows)
+
+    async def evaluate(self, rows, dateApply, engine, allWindows):
+        """Run validateRows in the pool, within the concurrency limits."""
+        if self.slots.locked() and self.waiting >= self.backlog:
+            raise HttpError(503, 'too many validations running, try again later')
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            record = await loop.run_in_executor(self.pool, validateRows, rows, dateApply, engine, allWindows)
+        finally:
+            self.active -= 1
+            self.slots.release()
+        self.served += 1
+        return record
+
+    async def respond(self, writer, status, payload, keepAlive):
+        body = json.dumps(payload).encode()
+        writer.write(f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                     f'Content-Type: application/json\r\n'
+                     f'Content-Length: {len(body)}\r\n'
+                     f'Connection: {"keep-alive" if keepAlive else "close"}\r\n\r\n'.encode('latin-1') + body)
+        await writer.drain()
+
+
+def serve(address, **options):
+    """Run a ValidationService on [HOST:]PORT (localhost by default) until interrupted."""
+    host, _, port = address.rpartition(':')
+    service = ValidationService(**options)
+
+    async def main():
+        server = await service.start(host or '127.0.0.1', int(port))
+        print(f'Serving on http://{host or "127.0.0.1"}:{port} (POST /validate, GET /health)', flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
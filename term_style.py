@@ -28,6 +28,9 @@
 # D - dark
 # R - reversed colors
 
+import os, sys
+
+
 class ctyle:
     RED = '\033[91m'
     GRN = '\033[92m'
@@ -54,3 +57,36 @@ class ctyle:
     I = '\033[3m'
     U = '\033[4m'
     R = '\033[7m'
+
+
+# noctyle has the same names as ctyle, all empty, for output that is not
+# read on a terminal (a pipe, a log file, or NO_COLOR set in the environment).
+noctyle = type('noctyle', (), {name: '' for name in vars(ctyle) if not name.startswith('__')})
+
+
+def useColor(stream):
+    """Return True if escape codes should be written to the stream."""
+    if os.environ.get('NO_COLOR'):
+        return False
+    return hasattr(stream, 'isatty') and stream.isatty()
+
+
+class TermBuffer:
+    # Collects text and writes it to the stream in one go on flush(), with
+    # `style` being ctyle on a terminal and noctyle everywhere else.
+    def __init__(self, stream=None, color=None):
+        self.stream = sys.stdout if stream is None else stream
+        self.style = ctyle if (useColor(self.stream) if color is None else color) else noctyle
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def print(self, *lines):
+        for line in lines:
+            self.parts.append(f'{line}\n')
+
+    def flush(self):
+        self.stream.write(''.join(self.parts))
+        self.stream.flush()
+        self.parts = []
@@ -17,6 +17,30 @@ from test_period import TestPeriod
 from test_day import TestDay
 from test_utility_functions import TestUtilityFunctions
 from test_csv_parsing import TestCSVParsing
+from test_absence_index import TestAbsenceIndex
+from test_interval_sweep import TestIntervalSweep
+from test_library_api import TestLibraryAPI
+from test_batch_mode import TestBatchMode
+from test_date_parser import TestDateParser
+from test_flight_stream import TestFlightStream
+from test_month_table import TestMonthTable
+from test_flight_array import TestFlightArray
+from test_term_buffer import TestTermBuffer
+from test_json_output import TestJsonOutput
+from test_synthetic_history import TestSyntheticHistory
+from test_stage_timings import TestStageTimings
+from test_flight_cache import TestFlightCache
+from test_checkpoint import TestCheckpoint
+from test_http_service import TestHttpService
+from test_multi_file import TestMultiFile
+from test_applicants import TestApplicants
+from test_trip_planner import TestTripPlanner
+from test_fenwick_index import TestFenwickIndex
+from test_startup import TestStartup
+from test_history_check import TestHistoryCheck
+from test_day_matrix import TestDayMatrix
+from test_columnar import TestColumnar
+from test_flight_archive import TestFlightArchive
 
 
 def create_test_suite():
@@ -32,6 +56,30 @@ def create_test_suite():
         TestDay,
         TestUtilityFunctions,
         TestCSVParsing,
+        TestAbsenceIndex,
+        TestIntervalSweep,
+        TestLibraryAPI,
+        TestBatchMode,
+        TestDateParser,
+        TestFlightStream,
+        TestMonthTable,
+        TestFlightArray,
+        TestTermBuffer,
+        TestJsonOutput,
+        TestSyntheticHistory,
+        TestStageTimings,
+        TestFlightCache,
+        TestCheckpoint,
+        TestHttpService,
+        TestMultiFile,
+        TestApplicants,
+        TestTripPlanner,
+        TestFenwickIndex,
+        TestStartup,
+        TestHistoryCheck,
+        TestDayMatrix,
+        TestColumnar,
+        TestFlightArchive,
     ]
     
     for test_class in test_classes:
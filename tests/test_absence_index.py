@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for the prefix-sum absence index and the 12-month window scans
+"""
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import (Flight, Period, Day, dateX,
+                              absencePeriods, AbsenceIndex, monthWindowMax,
+                              windowEnd, slidingWindowMax)
+
+
+def randomHistory(seed, trips=40, start=dateX(2014, 1, 10)):
+    """Build an alternating UK / NON-UK flight history"""
+    rnd = random.Random(seed)
+    flights = []
+    day = start
+    for _ in range(trips):
+        day = day.shiftDay(rnd.randint(1, 60))
+        flights.append(Flight(day, "EDI", True, "LIS", False))
+        day = day.shiftDay(rnd.randint(0, 40))
+        flights.append(Flight(day, "LIS", False, "EDI", True))
+    return flights
+
+
+def dayListMax(rangeList, date5Y, dateApplyStar):
+    """Reference implementation: per-day Day list rescanned for 50 windows"""
+    dayList = []
+    days = 0
+    dateTemp = date5Y
+    while dateTemp < dateApplyStar:
+        dateTemp = date5Y.shiftDay(days)
+        status = False
+        for rg in rangeList:
+            if dateTemp > rg.dateFrom and dateTemp < rg.dateTo:
+                status = True
+                break
+        dayList.append(Day(dateTemp, status))
+        days += 1
+
+    cuntMax = 0
+    for month in range(0, 50):
+        dateFrom = date5Y.shiftMonth(month).firstDay()
+        dateTo = date5Y.shiftMonth(month + 11).lastDay()
+        cunt = 0
+        for day in dayList:
+            if day.date >= dateFrom and day.date <= dateTo:
+                cunt += 1 if day.abroad else 0
+        cuntMax = cuntMax if cuntMax > cunt else cunt
+    return cuntMax
+
+
+class TestAbsenceIndex(unittest.TestCase):
+    """Test cases for the prefix-sum absence index"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.dateApply = dateX(2020, 12, 10)
+        self.date5Y = self.dateApply.shiftYear(-5).shiftDay(1)
+        self.dateApplyStar = self.dateApply.lastDay()
+
+    def test_absence_periods(self):
+        """Test that only NON-UK to NON-UK stays after date5Y become periods"""
+        flights = [
+            Flight(dateX(2015, 1, 1), "EDI", True, "LIS", False),
+            Flight(dateX(2016, 1, 5), "LIS", False, "EDI", True),
+            Flight(dateX(2017, 3, 1), "EDI", True, "GDN", False),
+            Flight(dateX(2017, 3, 11), "GDN", False, "GLA", True),
+        ]
+        rangeList = absencePeriods(flights, self.date5Y)
+        self.assertEqual(len(rangeList), 2)
+        self.assertEqual(rangeList[0].dateFrom, self.date5Y)  # clipped to date5Y
+        self.assertEqual(rangeList[0].dateTo, dateX(2016, 1, 5))
+        self.assertEqual(rangeList[1].dateFrom, dateX(2017, 3, 1))
+        self.assertEqual(rangeList[1].dateTo, dateX(2017, 3, 11))
+
+    def test_count_excludes_flight_days(self):
+        """Test that only days strictly between the flights count as abroad"""
+        rangeList = [Period(dateX(2017, 3, 1), dateX(2017, 3, 11))]
+        index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+        self.assertEqual(index.count(dateX(2017, 1, 1), dateX(2017, 12, 31)), 9)
+        self.assertEqual(index.count(dateX(2017, 3, 1), dateX(2017, 3, 1)), 0)
+        self.assertEqual(index.count(dateX(2017, 3, 2), dateX(2017, 3, 2)), 1)
+        self.assertEqual(index.count(dateX(2017, 3, 11), dateX(2017, 3, 11)), 0)
+
+    def test_count_clips_to_axis(self):
+        """Test that windows reaching outside the axis are clipped"""
+        rangeList = [Period(dateX(2010, 1, 1), dateX(2030, 1, 1))]
+        index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+        total = (self.dateApplyStar - self.date5Y).days + 1
+        self.assertEqual(index.count(dateX(2000, 1, 1), dateX(2040, 1, 1)), total)
+        self.assertEqual(index.count(dateX(2030, 1, 1), dateX(2040, 1, 1)), 0)
+        self.assertEqual(index.count(dateX(2017, 1, 2), dateX(2017, 1, 1)), 0)
+
+    def test_empty_history(self):
+        """Test an index without any periods"""
+        index = AbsenceIndex([], self.date5Y, self.dateApplyStar)
+        self.assertEqual(index.count(self.date5Y, self.dateApplyStar), 0)
+        self.assertEqual(monthWindowMax(index, self.date5Y), 0)
+
+    def test_matches_day_list_scan(self):
+        """Test that the month-window maximum matches the Day list scan"""
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                flights = randomHistory(seed)
+                rangeList = absencePeriods(flights, self.date5Y)
+                index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+                self.assertEqual(monthWindowMax(index, self.date5Y),
+                                 dayListMax(rangeList, self.date5Y, self.dateApplyStar))
+
+    def test_window_end(self):
+        """Test the last day of a 12-month window"""
+        self.assertEqual(windowEnd(dateX(2017, 3, 1)), dateX(2018, 2, 28))
+        self.assertEqual(windowEnd(dateX(2017, 1, 31)), dateX(2018, 1, 30))
+        self.assertEqual(windowEnd(dateX(2019, 3, 1)), dateX(2020, 2, 29))
+        self.assertEqual(windowEnd(dateX(2020, 2, 29)), dateX(2021, 2, 28))
+        self.assertEqual(windowEnd(dateX(2017, 10, 15), 3), dateX(2018, 1, 14))
+        self.assertIsInstance(windowEnd(dateX(2017, 3, 1)), dateX)
+
+    def test_sliding_window_single_trip(self):
+        """Test that the worst window reports its start and end dates"""
+        rangeList = [Period(dateX(2017, 3, 1), dateX(2017, 3, 11))]
+        index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+        cunt, dateFrom, dateTo = slidingWindowMax(index)
+        self.assertEqual(cunt, 9)
+        self.assertEqual(dateFrom, dateX(2016, 3, 11))  # first window holding the trip
+        self.assertEqual(dateTo, dateX(2017, 3, 10))
+
+    def test_sliding_window_matches_brute_force(self):
+        """Test the two-pointer sweep against counting every start day"""
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                rangeList = absencePeriods(randomHistory(seed), self.date5Y)
+                index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+                cunt, dateFrom, dateTo = slidingWindowMax(index)
+                expected = 0
+                day = self.date5Y
+                while day <= self.dateApplyStar:
+                    expected = max(expected, index.count(day, windowEnd(day)))
+                    day = day.shiftDay(1)
+                self.assertEqual(cunt, expected)
+                self.assertEqual(index.count(dateFrom, dateTo), cunt)
+                self.assertGreaterEqual(cunt, monthWindowMax(index, self.date5Y))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-applicant mode (applicants.py)
+"""
+import unittest
+import sys
+import os
+import csv
+import tempfile
+import shutil
+import itertools
+from unittest import mock
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, loadFlights, analyse, resultRecord
+from benchmarks.history import syntheticRows
+from term_style import noctyle
+from applicants import applicantGroups, validateApplicants, readApplicants, renderApplicants
+
+
+class TestApplicants(unittest.TestCase):
+    """Test cases for the multi-applicant mode"""
+
+    def setUp(self):
+        """Set up the histories of three applicants"""
+        self.dateApply = dateX(2020, 12, 10)
+        self.histories = {f'A{k}': list(syntheticRows(50 + 20 * k, seed=k, errors=0.02)) for k in range(3)}
+        self.rows = [[applicant] + ro for applicant, rows in self.histories.items() for ro in rows]
+
+    def test_groups(self):
+        """Test that rows are grouped by applicant with the ID cut off"""
+        groups = [(applicant, list(rows)) for applicant, rows in applicantGroups(self.rows + [[], ['  ']])]
+        self.assertEqual(groups, list(self.histories.items()))
+
+    def test_records_match_single_histories(self):
+        """Test that every applicant gets the record of their own history"""
+        rows = list(validateApplicants(self.rows, self.dateApply, records=True, source='export.csv'))
+        self.assertEqual([row.path for row in rows], list(self.histories))
+        for row, (applicant, history) in zip(rows, self.histories.items()):
+            expected = resultRecord(analyse(loadFlights(history), self.dateApply), 'export.csv')
+            self.assertEqual(row.asRecord(), {'applicant': applicant, **expected})
+            self.assertEqual(row.total5Y, expected['total5Y'])
+
+    def test_streams_group_by_group(self):
+        """Test that an applicant is released before the rows of the next one are read"""
+        read = []
+
+        def rows():
+            for ro in self.rows:
+                read.append(ro)
+                yield ro
+
+        ends = itertools.accumulate(len(history) for history in self.histories.values())
+        for row, end in zip(validateApplicants(rows(), self.dateApply), ends):
+            # groupby looks one row ahead to see the group end
+            self.assertIn(len(read), (end, end + 1))
+
+    def test_failure_is_kept_to_its_applicant(self):
+        """Test that an applicant who can not be validated fails alone"""
+        def failing(log, dateApply, engine):
+            if log.flightCount == 1:
+                raise ValueError('broken')
+            return analyse(log, dateApply, engine=engine)
+
+        rows = [['B1', '05/03/20', 'EDI', 'TRUE', 'LPA', 'FALSE']] + self.rows[:3]
+        with mock.patch('applicants.analyse', failing):
+            result = list(validateApplicants(rows, self.dateApply))
+        self.assertEqual([row.path for row in result], ['B1', 'A0'])
+        self.assertEqual(result[0].failure, 'ValueError: broken')
+        self.assertFalse(result[0].passed())
+        self.assertEqual(result[1].flights, 3)
+
+    def test_read_file_and_render(self):
+        """Test reading a file and the summary table"""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "export.csv")
+            with open(path, 'w', newline='') as csv_file:
+                csv.writer(csv_file, lineterminator='\n').writerows(self.rows)
+            text = ''.join(renderApplicants(readApplicants(path, self.dateApply, 'sweep'), noctyle))
+        finally:
+            shutil.rmtree(directory)
+        self.assertIn('APPLICANTS:', text)
+        self.assertEqual([line.split()[0] for line in text.splitlines() if line[:2] in ('A0', 'A1', 'A2')],
+                         list(self.histories))
+        self.assertIn('Applicants:             3 (', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch mode (batchJobs, validateFile, runBatch, renderBatch)
+"""
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+import subprocess
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX
+from batch_mode import BatchRow, batchJobs, validateFile, runBatch, renderBatch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestBatchMode(unittest.TestCase):
+    """Test cases for the batch mode"""
+
+    def setUp(self):
+        """Set up a directory with two histories"""
+        self.dir = tempfile.mkdtemp()
+        self.dateApply = dateX(2020, 12, 10)
+        with open(os.path.join(self.dir, "abroad.csv"), 'w') as csv_file:
+            csv_file.write("05/03/20 12:20,EDI,TRUE,LPA,FALSE,RyanAir,FR5555,FALSE\n"
+                           "07/04/20 10:10,LPA,FALSE,GLA,TRUE,WizzAir,FR6666,FALSE\n")
+        with open(os.path.join(self.dir, "home.csv"), 'w') as csv_file:
+            csv_file.write("17/05/16 10:40,LIS,FALSE,EDI,TRUE,RyanAir,FR1111,FALSE\n")
+        with open(os.path.join(self.dir, "notes.txt"), 'w') as txt_file:
+            txt_file.write("not a history\n")
+
+    def tearDown(self):
+        """Remove the directory"""
+        shutil.rmtree(self.dir)
+
+    def test_directory_jobs(self):
+        """Test that every CSV file of a directory becomes a job"""
+        jobs = batchJobs(self.dir, self.dateApply)
+        self.assertEqual([os.path.basename(path) for path, _ in jobs], ["abroad.csv", "home.csv"])
+        self.assertTrue(all(date == self.dateApply for _, date in jobs))
+        with self.assertRaises(ValueError):
+            batchJobs(self.dir)
+
+    def test_manifest_jobs(self):
+        """Test per-file application dates of a manifest"""
+        manifest = os.path.join(self.dir, "manifest.txt")
+        with open(manifest, 'w') as manifest_file:
+            manifest_file.write("# path,date\nabroad.csv,010620\n\nhome.csv,\n")
+        jobs = batchJobs(manifest, self.dateApply)
+        self.assertEqual(jobs, [(os.path.join(self.dir, "abroad.csv"), dateX(2020, 6, 1)),
+                                (os.path.join(self.dir, "home.csv"), self.dateApply)])
+        with self.assertRaises(ValueError):
+            batchJobs(manifest)
+
+    def test_command_line_without_date(self):
+        """Test that a batch with no application date is refused with a usage error"""
+        script = [sys.executable, os.path.join(ROOT, "BPDatesValidator.py"), "--batch"]
+        manifest = os.path.join(self.dir, "manifest.txt")
+        with open(manifest, 'w') as manifest_file:
+            manifest_file.write("abroad.csv\n")
+        for source, message in ((self.dir, "an application date is needed"), (manifest, "no application date for"),
+                                (os.path.join(self.dir, "missing.txt"), "No such file")):
+            out = subprocess.run(script + [source], capture_output=True, text=True)
+            self.assertEqual(out.returncode, 2)
+            self.assertIn(message, out.stderr)
+            self.assertNotIn("Traceback", out.stderr)
+
+    def test_validate_file(self):
+        """Test the summary row of one history"""
+        row = validateFile(os.path.join(self.dir, "abroad.csv"), self.dateApply)
+        self.assertIsInstance(row, BatchRow)
+        self.assertEqual(row.flights, 2)
+        self.assertEqual(row.total1Y, 33)
+        self.assertEqual(row.cuntMax, 32)
+        self.assertIsNone(row.failure)
+        self.assertTrue(row.passed())
+
+    def test_validate_missing_file(self):
+        """Test that an unreadable history is reported instead of stopping the batch"""
+        row = validateFile(os.path.join(self.dir, "missing.csv"), self.dateApply)
+        self.assertIn("FileNotFoundError", row.failure)
+        self.assertFalse(row.passed())
+
+    def test_unread_rows_do_not_pass(self):
+        """Test that a history with no flight read fails, and one with unreadable rows is not within limits"""
+        with open(os.path.join(self.dir, "dates.csv"), 'w') as csv_file:
+            csv_file.write("not a date,EDI,TRUE,LPA,FALSE,,,FALSE\n32/01/20,LPA,FALSE,EDI,TRUE,,,FALSE\n")
+        with open(os.path.join(self.dir, "home.csv"), 'a') as csv_file:
+            csv_file.write("not a date,EDI,TRUE,LPA,FALSE,,,FALSE\n")
+        empty = validateFile(os.path.join(self.dir, "dates.csv"), self.dateApply, records=True)
+        self.assertEqual((empty.flights, empty.unreadable), (0, 2))
+        self.assertIn("no flights read", empty.failure)
+        self.assertFalse(empty.passed())
+        self.assertFalse(empty.asRecord()['passed'])
+        partly = validateFile(os.path.join(self.dir, "home.csv"), self.dateApply, records=True)
+        self.assertEqual((partly.flights, partly.unreadable, partly.failure), (1, 1, None))
+        self.assertFalse(partly.passed())
+        self.assertEqual((partly.asRecord()['passed'], partly.asRecord()['unreadable']), (False, 1))
+        text = renderBatch(runBatch(batchJobs(self.dir, self.dateApply), workers=2, threads=True), 0.5)
+        self.assertIn("3 (1 within limits, 2 not: 1 failed, 1 with rows that could not be read)", text)
+
+    def test_run_batch_threads_and_processes(self):
+        """Test that thread and process pools give the same rows"""
+        jobs = batchJobs(self.dir, self.dateApply)
+        for threads in (True, False):
+            with self.subTest(threads=threads):
+                rows = sorted(runBatch(jobs, workers=2, threads=threads), key=lambda row: row.path)
+                self.assertEqual([row.flights for row in rows], [2, 1])
+                self.assertEqual([row.cuntMax for row in rows], [32, 0])
+
+    def test_render_batch(self):
+        """Test the summary table"""
+        rows = list(runBatch(batchJobs(self.dir, self.dateApply), workers=2, threads=True))
+        text = renderBatch(rows, 0.5)
+        self.assertIn("BATCH SUMMARY", text)
+        self.assertLess(text.index("abroad.csv"), text.index("home.csv"))
+        self.assertIn("2 (2 within limits, 0 not)", text)
+        self.assertIn("4.0 files/s", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
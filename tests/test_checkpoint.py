@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental re-evaluation of a growing history (checkpoint.py)
+"""
+import unittest
+import sys
+import os
+import csv
+import json
+import tempfile
+import shutil
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, loadFlights, analyse, resultRecord
+from benchmarks.history import syntheticRows
+from checkpoint import analyseIncremental
+
+
+class TestCheckpoint(unittest.TestCase):
+    """Test cases for analyseIncremental"""
+
+    def setUp(self):
+        """Set up a history split in two"""
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "history.csv")
+        self.checkpoint = os.path.join(self.dir, "history.ckpt")
+        self.dateApply = dateX(2020, 12, 10)
+        self.rows = list(syntheticRows(300, seed=4, errors=0.03))
+        self.rows.insert(5, ["not a date", "EDI", "TRUE", "LIS", "FALSE", "", "", "FALSE"])
+
+    def tearDown(self):
+        """Remove the directory"""
+        shutil.rmtree(self.dir)
+
+    def write(self, rows, mode='w'):
+        with open(self.path, mode, newline='') as csv_file:
+            csv.writer(csv_file, lineterminator='\n').writerows(rows)
+
+    def expected(self):
+        return resultRecord(analyse(loadFlights(self.path), self.dateApply, allWindows=True))
+
+    def test_appended_rows_match_full_run(self):
+        """Test that folding in appended rows gives the result of a full run"""
+        for split in (0, 1, 2, 60, 150, 250, 299):
+            with self.subTest(split=split):
+                if os.path.exists(self.checkpoint):
+                    os.unlink(self.checkpoint)
+                self.write(self.rows[:split])
+                first = analyseIncremental(self.path, self.dateApply, self.checkpoint, allWindows=True)
+                self.assertFalse(first.resumed)
+                self.write(self.rows[split:], 'a')
+                result = analyseIncremental(self.path, self.dateApply, self.checkpoint, allWindows=True)
+                self.assertTrue(result.resumed)
+                self.assertEqual(resultRecord(result), self.expected())
+
+    def test_grows_row_by_row(self):
+        """Test a history growing a few rows at a time"""
+        self.write(self.rows[:100])
+        analyseIncremental(self.path, self.dateApply, self.checkpoint, engine='sweep')
+        for start in range(100, len(self.rows), 37):
+            rows = self.rows[start:start + 37]
+            self.write(rows, 'a')
+            result = analyseIncremental(self.path, self.dateApply, self.checkpoint, engine='sweep')
+            self.assertTrue(result.resumed)
+            self.assertEqual(len(result.steps), sum(1 for ro in rows if ro[7] == 'FALSE'))
+        record = resultRecord(result)
+        expected = self.expected()
+        record['worst'] = expected['worst'] = None
+        self.assertEqual(record, expected)
+
+    def test_edited_prefix_is_computed_again(self):
+        """Test that a file changed before its end is not resumed"""
+        self.write(self.rows[:200])
+        analyseIncremental(self.path, self.dateApply, self.checkpoint)
+        self.rows[10][3] = "XXX"
+        self.write(self.rows)
+        result = analyseIncremental(self.path, self.dateApply, self.checkpoint, allWindows=True)
+        self.assertFalse(result.resumed)
+        self.assertEqual(resultRecord(result), self.expected())
+
+    def test_other_date_or_earlier_flight(self):
+        """Test that another application date or an out of order flight is not resumed"""
+        self.write(self.rows[:200])
+        analyseIncremental(self.path, self.dateApply, self.checkpoint)
+        self.assertFalse(analyseIncremental(self.path, dateX(2020, 6, 1), self.checkpoint).resumed)
+        self.assertTrue(analyseIncremental(self.path, dateX(2020, 6, 1), self.checkpoint).resumed)
+        analyseIncremental(self.path, self.dateApply, self.checkpoint)
+        self.write([self.rows[50]], 'a')
+        result = analyseIncremental(self.path, self.dateApply, self.checkpoint, allWindows=True)
+        self.assertFalse(result.resumed)
+        self.assertEqual(resultRecord(result), self.expected())
+
+    def test_unfinished_line_keeps_checkpoint(self):
+        """Test that a last line without a line break is read but not checkpointed"""
+        self.write(self.rows[:200])
+        analyseIncremental(self.path, self.dateApply, self.checkpoint)
+        with open(self.checkpoint) as checkpoint_file:
+            offset = json.load(checkpoint_file)['offset']
+        with open(self.path, 'a') as csv_file:
+            csv_file.write(','.join(self.rows[200]))
+        result = analyseIncremental(self.path, self.dateApply, self.checkpoint)
+        self.assertTrue(result.resumed)
+        self.assertEqual(result.state.count, loadFlights(self.path).flightCount)
+        with open(self.checkpoint) as checkpoint_file:
+            self.assertEqual(json.load(checkpoint_file)['offset'], offset)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for reading Parquet and Arrow files, Arrow tables and DataFrames (columnar.py)
+"""
+import unittest
+from unittest import mock
+import sys
+import os
+import tempfile
+import shutil
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import loadFlights, analyse, resultRecord, parseDate, csvBool, FlightStream, dateX
+from benchmarks.history import syntheticRows
+import columnar
+
+NAMES = ['DepartDateTime', 'DepartPlace', 'IsUK', 'ArrivePlace', 'ArriveIsUK', 'Airline', 'FlNumber', 'WasCancelled']
+
+
+def history():
+    rows = [list(ro) for ro in syntheticRows(400, seed=4, errors=0.05)]
+    rows[5][0], rows[9][0] = '32/01/20', ''
+    return rows
+
+
+def typedColumns(rows):
+    """The columns of the rows as dates and booleans, the unreadable dates as None."""
+    return {'DepartDateTime': [parseDate(ro[0]) for ro in rows], 'DepartPlace': [ro[1] for ro in rows],
+            'IsUK': [csvBool(ro[2]) for ro in rows], 'ArrivePlace': [ro[3] for ro in rows],
+            'ArriveIsUK': [csvBool(ro[4]) for ro in rows], 'Airline': [ro[5] for ro in rows],
+            'FlNumber': [ro[6] for ro in rows], 'WasCancelled': [csvBool(ro[7]) for ro in rows]}
+
+
+class TestColumnar(unittest.TestCase):
+    """Test cases for the columnar input"""
+
+    def setUp(self):
+        self.rows = history()
+        self.dateApply = dateX(2020, 12, 10)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameHistory(self, log, errors=True):
+        expected = loadFlights(self.rows)
+        self.assertEqual((log.flightCount, log.cancelledCount), (expected.flightCount, expected.cancelledCount))
+        if errors:
+            self.assertEqual(log.errors, expected.errors)
+        record, expectedRecord = resultRecord(analyse(log, self.dateApply)), resultRecord(analyse(expected, self.dateApply))
+        record['source'] = expectedRecord['source'] = None
+        if not errors:
+            record['errors'] = [er for er in record['errors'] if 'Has Wrong Format' not in er]
+            expectedRecord['errors'] = [er for er in expectedRecord['errors'] if 'Has Wrong Format' not in er]
+        self.assertEqual(record, expectedRecord)
+
+    @unittest.skipIf(columnar.pyarrow is None, 'pyarrow is not installed')
+    def test_parquet_of_strings(self):
+        """Test a Parquet file of the CSV strings, read as a path and streamed"""
+        import pyarrow, pyarrow.parquet
+        path = os.path.join(self.directory, 'flights.parquet')
+        pyarrow.parquet.write_table(pyarrow.table({name: [ro[i] for ro in self.rows] for i, name in enumerate(NAMES)}),
+                                    path)
+        log = loadFlights(path)
+        self.assertEqual(log.source, path)
+        self.assertTrue(log.flights.isSorted())
+        self.assertSameHistory(log)
+        stream = FlightStream(path)
+        self.assertEqual([flight.date for flight in stream], [dateX.fromordinal(day) for day in log.flights.ordinals])
+        self.assertEqual((stream.flightCount, stream.cancelledCount, stream.errors),
+                         (log.flightCount, log.cancelledCount, log.errors))
+
+    @unittest.skipIf(columnar.pyarrow is None, 'pyarrow is not installed')
+    def test_typed_arrow_table_and_feather(self):
+        """Test date and boolean columns, in a table and in a Feather file, with 0/1 flags and no airline"""
+        import pyarrow, pyarrow.feather
+        columns = typedColumns(self.rows)
+        self.assertSameHistory(columnar.loadTable(pyarrow.table(columns)), errors=False)
+        path = os.path.join(self.directory, 'flights.arrow')
+        columns['IsUK'] = [int(flag) for flag in columns['IsUK']]
+        columns['DepartDateTime'] = pyarrow.array(columns['DepartDateTime']).cast(pyarrow.timestamp('s'))
+        del columns['Airline'], columns['FlNumber'], columns['WasCancelled']
+        pyarrow.feather.write_feather(pyarrow.table(columns), path)
+        log = loadFlights(path)
+        self.assertEqual(log.cancelledCount, 0)
+        self.assertEqual(log.flightCount, sum(1 for ro in self.rows if parseDate(ro[0]) is not None))
+
+    @unittest.skipIf(columnar.pandas is None, 'pandas is not installed')
+    def test_dataframes(self):
+        """Test DataFrames of the CSV strings, and of datetimes and booleans"""
+        import pandas
+        self.assertSameHistory(columnar.loadTable(pandas.DataFrame(self.rows)))
+        frame = pandas.DataFrame(typedColumns(self.rows))
+        frame['DepartDateTime'] = pandas.to_datetime(frame['DepartDateTime'])
+        self.assertSameHistory(columnar.loadTable(frame), errors=False)
+        with self.assertRaises(ValueError):
+            columnar.loadTable(frame.iloc[:, :3])
+
+    def test_without_the_libraries(self):
+        """Test the errors when neither pyarrow nor pandas is installed"""
+        with mock.patch.object(columnar, 'pyarrow', None), mock.patch.object(columnar, 'pandas', None):
+            with self.assertRaises(ValueError):
+                loadFlights(os.path.join(self.directory, 'flights.parquet'))
+            with self.assertRaises(TypeError):
+                columnar.loadTable([['17/05/10', 'LIS', 'FALSE', 'EDI', 'TRUE']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the fixed-width date parser (parseDate, dateParser)
+"""
+import unittest
+import sys
+import os
+import random
+from datetime import datetime
+from unittest import mock
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BPDatesValidator
+from BPDatesValidator import dateX, parseDate, dateParser
+
+
+def strptimeCascade(text):
+    """Reference implementation: the strptime try/except cascade"""
+    for fmt in ('%d/%m/%y %H:%M', '%d/%m/%y', '%d/%m/%Y'):
+        try:
+            dateTemp = datetime.strptime(text.strip(), fmt).date()
+        except ValueError:
+            continue
+        return dateX(dateTemp.year, dateTemp.month, dateTemp.day)
+    return None
+
+
+class TestDateParser(unittest.TestCase):
+    """Test cases for parseDate and dateParser"""
+
+    def test_documented_formats(self):
+        """Test the three formats of the CSV DepartDateTime"""
+        for text in ("17/05/10 10:40", "17/05/10", "17/05/2010", " 17/05/10 10:40 "):
+            with self.subTest(text=text):
+                dt = parseDate(text)
+                self.assertEqual(dt, dateX(2010, 5, 17))
+                self.assertIsInstance(dt, dateX)
+
+    def test_two_digit_year_pivot(self):
+        """Test the strptime century pivot of two-digit years"""
+        self.assertEqual(parseDate("01/01/68").year, 2068)
+        self.assertEqual(parseDate("01/01/69").year, 1969)
+        self.assertEqual(parseDate("01/01/99 23:59").year, 1999)
+
+    def test_wrong_formats(self):
+        """Test that wrong dates are rejected"""
+        for text in ("32/05/10 10:40", "17/13/10 10:40", "17/05/10 25:40", "17/05/10 10:70",
+                     "29/02/21", "invalid date", "17-05-10 10:40", ""):
+            with self.subTest(text=text):
+                self.assertIsNone(parseDate(text))
+
+    def test_strptime_fallback(self):
+        """Test dates strptime accepts outside the fixed-width formats"""
+        self.assertEqual(parseDate("7/5/10 9:05"), dateX(2010, 5, 7))
+        self.assertEqual(parseDate("17/05/10  10:40"), dateX(2010, 5, 17))
+
+    def test_matches_strptime_cascade(self):
+        """Test random, partly broken dates against the strptime cascade"""
+        rnd = random.Random(7)
+        alphabet = "0123456789/: "
+        texts = []
+        for _ in range(3000):
+            text = f"{rnd.randint(0, 35):02d}/{rnd.randint(0, 14):02d}/" + rnd.choice(
+                [f"{rnd.randint(0, 99):02d}", f"{rnd.randint(1990, 2030)}",
+                 f"{rnd.randint(0, 99):02d} {rnd.randint(0, 25):02d}:{rnd.randint(0, 65):02d}"])
+            if rnd.random() < 0.2:
+                i = rnd.randrange(len(text))
+                text = text[:i] + rnd.choice(alphabet) + text[i + 1:]
+            texts.append(text)
+        readDate = dateParser()
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(parseDate(text), strptimeCascade(text))
+                self.assertEqual(readDate(text), strptimeCascade(text))
+
+    def test_format_detected_once(self):
+        """Test that dateParser keeps the format of the first readable row"""
+        readDate = dateParser()
+        with mock.patch.object(BPDatesValidator, 'parseDate', wraps=parseDate) as fallback:
+            self.assertIsNone(readDate("not a date"))
+            self.assertEqual(readDate("17/05/2010"), dateX(2010, 5, 17))
+            self.assertEqual(fallback.call_count, 2)
+            self.assertEqual(readDate("18/05/2010"), dateX(2010, 5, 18))  # bound format, no fallback
+            self.assertEqual(fallback.call_count, 2)
+            self.assertEqual(readDate("18/05/10 10:40"), dateX(2010, 5, 18))  # other format still read
+            self.assertEqual(readDate(" 19/05/2010 "), dateX(2010, 5, 19))
+            self.assertEqual(fallback.call_count, 4)
+            self.assertEqual(readDate("20/05/2010"), dateX(2010, 5, 20))
+            self.assertEqual(fallback.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
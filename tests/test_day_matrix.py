@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the NumPy engine evaluating many histories at once (day_matrix.py)
+"""
+import unittest
+from unittest import mock
+import sys
+import os
+import random
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, Flight, loadFlights, analyse
+from benchmarks.history import syntheticRows
+from applicants import validateApplicants, validateBlocks
+import day_matrix
+
+
+def histories(count, seed=1):
+    rnd = random.Random(seed)
+    for k in range(count):
+        yield loadFlights(syntheticRows(rnd.choice([0, 1, 2, 5, 30, 120]), seed=seed * 1000 + k,
+                                        end=dateX(2021, rnd.randint(1, 12), rnd.randint(1, 28)),
+                                        years=rnd.choice([1, 3, 6, 9]), errors=0.1))
+
+
+def analysed(logs, dateApply):
+    """The rule values of every history, analysed one by one."""
+    values = []
+    for log in logs:
+        result = analyse(log, dateApply)
+        values.append((result.total5Y, result.total1Y, result.cuntMax, sum(result.steps.errors)))
+    return values
+
+
+class TestDayMatrix(unittest.TestCase):
+    """Test cases for ruleValues and the numpy engine of the applicants mode"""
+
+    @unittest.skipIf(day_matrix.numpy is None, 'NumPy is not installed')
+    def test_matches_the_analysis(self):
+        """Test that the values of many histories at once are those of analysing each"""
+        logs = list(histories(150))
+        for dateApply in (dateX(2020, 12, 10), dateX(2021, 1, 31), dateX(2019, 2, 28), dateX(2016, 3, 1)):
+            with self.subTest(dateApply=dateApply):
+                self.assertEqual(day_matrix.ruleValues(logs, dateApply), analysed(logs, dateApply))
+
+    @unittest.skipIf(day_matrix.numpy is None, 'NumPy is not installed')
+    def test_day_matrix(self):
+        """Test the rows of days abroad, flight days not counted"""
+        flights = [Flight(dateX(2017, 3, 1), 'EDI', True, 'LIS', False),
+                   Flight(dateX(2017, 3, 11), 'LIS', False, 'EDI', True)]
+        self.assertEqual(day_matrix.ruleValues([[], flights, flights[::-1]], dateX(2020, 12, 10)),
+                         [(0, 0, 0, 0), (10, 0, 9, 0), (10, 0, 9, 0)])
+        columns = day_matrix.flightColumns(flights)
+        numpy = day_matrix.numpy
+        matrix = day_matrix.DayMatrix(2, numpy.array([1, 1]), numpy.array(columns[0], dtype=numpy.int64),
+                                      numpy.frombuffer(columns[1], dtype=numpy.uint8),
+                                      numpy.frombuffer(columns[2], dtype=numpy.uint8),
+                                      numpy.array([True, False]), dateX(2020, 12, 10))
+        self.assertEqual(matrix.abroad.shape, (2, (dateX(2020, 12, 31) - dateX(2015, 12, 11)).days + 1))
+        self.assertEqual(matrix.abroad.sum(axis=1).tolist(), [0, 9])
+        self.assertEqual(matrix.count(dateX(2017, 3, 5), dateX(2017, 3, 6)).tolist(), [0, 2])
+
+    def test_falls_back_without_numpy(self):
+        """Test that without NumPy the histories are analysed one by one, with the same values"""
+        logs = list(histories(20, seed=2))
+        with mock.patch.object(day_matrix, 'numpy', None):
+            self.assertEqual(day_matrix.ruleValues(logs, dateX(2020, 12, 10)), analysed(logs, dateX(2020, 12, 10)))
+
+    @unittest.skipIf(day_matrix.numpy is None, 'NumPy is not installed')
+    def test_applicants_engine(self):
+        """Test the applicants mode with the numpy engine, also in small blocks"""
+        rows = [[f'A{k}'] + list(ro) for k in range(30)
+                for ro in syntheticRows(random.Random(k).choice([0, 3, 20]), seed=k, end=dateX(2020, 11, 1), years=6)]
+        dateApply = dateX(2020, 12, 10)
+
+        def summary(rows):
+            return [(row.path, row.flights, row.total5Y, row.total1Y, row.cuntMax, row.errors) for row in rows]
+        expected = summary(validateApplicants(rows, dateApply))
+        self.assertEqual(summary(validateApplicants(rows, dateApply, 'numpy')), expected)
+        self.assertEqual(summary(validateBlocks(rows, dateApply, block=7)), expected)
+        record = next(validateApplicants(rows, dateApply, 'numpy', True)).asRecord()
+        self.assertEqual((record['applicant'], record['total5Y'], record['errorCount']),
+                         (expected[0][0], expected[0][2], expected[0][5]))
+
+    def test_applicants_engine_without_numpy(self):
+        """Test that the applicants mode falls back to the prefix engine, with its full records"""
+        rows = [[f'A{k}'] + list(ro) for k in range(5) for ro in syntheticRows(10, seed=k, end=dateX(2020, 11, 1))]
+        dateApply = dateX(2020, 12, 10)
+        expected = [row.asRecord() for row in validateApplicants(rows, dateApply, records=True)]
+        with mock.patch.object(day_matrix, 'numpy', None):
+            rows = list(validateApplicants(rows, dateApply, 'numpy', True))
+        self.assertEqual([row.asRecord() for row in rows], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the FenwickIndex absence index with live trip edits
+"""
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import (Period, dateX, Flight, FlightArray, absencePeriods, AbsenceIndex, FenwickIndex,
+                              ENGINES, loadFlights, analyse, resultRecord, monthWindowMax, slidingWindowMax)
+from benchmarks.history import syntheticRows
+from tests.test_absence_index import randomHistory
+
+
+class TestFenwickIndex(unittest.TestCase):
+    """Test cases for the FenwickIndex"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.dateApply = dateX(2020, 12, 10)
+        self.date5Y = self.dateApply.shiftYear(-5).shiftDay(1)
+        self.dateApplyStar = self.dateApply.lastDay()
+
+    def assertSameCounts(self, index, expected, seed):
+        rnd = random.Random(seed)
+        for _ in range(50):
+            dateFrom = self.date5Y.shiftDay(rnd.randint(-30, 1900))
+            dateTo = dateFrom.shiftDay(rnd.randint(-2, 400))
+            self.assertEqual(index.count(dateFrom, dateTo), expected.count(dateFrom, dateTo))
+        self.assertEqual(monthWindowMax(index, self.date5Y), monthWindowMax(expected, self.date5Y))
+        self.assertEqual(slidingWindowMax(index), slidingWindowMax(expected))
+
+    def test_engines_registry(self):
+        """Test that the index can be selected by name"""
+        self.assertIs(ENGINES['fenwick'], FenwickIndex)
+
+    def test_count_single_trip(self):
+        """Test counting a single trip, flight days excluded"""
+        index = FenwickIndex([Period(dateX(2017, 3, 1), dateX(2017, 3, 11))], self.date5Y, self.dateApplyStar)
+        self.assertEqual(index.count(dateX(2017, 1, 1), dateX(2017, 12, 31)), 9)
+        self.assertEqual(index.count(dateX(2017, 3, 5), dateX(2017, 3, 6)), 2)
+        self.assertEqual(index.count(dateX(2017, 3, 11), dateX(2017, 3, 31)), 0)
+        self.assertEqual(index.count(dateX(2017, 3, 6), dateX(2017, 3, 5)), 0)
+        self.assertEqual(index.total(dateX(2017, 3, 6)), 5)
+
+    def test_matches_absence_index(self):
+        """Test that every count matches the prefix-sum index"""
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                rangeList = absencePeriods(randomHistory(seed), self.date5Y)
+                index = FenwickIndex(rangeList, self.date5Y, self.dateApplyStar)
+                self.assertSameCounts(index, AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar), seed)
+
+    def test_edits_match_a_new_index(self):
+        """Test that removing, adding and shifting trips gives the index built from scratch"""
+        for seed in range(6):
+            with self.subTest(seed=seed):
+                rangeList = absencePeriods(randomHistory(seed), self.date5Y)
+                index = FenwickIndex(rangeList, self.date5Y, self.dateApplyStar)
+                rnd = random.Random(seed)
+                rnd.shuffle(rangeList)
+                removed, kept = rangeList[:len(rangeList) // 2], rangeList[len(rangeList) // 2:]
+                for period in removed:
+                    index.remove(period)
+                self.assertSameCounts(index, AbsenceIndex(kept, self.date5Y, self.dateApplyStar), seed)
+                shifted = [Period(period.dateFrom.shiftDay(1), period.dateTo) for period in removed]
+                for period in shifted:
+                    index.add(period)
+                self.assertSameCounts(index, AbsenceIndex(kept + shifted, self.date5Y, self.dateApplyStar), seed)
+
+    def test_overlaps_and_unknown_periods_are_refused(self):
+        """Test that an overlapping period can not be added, nor an unknown one removed"""
+        index = FenwickIndex([Period(dateX(2017, 3, 1), dateX(2017, 3, 11))], self.date5Y, self.dateApplyStar)
+        with self.assertRaises(ValueError):
+            index.add(Period(dateX(2017, 3, 5), dateX(2017, 3, 20)))
+        with self.assertRaises(ValueError):
+            index.remove(Period(dateX(2017, 3, 11), dateX(2017, 3, 20)))
+        index.add(Period(dateX(2017, 3, 11), dateX(2017, 3, 20)))
+        self.assertEqual(index.count(self.date5Y, self.dateApplyStar), 17)
+
+    def test_analysis_and_rule_totals(self):
+        """Test that the engine gives the record of the prefix engine, and total() the rule totals without errors"""
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                rows = syntheticRows(200, seed=seed, end=self.dateApply.shiftDay(-20), years=6, errors=0)
+                log = loadFlights(rows)
+                result = analyse(log, self.dateApply, engine='fenwick', allWindows=True)
+                record = resultRecord(result)
+                expected = resultRecord(analyse(log, self.dateApply, allWindows=True))
+                self.assertEqual(record, expected)
+                self.assertEqual(result.index.total(result.date5Y), result.total5Y)
+                self.assertEqual(result.index.total(result.date1Y), result.total1Y)
+
+    def test_total_with_continuity_errors(self):
+        """Test that total() counts the days of the trips, which the rule totals exceed with UK/NON-UK errors"""
+        differs = 0
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                rows = syntheticRows(200, seed=seed, end=self.dateApply.shiftDay(-20), years=6, errors=0.05)
+                log = loadFlights(rows)
+                result = analyse(log, self.dateApply, engine='fenwick')
+                flights = FlightArray(sorted(log.flights, key=Flight.getDate))
+                for dateFrom, total in ((result.date5Y, result.total5Y), (result.date1Y, result.total1Y)):
+                    trips = sum((rg.dateTo - rg.dateFrom).days for rg in absencePeriods(flights, dateFrom))
+                    self.assertEqual(result.index.total(dateFrom), trips)
+                    self.assertLessEqual(trips, total)
+                    differs += trips != total
+        self.assertGreater(differs, 0)
+
+    def test_sliding_max_over_a_leap_year(self):
+        """Test that a window starting on 1 March, ending on 29 February, is found as by the prefix engine"""
+        rows = [['24/02/19', 'EDI', 'TRUE', 'LIS', 'FALSE'], ['04/03/19', 'LIS', 'FALSE', 'EDI', 'TRUE'],
+                ['24/02/20', 'EDI', 'TRUE', 'LIS', 'FALSE'], ['02/03/20', 'LIS', 'FALSE', 'EDI', 'TRUE']]
+        log = loadFlights(rows)
+        worst = resultRecord(analyse(log, self.dateApply, engine='fenwick', allWindows=True))['worst']
+        self.assertEqual(worst, resultRecord(analyse(log, self.dateApply, allWindows=True))['worst'])
+        self.assertEqual(worst['days'], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
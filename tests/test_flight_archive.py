@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped binary flight archive (flight_archive.py)
+"""
+import unittest
+from unittest import mock
+import sys
+import os
+import json
+import tempfile
+import shutil
+import subprocess
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, FlightArray, FlightStream, loadFlights, analyse, resultRecord
+from benchmarks.history import syntheticRows, writeHistory
+from applicants import readApplicants
+import flight_archive
+from flight_archive import FlightArchive, writeArchive, convertFlights, RECORD
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestFlightArchive(unittest.TestCase):
+    """Test cases for writing and reading flight archives"""
+
+    def setUp(self):
+        """Set up a history with cancelled flights and an unreadable date"""
+        self.dir = tempfile.mkdtemp()
+        self.path = writeHistory(os.path.join(self.dir, 'history.csv'), 400, errors=0.02)
+        with open(self.path, 'a') as csv_file:
+            csv_file.write('not a date,EDI,TRUE,LIS,FALSE,,,FALSE\n')
+        self.dateApply = dateX(2020, 12, 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def record(self, log):
+        record = resultRecord(analyse(log, self.dateApply, allWindows=True))
+        record['source'] = None
+        return record
+
+    def test_history_matches_csv(self):
+        """Test that an archived history gives the result of its CSV file, natively and unpacked"""
+        archive = os.path.join(self.dir, 'history.bpfa')
+        expected = loadFlights(self.path)
+        self.assertEqual(convertFlights(self.path, archive), (1, len(expected.entries)))
+        log = loadFlights(archive)
+        self.assertIsInstance(log.flights, FlightArray)
+        self.assertEqual((log.flightCount, log.cancelledCount, log.errors),
+                         (expected.flightCount, expected.cancelledCount, expected.errors))
+        self.assertEqual(self.record(log), self.record(expected))
+        self.assertEqual(log.cancelled[0].airline, sorted(expected.cancelled, key=lambda ca: ca.date)[0].airline)
+        with mock.patch.object(flight_archive, 'NATIVE', False), FlightArchive(archive) as opened:
+            self.assertEqual(self.record(opened.flights()), self.record(expected))
+        stream = FlightStream(archive)
+        self.assertEqual(sum(1 for _ in stream), expected.flightCount)
+        self.assertEqual(stream.errors, expected.errors)
+
+    def test_applicants_index(self):
+        """Test finding applicants by ID, reading their records and merging an ID given twice"""
+        histories = [(f'A{k % 7}', loadFlights(syntheticRows(30, seed=k, end=dateX(2020, 11, 1)))) for k in range(10)]
+        archive = os.path.join(self.dir, 'caseload.bpfa')
+        total = sum(len(log.entries) for _, log in histories)
+        self.assertEqual(writeArchive(archive, histories + [('Ö', loadFlights([]))]), (8, total))
+        with FlightArchive(archive) as opened:
+            self.assertEqual(list(opened.applicants()), ['A0', 'A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'Ö'])
+            self.assertEqual(opened.indexAt - opened.recordsAt, total * RECORD.size)
+            self.assertEqual(opened.find('A3'), 3)
+            self.assertEqual(opened.flights('Ö').flightCount, 0)
+            with self.assertRaises(KeyError):
+                opened.flights('A7')
+            with self.assertRaises(ValueError):
+                opened.flights()
+            # A1 is the histories 1 and 8, merged by date
+            merged = histories[1][1].entries + histories[8][1].entries
+            records = list(opened.records('A1'))
+            self.assertEqual([record[0] for record in records],
+                             sorted(flight.date.toordinal() for flight in merged))
+            self.assertEqual(len(records[0]), 4)
+            log = opened.flights('A1')
+            self.assertEqual(log.flightCount + log.cancelledCount, len(merged))
+            self.assertTrue(log.flights.isSorted())
+
+    def test_applicants_match_csv(self):
+        """Test that the applicants of an archive get the records of the CSV file, in ID order"""
+        csvPath = os.path.join(self.dir, 'caseload.csv')
+        with open(csvPath, 'w') as csv_file:
+            for k in (3, 1, 2):
+                csv_file.writelines(','.join([f'A{k}'] + ro) + '\n'
+                                    for ro in syntheticRows(40 * k, seed=k, errors=0.05))
+        archive = os.path.join(self.dir, 'caseload.bpfa')
+        self.assertEqual(convertFlights(csvPath, archive, applicants=True)[0], 3)
+        for engine in ('prefix', 'numpy'):
+            with self.subTest(engine=engine):
+                expected = sorted((row.asRecord() for row in readApplicants(csvPath, self.dateApply, engine, True)),
+                                  key=lambda record: record['applicant'])
+                records = [row.asRecord() for row in readApplicants(archive, self.dateApply, engine, True)]
+                for record in expected + records:
+                    record.pop('source')
+                self.assertEqual(records, expected)
+
+    def test_not_an_archive(self):
+        """Test that any other file is refused"""
+        with self.assertRaises(ValueError):
+            FlightArchive(self.path)
+
+    def test_command_line(self):
+        """Test writing an archive, then validating it and one of its applicants"""
+        archive = os.path.join(self.dir, 'history.bpfa')
+        script = [sys.executable, os.path.join(ROOT, 'BPDatesValidator.py')]
+        env = {**os.environ, 'NO_COLOR': '1'}
+        out = subprocess.run(script + ['--archive', archive, self.path], capture_output=True, text=True, env=env)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertIn('of 1 applicant into', out.stdout)
+        expected = subprocess.run(script + ['101220', self.path, '--format', 'json'], capture_output=True, text=True)
+        for extra in ([], ['--applicant', '']):
+            out = subprocess.run(script + ['101220', archive, '--format', 'json'] + extra, capture_output=True,
+                                 text=True)
+            self.assertEqual({**json.loads(out.stdout), 'source': None}, {**json.loads(expected.stdout), 'source': None})
+        out = subprocess.run(script + ['101220', archive, '--applicant', 'nobody'], capture_output=True, text=True)
+        self.assertEqual(out.returncode, 2)
+        self.assertIn('no applicant nobody', out.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
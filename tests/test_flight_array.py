@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact representations (__slots__ classes, FlightArray, StepArray)
+"""
+import unittest
+import sys
+import os
+from array import array
+from datetime import date
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import (Flight, Period, Day, FlightArray, StepArray, dateX,
+                              absencePeriods, analyse)
+from tests.test_absence_index import randomHistory
+
+
+class TestFlightArray(unittest.TestCase):
+    """Test cases for FlightArray and StepArray"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.flights = [
+            Flight(dateX(2016, 7, 27), "EDI", True, "GDN", False),
+            Flight(dateX(2016, 8, 2), "GDN", False, "EDI", True),
+            Flight(dateX(2020, 3, 5), "EDI", True, "LPA", False),
+            Flight(dateX(2020, 4, 7), "LPA", False, "EDI", 1),
+        ]
+        self.array = FlightArray(self.flights)
+
+    def test_slots(self):
+        """Test that the record classes have no per-instance __dict__"""
+        for record in (self.flights[0], Period(dateX(2020, 1, 1), dateX(2020, 1, 2)), Day(dateX(2020, 1, 1), True)):
+            with self.subTest(record=type(record).__name__):
+                self.assertFalse(hasattr(record, '__dict__'))
+                with self.assertRaises(AttributeError):
+                    record.extra = 1
+
+    def test_columns(self):
+        """Test the arrays holding the flights"""
+        self.assertEqual(len(self.array), 4)
+        self.assertIsInstance(self.array.ordinals, array)
+        self.assertEqual(self.array.ordinals[0], date(2016, 7, 27).toordinal())
+        self.assertEqual(self.array.originUK, bytearray([1, 0, 1, 0]))
+        self.assertEqual(self.array.destinUK, bytearray([0, 1, 0, 1]))
+        self.assertEqual(self.array.codes, ["EDI", "GDN", "LPA"])
+        self.assertEqual(list(self.array.origins), [0, 1, 0, 2])
+
+    def test_codes_are_interned(self):
+        """Test that equal airport codes share one string"""
+        codes = FlightArray([Flight(dateX(2020, 1, 1), "".join(["E", "DI"]), True, "LIS", False),
+                             Flight(dateX(2020, 1, 2), "LIS", False, "".join(["ED", "I"]), True)])
+        self.assertEqual(len(codes.codes), 2)
+        self.assertIs(codes.flight(0).origin, codes.flight(1).destin)
+
+    def test_flight_round_trip(self):
+        """Test rebuilding Flight objects from the arrays"""
+        for original, rebuilt in zip(self.flights, self.array):
+            self.assertEqual(rebuilt.date, original.date)
+            self.assertIsInstance(rebuilt.date, dateX)
+            self.assertEqual(rebuilt.origin, original.origin)
+            self.assertEqual(rebuilt.destin, original.destin)
+            self.assertEqual(rebuilt.originUK, bool(original.originUK))
+            self.assertEqual(rebuilt.destinUK, bool(original.destinUK))
+
+    def test_sorted_by_date(self):
+        """Test sorting the arrays by day, flights of the same day keeping their order"""
+        flights = [self.flights[2], self.flights[1], Flight(dateX(2016, 8, 2), "LIS", True, "EDI", False),
+                   self.flights[0], self.flights[3]]
+        unsorted = FlightArray(flights)
+        ordered = unsorted.sortedByDate()
+        expected = FlightArray(sorted(flights, key=Flight.getDate))
+        for column in ('ordinals', 'originUK', 'destinUK'):
+            self.assertEqual(getattr(ordered, column), getattr(expected, column))
+        self.assertEqual([fl.origin for fl in ordered], ["EDI", "GDN", "LIS", "EDI", "LPA"])
+        self.assertEqual(list(unsorted.ordinals), [flight.date.toordinal() for flight in flights])
+        self.assertIs(ordered.sortedByDate(), ordered)
+
+    def test_absence_periods_from_array(self):
+        """Test that the array gives the same periods as the Flight list"""
+        date5Y = dateX(2015, 12, 11)
+        flights = randomHistory(2, trips=60, start=dateX(2014, 1, 1))
+        expected = absencePeriods(flights, date5Y)
+        periods = absencePeriods(FlightArray(flights), date5Y)
+        self.assertEqual([(rg.dateFrom, rg.dateTo) for rg in periods],
+                         [(rg.dateFrom, rg.dateTo) for rg in expected])
+
+    def test_steps(self):
+        """Test the Step views of an analysis"""
+        result = analyse(self.flights, date(2020, 12, 10))
+        self.assertIsInstance(result.flights, FlightArray)
+        self.assertIsInstance(result.steps, StepArray)
+        self.assertEqual(len(result.steps), 4)
+        last = result.steps[-1]
+        self.assertEqual(last.flight.date, dateX(2020, 4, 7))
+        self.assertEqual(last.dateOld, dateX(2020, 3, 5))
+        self.assertEqual(last.destinOld, "LPA")
+        self.assertEqual(last.delta1, 33)
+        self.assertFalse(last.error)
+        self.assertEqual([step.total1Y for step in result.steps], [0, 0, 0, 33])
+        self.assertEqual(result.steps[0].destinOld, "UK")
+        with self.assertRaises(IndexError):
+            result.steps[4]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk parsed flight cache
+"""
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, FlightArray, loadFlights, analyse, resultRecord
+from benchmarks.history import writeHistory
+import flight_cache
+from flight_cache import FlightCache
+
+
+class TestFlightCache(unittest.TestCase):
+    """Test cases for FlightCache"""
+
+    def setUp(self):
+        """Set up a history and an empty cache directory"""
+        self.dir = tempfile.mkdtemp()
+        self.cacheDir = os.path.join(self.dir, "cache")
+        self.path = writeHistory(os.path.join(self.dir, "history.csv"), 400, errors=0.02)
+        with open(self.path, 'a') as csv_file:
+            csv_file.write("not a date,EDI,TRUE,LIS,FALSE,,,FALSE\n")
+        self.dateApply = dateX(2020, 12, 10)
+
+    def tearDown(self):
+        """Remove the directory"""
+        shutil.rmtree(self.dir)
+
+    def keyOf(self, cache, path):
+        with open(path, 'rb') as csv_file:
+            return cache.key(path, csv_file.read())
+
+    def entries(self):
+        return sorted(name for name in os.listdir(self.cacheDir) if name.endswith('.flights'))
+
+    def test_hit_matches_parse(self):
+        """Test that a cached history gives the same result as parsing it"""
+        cache = FlightCache(self.cacheDir)
+        expected = resultRecord(analyse(loadFlights(self.path), self.dateApply, allWindows=True))
+        first = cache.load(self.path)
+        self.assertEqual(len(self.entries()), 1)
+        with mock.patch.object(flight_cache, 'loadFlights') as parse:
+            second = cache.load(self.path)
+            parse.assert_not_called()
+        self.assertIsInstance(second.flights, FlightArray)
+        self.assertEqual(second.cancelled[0].date, first.cancelled[0].date)
+        for log in (first, second):
+            self.assertEqual(resultRecord(analyse(log, self.dateApply, allWindows=True)), expected)
+        result = analyse(second, self.dateApply)
+        self.assertEqual(list(result.steps[5].boundaries), list(analyse(first, self.dateApply).steps[5].boundaries))
+
+    def test_hit_keeps_entries(self):
+        """Test that a cached history lists the rows of its file, unless they are not asked for"""
+        cache = FlightCache(self.cacheDir)
+        cache.load(self.path)
+        row = lambda fl: (fl.date, fl.origin, fl.originUK, fl.destin, fl.destinUK, fl.airline, fl.number, fl.cancelled)
+        expected = [row(fl) for fl in loadFlights(self.path).entries]
+        self.assertEqual([row(fl) for fl in cache.load(self.path).entries], expected)
+        self.assertEqual(cache.load(self.path, entries=False).entries, [])
+
+    def test_key_follows_content(self):
+        """Test that a changed file gets a new entry"""
+        cache = FlightCache(self.cacheDir)
+        cache.load(self.path)
+        with open(self.path, 'a') as csv_file:
+            csv_file.write("01/12/20,LIS,FALSE,EDI,TRUE,,,FALSE\n")
+        log = cache.load(self.path)
+        self.assertEqual(len(self.entries()), 2)
+        self.assertEqual(log.flightCount, loadFlights(self.path).flightCount)
+
+    def test_broken_entry_is_parsed_again(self):
+        """Test that an unreadable entry is ignored and written again"""
+        cache = FlightCache(self.cacheDir)
+        cache.load(self.path)
+        entry = os.path.join(self.cacheDir, self.entries()[0])
+        with open(entry, 'r+b') as entry_file:
+            entry_file.truncate(os.path.getsize(entry) - 3)
+        self.assertEqual(cache.load(self.path).flightCount, loadFlights(self.path).flightCount)
+        self.assertIsNotNone(cache.get(self.entries()[0]))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries go first"""
+        paths = [writeHistory(os.path.join(self.dir, f"h{i}.csv"), 200, seed=i) for i in range(3)]
+        cache = FlightCache(self.cacheDir)
+        for path in paths:
+            cache.load(path)
+            time.sleep(0.01)
+        total = sum(os.path.getsize(os.path.join(self.cacheDir, name)) for name in self.entries())
+        cache.load(paths[0])  # a hit makes h0 the most recently used
+        cache.maxBytes = total - 1
+        cache.evict()
+        kept = self.entries()
+        self.assertEqual(len(kept), 2)
+        self.assertIn(self.keyOf(cache, paths[0]), kept)
+        self.assertNotIn(self.keyOf(cache, paths[1]), kept)
+
+    def test_temporary_files_of_killed_writers(self):
+        """Test that temporary files count towards the limit, and stale ones are removed"""
+        cache = FlightCache(self.cacheDir)
+        cache.load(self.path)
+        stale, fresh = (os.path.join(self.cacheDir, name) for name in ("stale.tmp", "fresh.tmp"))
+        for temp in (stale, fresh):
+            with open(temp, 'wb') as temp_file:
+                temp_file.write(b'x' * 1000)
+        os.utime(stale, (time.time() - flight_cache.STALE - 1,) * 2)
+        cache.maxBytes = sum(os.path.getsize(os.path.join(self.cacheDir, name)) for name in self.entries()) + 999
+        cache.evict()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertEqual(self.entries(), [])
+
+    def test_hit_is_timed(self):
+        """Test that a log read from the cache carries the time of reading it"""
+        cache = FlightCache(self.cacheDir)
+        cache.load(self.path)
+        log = cache.load(self.path)
+        self.assertGreater(log.seconds, 0)
+        self.assertGreater(analyse(log, self.dateApply).timings['read'], 0)
+
+    def test_concurrent_writers(self):
+        """Test that runs sharing a cache leave whole entries and no temporary files"""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            logs = list(pool.map(lambda _: FlightCache(self.cacheDir).load(self.path), range(16)))
+        self.assertEqual({log.flightCount for log in logs}, {loadFlights(self.path).flightCount})
+        self.assertEqual(len(self.entries()), 1)
+        self.assertEqual([name for name in os.listdir(self.cacheDir) if name.endswith('.tmp')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
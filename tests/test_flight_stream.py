@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming CSV ingest (iterFlights, FlightStream)
+"""
+import unittest
+import sys
+import os
+import tempfile
+import tracemalloc
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import Flight, FlightStream, dateX, iterFlights, loadFlights, analyse, render
+from benchmarks.history import writeHistory
+
+
+class TestFlightStream(unittest.TestCase):
+    """Test cases for iterFlights and FlightStream"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.csv_data = ("17/05/16 10:40,LIS,FALSE,EDI,TRUE,RyanAir,FR1111,FALSE\n"
+                         "27/07/16,EDI,TRUE,GDN,FALSE,RyanAir,FR2222,FALSE\n"
+                         "28/07/16,EDI,TRUE,GDN,FALSE,RyanAir,FR2223,TRUE\n"
+                         "2016-08-01,GDN,FALSE,EDI,TRUE,,,FALSE\n"
+                         "02/08/2016,GDN,FALSE,EDI,TRUE,,,FALSE\n"
+                         "30/07/17 12:20,EDI,TRUE,LPA,FALSE,RyanAir,FR4444,TRUE\n"
+                         "05/03/20 12:20,EDI,TRUE,LPA,FALSE,RyanAir,FR5555,FALSE\n"
+                         "07/04/20 10:10,LPA,FALSE,GLA,TRUE,WizzAir,FR6666,FALSE\n")
+        self.dateApply = date(2020, 12, 10)
+
+    def test_iter_flights_is_lazy(self):
+        """Test that flights are yielded before the rest of the stream is read"""
+        log = FlightStream()
+        flights = iterFlights(StringIO(self.csv_data), log)
+        first = next(flights)
+        self.assertIsInstance(first, Flight)
+        self.assertEqual(first.date, dateX(2016, 5, 17))
+        self.assertEqual(log.flightCount, 1)
+        rest = list(flights)
+        self.assertEqual(len(rest), 4)
+        self.assertEqual(log.flightCount, 5)
+
+    def test_cancelled_flights_are_counted(self):
+        """Test that cancelled flights are counted and only sampled"""
+        log = FlightStream(sample=1)
+        flights = list(iterFlights(StringIO(self.csv_data), log))
+        self.assertTrue(all(not flight.cancelled for flight in flights))
+        self.assertEqual(log.cancelledCount, 2)
+        self.assertEqual(len(log.cancelled), 1)
+        self.assertEqual(log.cancelled[0].number, "FR2223")
+        self.assertEqual(log.entries, [])
+        self.assertEqual(log.flights, [])
+
+    def test_wrong_rows_are_reported(self):
+        """Test that rows with a wrong date are reported"""
+        log = FlightStream()
+        list(iterFlights(StringIO(self.csv_data), log))
+        self.assertEqual(len(log.errors), 1)
+        self.assertEqual(log.errors[0][0], 3)
+        self.assertIn("2016-08-01", log.errors[0][1])
+
+    def test_stdin(self):
+        """Test reading '-' from stdin"""
+        with mock.patch('sys.stdin', StringIO(self.csv_data)):
+            flights = list(iterFlights('-'))
+        self.assertEqual(len(flights), 5)
+
+    def test_analyse_stream_matches_log(self):
+        """Test that analysing a stream gives the same values as a loaded log"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as temp_file:
+            temp_file.write(self.csv_data)
+        try:
+            stream = analyse(FlightStream(temp_file.name), self.dateApply)
+            loaded = analyse(loadFlights(temp_file.name), self.dateApply)
+            for name in ('total5Y', 'total1Y', 'cuntMax', 'totalUK', 'totalEUR', 'totalERR', 'errors'):
+                with self.subTest(name=name):
+                    self.assertEqual(getattr(stream, name), getattr(loaded, name))
+            text = render(stream)
+            self.assertIn("Processed 7 lines (5 flights + 2 cancelled).", text)
+            self.assertNotIn("Flight on", text)
+        finally:
+            os.unlink(temp_file.name)
+
+
+    def test_analyse_stream_keeps_no_flights(self):
+        """Test that analysing a stream takes a fraction of the memory of a loaded log"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = writeHistory(os.path.join(directory, "history.csv"), 20000)
+            peaks = []
+            for log in (lambda: FlightStream(path), lambda: loadFlights(path)):
+                tracemalloc.start()
+                try:
+                    analyse(log(), self.dateApply)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+        self.assertLess(peaks[0], peaks[1] / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the consistency check of a flight history (history_check.py)
+"""
+import unittest
+import sys
+import os
+import random
+import tempfile
+import shutil
+import subprocess
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import FlightLog, loadFlights, loadFlightFiles, analyse, dateX
+from benchmarks.history import syntheticRows, writeHistory
+from history_check import checkRows, checkFiles, firstBreak, renderBreaks
+from batch_mode import validateFile
+from term_style import noctyle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROWS = [['17/05/10 10:40', 'LIS', 'FALSE', 'EDI', 'TRUE', 'RyanAir', 'FR1111', 'FALSE'],
+        ['27/07/10 13:10', 'EDI', 'TRUE', 'GDN', 'FALSE', 'RyanAir', 'FR2222', 'FALSE'],
+        ['02/05/11 10:50', 'WMI', 'FALSE', 'PIK', 'TRUE', 'RyanAir', 'FR3333', 'FALSE'],
+        ['30/13/13 12:20', 'EDI', 'TRUE', 'LPA', 'FALSE', 'RyanAir', 'FR4444', 'FALSE'],
+        ['07/08/13 10:10', 'EDI', 'TRUE', 'GLA', 'TRUE', 'WizzAir', 'FR5555', 'FALSE'],
+        ['01/08/12 10:10', 'GLA', 'TRUE', 'LPA', 'FALSE', 'WizzAir', 'FR6666', 'FALSE']]
+
+
+def analysisBreaks(source):
+    """The dates of the flights analyse() marks as UK/NON-UK errors."""
+    result = analyse(source if isinstance(source, FlightLog) else loadFlights(source), dateX(2021, 1, 1))
+    return sorted(step.flight.date for step in result.steps if step.error)
+
+
+class TestHistoryCheck(unittest.TestCase):
+    """Test cases for checkRows and checkFiles"""
+
+    def test_every_kind_of_break(self):
+        """Test a wrong date, a row out of order and the continuity break it makes"""
+        breaks = list(checkRows(ROWS, 'bad.csv'))
+        self.assertEqual([(brk.kind, brk.row) for brk in breaks], [('date', 4), ('order', 6), ('continuity', 5)])
+        self.assertEqual(breaks[2].date, dateX(2013, 8, 7))
+        self.assertEqual(breaks[2].text, 'LPA@01/08/12 NON-UK - UK EDI@07/08/13 (after row 6)')
+        self.assertEqual(breaks[0].asRecord(), {'source': 'bad.csv', 'row': 4, 'kind': 'date', 'date': None,
+                                                'text': 'Flight Date 30/13/13 12:20 Has Wrong Format'})
+
+    def test_fail_fast_stops_at_the_first_break(self):
+        """Test that nothing is read after the first break"""
+        read = []
+
+        def rows():
+            for ro in ROWS:
+                read.append(ro)
+                yield ro
+        self.assertEqual([brk.kind for brk in checkRows(rows(), failFast=True)], ['date'])
+        self.assertEqual(len(read), 4)
+        rows = [list(ro) for ro in ROWS if ro[0] != '30/13/13 12:20']
+        rows[3][1], rows[3][2] = 'LPA', 'FALSE'
+        self.assertEqual([(brk.kind, brk.row) for brk in checkRows(rows, failFast=True)], [('continuity', 4)])
+
+    def test_cancelled_flights_are_skipped(self):
+        """Test that a cancelled flight makes no continuity break"""
+        rows = ROWS[:3] + [['03/05/11 10:50', 'PIK', 'FALSE', 'WMI', 'FALSE', 'RyanAir', 'FR3334', 'TRUE']]
+        self.assertEqual(list(checkRows(rows)), [])
+
+    def test_matches_the_analysis(self):
+        """Test that the continuity breaks are the errors of the analysis, in order or not"""
+        for seed in range(12):
+            rows = list(syntheticRows(300, seed=seed, errors=0.05))
+            if seed % 2:
+                random.Random(seed).shuffle(rows)
+            with self.subTest(seed=seed):
+                breaks = list(checkRows(rows))
+                self.assertEqual(sorted(brk.date for brk in breaks if brk.kind == 'continuity'), analysisBreaks(rows))
+                self.assertEqual(any(brk.kind == 'order' for brk in breaks), bool(seed % 2))
+
+    def test_several_files(self):
+        """Test that the continuity of several files is checked with their flights merged by date"""
+        directory = tempfile.mkdtemp()
+        try:
+            rows = list(syntheticRows(300, seed=3, errors=0.05))
+            paths = []
+            for k, cut in enumerate((0, 100, 200)):
+                paths.append(os.path.join(directory, f'part{k}.csv'))
+                with open(paths[-1], 'w') as part:
+                    part.writelines(','.join(ro) + '\n' for ro in rows[cut:cut + 100][::-1 if k == 1 else 1])
+            breaks = list(checkFiles(paths))
+            self.assertEqual([brk.source for brk in breaks if brk.kind == 'order'][:1], [paths[1]])
+            self.assertEqual(sorted(brk.date for brk in breaks if brk.kind == 'continuity'),
+                             analysisBreaks(loadFlightFiles(paths)))
+            self.assertEqual([str(brk) for brk in checkFiles([paths[0], paths[2]])],
+                             [str(brk) for brk in checkFiles([paths[2], paths[0]])])
+            self.assertIsNotNone(firstBreak(paths))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_render_batch_and_command_line(self):
+        """Test the report, a batch file failing fast and the exit status of the script"""
+        text = renderBreaks(checkRows(ROWS, 'bad.csv'), noctyle)
+        self.assertIn('order       bad.csv, row 6: Flight Date 01/08/12 is before 07/08/13 of row 5', text)
+        self.assertIn('Breaks:                 3 (1 date, 1 order, 1 continuity)', text)
+        directory = tempfile.mkdtemp()
+        try:
+            bad = os.path.join(directory, 'bad.csv')
+            with open(bad, 'w') as csv_file:
+                csv_file.writelines(','.join(ro) + '\n' for ro in ROWS)
+            good = writeHistory(os.path.join(directory, 'good.csv'), 40, errors=0)
+            self.assertEqual(validateFile(bad, dateX(2020, 12, 10), failFast=True).failure,
+                             'date break, row 4: Flight Date 30/13/13 12:20 Has Wrong Format')
+            self.assertIsNone(validateFile(good, dateX(2020, 12, 10), failFast=True).failure)
+            script = [sys.executable, os.path.join(ROOT, 'BPDatesValidator.py'), '101220']
+            env = {**os.environ, 'NO_COLOR': '1'}
+            out = subprocess.run(script + [bad, '--fail-fast'], capture_output=True, text=True, env=env)
+            self.assertEqual((out.returncode, out.stdout), (1, ''))
+            self.assertIn('row 4', out.stderr)
+            out = subprocess.run(script + [bad, '--check', '--format', 'ndjson'], capture_output=True, text=True, env=env)
+            self.assertEqual((out.returncode, len(out.stdout.splitlines())), (1, 3))
+            out = subprocess.run(script[:-1] + [bad, '--check'], capture_output=True, text=True, env=env)
+            self.assertEqual(out.returncode, 1)
+            out = subprocess.run(script + [good, '--fail-fast', '--summary-only'], capture_output=True, text=True, env=env)
+            self.assertEqual(out.returncode, 0)
+            self.assertIn('Total outside UK (5Y):', out.stdout)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio HTTP validation service
+"""
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+from unittest import mock
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, loadFlights, analyse, resultRecord
+import http_service
+from http_service import ValidationService
+
+CSV = ("05/03/20 12:20,EDI,TRUE,LPA,FALSE,RyanAir,FR5555,FALSE\n"
+       "06/03/20 12:20,EDI,TRUE,LIS,FALSE,RyanAir,FR7777,TRUE\n"
+       "07/04/20 10:10,LPA,FALSE,GLA,TRUE,WizzAir,FR6666,FALSE\n")
+
+
+def slowValidateRows(rows, dateApply, engine='prefix', allWindows=False):
+    time.sleep(0.3)
+    return {'rows': len(rows)}
+
+
+class TestHttpService(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ValidationService"""
+
+    async def startService(self, **options):
+        self.service = ValidationService(workers=2, threads=True, **options)
+        self.server = await self.service.start('127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        """Stop the service"""
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+
+    async def send(self, writer, method, target, body=b'', headers=None):
+        head = f'{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n'
+        for name, value in (headers or {}).items():
+            head += f'{name}: {value}\r\n'
+        writer.write(head.encode() + b'\r\n' + body)
+        await writer.drain()
+
+    async def receive(self, reader):
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b'\r\n':
+            name, _, value = line.decode().partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return status, json.loads(await reader.readexactly(int(headers['content-length'])))
+
+    async def request(self, method, target, body=b'', headers=None):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            await self.send(writer, method, target, body, {'Connection': 'close', **(headers or {})})
+            return await self.receive(reader)
+        finally:
+            writer.close()
+
+    async def test_health(self):
+        """Test the health endpoint"""
+        await self.startService()
+        status, payload = await self.request('GET', '/health')
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['status'], 'ok')
+        self.assertEqual(payload['maxConcurrent'], 2)
+
+    async def test_validate_csv(self):
+        """Test validating a CSV body against an application date in the query"""
+        await self.startService()
+        status, payload = await self.request('POST', '/validate?date=101220&allWindows=1', CSV.encode(),
+                                             {'Content-Type': 'text/csv'})
+        expected = resultRecord(analyse(loadFlights(row.split(',') for row in CSV.splitlines()),
+                                        dateX(2020, 12, 10), allWindows=True), '<request>')
+        self.assertEqual(status, 200)
+        self.assertEqual(payload, json.loads(json.dumps(expected)))
+
+    async def test_validate_json(self):
+        """Test validating flights given as JSON objects and rows"""
+        await self.startService()
+        document = {'date': '2020-12-10', 'engine': 'sweep', 'flights': [
+            {'date': '05/03/20', 'origin': 'EDI', 'originUK': True, 'destin': 'LPA', 'destinUK': False},
+            ['07/04/20', 'LPA', 'FALSE', 'GLA', 'TRUE']]}
+        status, payload = await self.request('POST', '/validate', json.dumps(document).encode(),
+                                             {'Content-Type': 'application/json'})
+        self.assertEqual(status, 200)
+        self.assertEqual((payload['flights'], payload['total5Y'], payload['cuntMax']), (2, 33, 32))
+        self.assertTrue(payload['passed'])
+
+    async def test_bad_requests(self):
+        """Test the errors of malformed requests"""
+        await self.startService(maxBody=1000)
+        json_headers = {'Content-Type': 'application/json'}
+        self.assertEqual((await self.request('POST', '/validate', CSV.encode()))[0], 400)
+        self.assertEqual((await self.request('POST', '/validate?date=311320', CSV.encode()))[0], 400)
+        self.assertEqual((await self.request('POST', '/validate?date=101220&engine=x', CSV.encode()))[0], 400)
+        self.assertEqual((await self.request('POST', '/validate', b'{"date": "101220"}', json_headers))[0], 400)
+        self.assertEqual((await self.request('POST', '/validate', b'[1]', json_headers))[0], 400)
+        self.assertEqual((await self.request('GET', '/validate'))[0], 405)
+        self.assertEqual((await self.request('POST', '/health'))[0], 405)
+        self.assertEqual((await self.request('GET', '/nothing'))[0], 404)
+        self.assertEqual((await self.request('POST', '/validate?date=101220', b'x' * 1001))[0], 413)
+        status, payload = await self.request('POST', '/validate?date=101220',
+                                             b'{"flights": [[20200101, "A", true, "B", false]]}', json_headers)
+        self.assertEqual(status, 400)
+        self.assertIn('flight 1: date must be a string', payload['error'])
+        self.assertEqual((await self.request('POST', '/validate?date=101220',
+                                             b'{"flights": [{"date": "05/03/20", "origin": ["EDI"]}]}',
+                                             json_headers))[0], 400)
+
+    async def test_long_lines(self):
+        """Test that a request or header line over the read buffer is answered, not dropped"""
+        await self.startService()
+        self.assertEqual((await self.request('GET', '/health?' + 'x' * (1 << 17)))[0], 400)
+        status, payload = await self.request('GET', '/health', headers={'X-Long': 'x' * (1 << 17)})
+        self.assertEqual(status, 431)
+        self.assertIn('header line too long', payload['error'])
+
+    async def test_keep_alive(self):
+        """Test several requests on one connection"""
+        await self.startService()
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            for _ in range(3):
+                await self.send(writer, 'POST', '/validate?date=101220', CSV.encode())
+                status, payload = await self.receive(reader)
+                self.assertEqual(status, 200)
+            await self.send(writer, 'GET', '/health')
+            self.assertEqual((await self.receive(reader))[1]['served'], 3)
+        finally:
+            writer.close()
+
+    async def test_limits_and_responsive_loop(self):
+        """Test that extra validations are turned away while health still answers"""
+        await self.startService(maxConcurrent=1, backlog=1)
+        with mock.patch.object(http_service, 'validateRows', slowValidateRows):
+            requests = [asyncio.create_task(self.request('POST', '/validate?date=101220', CSV.encode()))
+                        for _ in range(3)]
+            await asyncio.sleep(0.1)
+            start = time.perf_counter()
+            status, payload = await self.request('GET', '/health')
+            self.assertLess(time.perf_counter() - start, 0.2)
+            self.assertEqual((payload['active'], payload['waiting']), (1, 1))
+            statuses = sorted(status for status, _ in await asyncio.gather(*requests))
+        self.assertEqual(statuses, [200, 200, 503])
+
+
+if __name__ == '__main__':
+    unittest.main()
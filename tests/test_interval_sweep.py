@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the IntervalSweep absence evaluator
+"""
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import (Period, dateX, absencePeriods, AbsenceIndex, IntervalSweep,
+                              ENGINES, monthWindowMax, slidingWindowMax)
+from tests.test_absence_index import randomHistory
+
+
+class TestIntervalSweep(unittest.TestCase):
+    """Test cases for the IntervalSweep evaluator"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.dateApply = dateX(2020, 12, 10)
+        self.date5Y = self.dateApply.shiftYear(-5).shiftDay(1)
+        self.dateApplyStar = self.dateApply.lastDay()
+
+    def test_engines_registry(self):
+        """Test that both engines can be selected by name"""
+        self.assertIs(ENGINES['prefix'], AbsenceIndex)
+        self.assertIs(ENGINES['sweep'], IntervalSweep)
+
+    def test_count_single_trip(self):
+        """Test counting a single trip, flight days excluded"""
+        sweep = IntervalSweep([Period(dateX(2017, 3, 1), dateX(2017, 3, 11))], self.date5Y, self.dateApplyStar)
+        self.assertEqual(sweep.count(dateX(2017, 1, 1), dateX(2017, 12, 31)), 9)
+        self.assertEqual(sweep.count(dateX(2017, 3, 5), dateX(2017, 3, 6)), 2)
+        self.assertEqual(sweep.count(dateX(2017, 3, 11), dateX(2017, 3, 31)), 0)
+        self.assertEqual(sweep.count(dateX(2017, 3, 6), dateX(2017, 3, 5)), 0)
+
+    def test_overlapping_periods_are_merged(self):
+        """Test that a day covered by two periods is only counted once"""
+        rangeList = [Period(dateX(2017, 3, 1), dateX(2017, 3, 11)),
+                     Period(dateX(2017, 3, 5), dateX(2017, 3, 20))]
+        sweep = IntervalSweep(rangeList, self.date5Y, self.dateApplyStar)
+        index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+        self.assertEqual(sweep.count(self.date5Y, self.dateApplyStar), 18)
+        self.assertEqual(sweep.count(self.date5Y, self.dateApplyStar),
+                         index.count(self.date5Y, self.dateApplyStar))
+
+    def test_empty_history(self):
+        """Test an evaluator without any periods"""
+        sweep = IntervalSweep([], self.date5Y, self.dateApplyStar)
+        self.assertEqual(sweep.count(self.date5Y, self.dateApplyStar), 0)
+        self.assertEqual(monthWindowMax(sweep, self.date5Y), 0)
+        self.assertEqual(slidingWindowMax(sweep)[0], 0)
+
+    def test_matches_absence_index(self):
+        """Test that every total matches the prefix-sum index"""
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                rangeList = absencePeriods(randomHistory(seed), self.date5Y)
+                index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+                sweep = IntervalSweep(rangeList, self.date5Y, self.dateApplyStar)
+                rnd = random.Random(seed)
+                for _ in range(50):
+                    dateFrom = self.date5Y.shiftDay(rnd.randint(-30, 1900))
+                    dateTo = dateFrom.shiftDay(rnd.randint(0, 400))
+                    self.assertEqual(sweep.count(dateFrom, dateTo), index.count(dateFrom, dateTo))
+                self.assertEqual(monthWindowMax(sweep, self.date5Y), monthWindowMax(index, self.date5Y))
+                cunt, dateFrom, dateTo = slidingWindowMax(sweep)
+                self.assertEqual(cunt, slidingWindowMax(index)[0])
+                self.assertEqual(sweep.count(dateFrom, dateTo), cunt)
+
+    def test_sliding_max_over_a_leap_year(self):
+        """Test that the worst window, days and dates, is the one of the prefix-sum index across 29 February"""
+        rangeList = [Period(dateX(2019, 2, 24), dateX(2019, 3, 4)), Period(dateX(2020, 2, 24), dateX(2020, 3, 2))]
+        sweep = IntervalSweep(rangeList, self.date5Y, self.dateApplyStar)
+        self.assertEqual(slidingWindowMax(sweep), (8, dateX(2019, 3, 1), dateX(2020, 2, 29)))
+        for seed in range(40):
+            with self.subTest(seed=seed):
+                rnd = random.Random(seed)
+                rangeList = []
+                day = dateX(2018, 12, 1)
+                while day < dateX(2020, 6, 1):
+                    day = day.shiftDay(rnd.randint(1, 60))
+                    rangeList.append(Period(day, day.shiftDay(rnd.choice([1, 2, 5, 9, 30]))))
+                    day = rangeList[-1].dateTo.shiftDay(rnd.randint(0, 3))
+                index = AbsenceIndex(rangeList, self.date5Y, self.dateApplyStar)
+                sweep = IntervalSweep(rangeList, self.date5Y, self.dateApplyStar)
+                self.assertEqual(slidingWindowMax(sweep), slidingWindowMax(index))
+
+
+if __name__ == '__main__':
+    unittest.main()
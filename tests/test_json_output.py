@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the JSON / NDJSON records (resultRecord, BatchRow.asRecord, bounded runBatch)
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, loadFlights, analyse, resultRecord
+from batch_mode import BatchRow, validateFile, runBatch
+from tests.test_absence_index import randomHistory
+
+
+class TestJsonOutput(unittest.TestCase):
+    """Test cases for the machine-readable records"""
+
+    def setUp(self):
+        """Set up a history with a cancelled flight"""
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "abroad.csv")
+        self.dateApply = dateX(2020, 12, 10)
+        with open(self.path, 'w') as csv_file:
+            csv_file.write("05/03/20 12:20,EDI,TRUE,LPA,FALSE,RyanAir,FR5555,FALSE\n"
+                           "06/03/20 12:20,EDI,TRUE,LIS,FALSE,RyanAir,FR7777,TRUE\n"
+                           "07/04/20 10:10,LPA,FALSE,GLA,TRUE,WizzAir,FR6666,FALSE\n")
+
+    def tearDown(self):
+        """Remove the directory"""
+        shutil.rmtree(self.dir)
+
+    def test_record_values(self):
+        """Test that the record holds the rule values, limits and boundary dates"""
+        result = analyse(loadFlights(self.path), self.dateApply)
+        record = json.loads(json.dumps(resultRecord(result)))
+        self.assertEqual(record['source'], self.path)
+        self.assertEqual(record['dateApply'], '2020-12-10')
+        self.assertEqual(record['date5Y'], '2015-12-11')
+        self.assertEqual(record['date1Y'], '2019-12-11')
+        self.assertEqual((record['total5Y'], record['total1Y'], record['cuntMax']), (33, 33, 32))
+        self.assertEqual(record['limits'], {'5Y': True, '12M': True, 'any12M': True})
+        self.assertTrue(record['passed'])
+        self.assertEqual(record['errors'], [])
+        self.assertEqual(record['cancelledCount'], 1)
+        self.assertEqual(record['cancelled'][0]['destin'], 'LIS')
+        self.assertIsNone(record['worst'])
+
+    def test_record_limits_and_worst(self):
+        """Test a history breaking a limit, with the worst window asked for"""
+        result = analyse(randomHistory(3, trips=80), self.dateApply, allWindows=True)
+        record = resultRecord(result, 'random')
+        self.assertEqual(record['source'], 'random')
+        self.assertEqual(record['limits'], result.limits())
+        self.assertEqual(record['passed'], all(result.limits().values()))
+        self.assertEqual(record['worst']['days'], result.worst[0])
+        self.assertEqual(record['worst']['dateFrom'], result.worst[1].isoformat())
+        json.dumps(record)
+
+    def test_batch_records(self):
+        """Test that batch rows carry their records only when asked for"""
+        self.assertIsNone(validateFile(self.path, self.dateApply).record)
+        row = validateFile(self.path, self.dateApply, records=True)
+        self.assertEqual(row.asRecord()['total5Y'], row.total5Y)
+        failed = validateFile(os.path.join(self.dir, "missing.csv"), self.dateApply, records=True)
+        self.assertFalse(failed.asRecord()['passed'])
+        self.assertIn('FileNotFoundError', failed.asRecord()['failure'])
+        self.assertEqual(BatchRow('x.csv', self.dateApply, failure='E').asRecord()['dateApply'], '2020-12-10')
+
+    def test_run_batch_is_bounded(self):
+        """Test that jobs are taken lazily, a few per worker at a time"""
+        taken = []
+
+        def jobs():
+            for i in range(100):
+                taken.append(i)
+                yield self.path, self.dateApply
+
+        rows = runBatch(jobs(), workers=1, threads=True, records=True)
+        next(rows)
+        self.assertLessEqual(len(taken), 8)
+        self.assertEqual(sum(1 for _ in rows) + 1, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
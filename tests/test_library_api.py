@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the library API (loadFlights, analyse, render)
+"""
+import unittest
+import sys
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import FlightLog, Result, dateX, loadFlights, analyse, render
+from tests.test_absence_index import randomHistory
+
+
+class TestLibraryAPI(unittest.TestCase):
+    """Test cases for loadFlights, analyse and render"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.rows = [
+            ["17/05/16 10:40", "LIS", "FALSE", "EDI", "TRUE", "RyanAir", "FR1111", "FALSE"],
+            ["27/07/16", "EDI", "TRUE", "GDN", "FALSE", "RyanAir", "FR2222", "FALSE"],
+            ["02/08/2016", "GDN", "FALSE", "EDI", "TRUE", "", "", "FALSE"],
+            ["30/07/17 12:20", "EDI", "TRUE", "LPA", "FALSE", "RyanAir", "FR4444", "TRUE"],
+            ["05/03/20 12:20", "EDI", "TRUE", "LPA", "FALSE", "RyanAir", "FR5555", "FALSE"],
+            ["07/04/20 10:10", "LPA", "FALSE", "GLA", "TRUE", "WizzAir", "FR6666", "FALSE"],
+        ]
+        self.dateApply = date(2020, 12, 10)
+
+    def test_load_flights_from_rows(self):
+        """Test reading flights from CSV rows"""
+        log = loadFlights(self.rows)
+        self.assertIsInstance(log, FlightLog)
+        self.assertIsNone(log.source)
+        self.assertEqual(len(log.entries), 6)
+        self.assertEqual(len(log.flights), 5)
+        self.assertEqual(len(log.cancelled), 1)
+        self.assertEqual(log.cancelled[0].number, "FR4444")
+        self.assertEqual(log.flights[1].date, dateX(2016, 7, 27))
+        self.assertEqual(log.flights[2].date, dateX(2016, 8, 2))
+        self.assertTrue(log.flights[0].destinUK)
+
+    def test_load_flights_from_file(self):
+        """Test reading flights from a CSV file path"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as temp_file:
+            for row in self.rows:
+                temp_file.write(','.join(row) + '\n')
+        try:
+            log = loadFlights(temp_file.name)
+            self.assertEqual(log.source, temp_file.name)
+            self.assertEqual(len(log.flights), 5)
+        finally:
+            os.unlink(temp_file.name)
+
+    def test_wrong_date_format(self):
+        """Test that a row with a wrong date is reported and skipped"""
+        log = loadFlights(self.rows[:1] + [["2016-07-27", "EDI", "TRUE", "GDN", "FALSE"]])
+        self.assertEqual(len(log.entries), 1)
+        self.assertEqual(len(log.errors), 1)
+        self.assertEqual(log.errors[0][0], 1)
+        self.assertIn("2016-07-27", log.errors[0][1])
+
+    def test_analyse_totals(self):
+        """Test the rule values of a small history"""
+        result = analyse(loadFlights(self.rows), self.dateApply)
+        self.assertIsInstance(result, Result)
+        self.assertEqual(result.date5Y, dateX(2015, 12, 11))
+        self.assertEqual(result.date1Y, dateX(2019, 12, 11))
+        self.assertEqual(result.total5Y, 158 + 6 + 33)  # abroad from date5Y until the first flight
+        self.assertEqual(result.total1Y, 33)
+        self.assertEqual(result.cuntMax, 32)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.totalERR, 0)
+        self.assertEqual(len(result.steps), 5)
+
+    def test_analyse_reports_continuity_errors(self):
+        """Test that a UK/NON-UK break is listed in the errors"""
+        rows = self.rows[:2] + self.rows[4:]  # GDN -> EDI missing
+        result = analyse(loadFlights(rows), self.dateApply)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0][0], 2)
+        self.assertIn("GDN@27/07/16", result.errors[0][1])
+        self.assertTrue(result.steps[2].error)
+
+    def test_analyse_unsorted_flight_list(self):
+        """Test that analyse accepts a plain, unsorted list of flights"""
+        flights = loadFlights(self.rows).flights
+        result = analyse(list(reversed(flights)), self.dateApply)
+        self.assertEqual(result.total5Y, 197)
+        self.assertIsNone(result.log)
+
+    def test_analyse_empty_history(self):
+        """Test analysing without any flights"""
+        result = analyse([], self.dateApply)
+        self.assertEqual(result.total5Y, 0)
+        self.assertEqual(result.cuntMax, 0)
+        self.assertIn("Total outside UK (5Y)", render(result))
+
+    def test_engines_agree(self):
+        """Test that both engines give the same result"""
+        flights = randomHistory(4, trips=60, start=dateX(2015, 1, 1))
+        prefix = analyse(flights, self.dateApply, allWindows=True)
+        sweep = analyse(flights, self.dateApply, engine='sweep', allWindows=True)
+        self.assertEqual(prefix.cuntMax, sweep.cuntMax)
+        self.assertEqual(prefix.worst[0], sweep.worst[0])
+
+    def test_thread_safety(self):
+        """Test that analyses running in parallel threads do not interfere"""
+        histories = [randomHistory(seed, trips=50, start=dateX(2015, 1, 1)) for seed in range(8)]
+        expected = [analyse(flights, self.dateApply).cuntMax for flights in histories]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda flights: analyse(flights, self.dateApply), histories * 4))
+        self.assertEqual([result.cuntMax for result in results], expected * 4)
+
+    def test_render(self):
+        """Test the text report"""
+        text = render(analyse(loadFlights(self.rows), self.dateApply, allWindows=True))
+        self.assertIn("READING ENTRIES", text)
+        self.assertIn("Processed 6 lines (5 flights + 1 cancelled).", text)
+        self.assertIn("CANCELLED:", text)
+        self.assertIn("ANALYSING THE FLIGHTS:", text)
+        self.assertIn("Worst 12-M (any day)", text)
+        self.assertTrue(text.endswith("\n\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the month-boundary table behind dateX.firstDay / lastDay / shiftMonth
+"""
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, monthIndex, MONTH_START, MONTH_LENGTH, MONTH_FIRST_YEAR, MONTH_LAST_YEAR
+
+
+def lastDayReference(day):
+    """The replace(day=28) + timedelta(days=4) arithmetic"""
+    next_month = date(day.year, day.month, 28) + timedelta(days=4)
+    return next_month - timedelta(days=next_month.day)
+
+
+class TestMonthTable(unittest.TestCase):
+    """Test cases for the month-boundary table"""
+
+    def test_table_bounds(self):
+        """Test the years covered by the table"""
+        self.assertEqual(len(MONTH_LENGTH), (MONTH_LAST_YEAR - MONTH_FIRST_YEAR + 1) * 12)
+        self.assertEqual(monthIndex(MONTH_FIRST_YEAR, 1), 0)
+        self.assertEqual(monthIndex(MONTH_LAST_YEAR, 12), len(MONTH_LENGTH) - 1)
+        self.assertIsNone(monthIndex(MONTH_FIRST_YEAR - 1, 12))
+        self.assertIsNone(monthIndex(MONTH_LAST_YEAR + 1, 1))
+
+    def test_every_month(self):
+        """Test every month of the table against date arithmetic"""
+        for year in range(MONTH_FIRST_YEAR, MONTH_LAST_YEAR + 1):
+            for month in range(1, 13):
+                index = monthIndex(year, month)
+                self.assertEqual(MONTH_START[index], date(year, month, 1).toordinal())
+                day = dateX(year, month, 15)
+                self.assertEqual(day.lastDay(), lastDayReference(day))
+                self.assertEqual(day.firstDay(), date(year, month, 1))
+
+    def test_outside_table(self):
+        """Test that dates outside the table still work"""
+        day = dateX(1850, 2, 10)
+        self.assertEqual(day.lastDay(), dateX(1850, 2, 28))
+        self.assertEqual(day.firstDay(), dateX(1850, 2, 1))
+        self.assertEqual(day.shiftMonth(13), dateX(1851, 3, 10))
+        self.assertEqual(dateX(2100, 11, 5).shiftMonth(3), dateX(2101, 2, 5))
+        self.assertIsInstance(dateX(2100, 11, 5).shiftMonth(3), dateX)
+
+    def test_shift_month_matches_arithmetic(self):
+        """Test shiftMonth against year / month arithmetic"""
+        day = dateX(1999, 1, 28)
+        for months in range(-60, 61):
+            month = day.month - 1 + months
+            expected = date(day.year + month // 12, month % 12 + 1, day.day)
+            self.assertEqual(day.shiftMonth(months), expected)
+
+    def test_shift_month_day_out_of_range(self):
+        """Test that a day missing in the target month still raises"""
+        with self.assertRaises(ValueError):
+            dateX(2023, 1, 31).shiftMonth(1)
+        with self.assertRaises(ValueError):
+            dateX(2020, 2, 29).shiftYear(-5)
+        self.assertEqual(dateX(2020, 2, 29).shiftYear(-4), dateX(2016, 2, 29))
+
+    def test_cached_instances(self):
+        """Test that repeated calls return the same cached dateX"""
+        day = dateX(2017, 3, 15)
+        self.assertIs(day.shiftMonth(11), day.shiftMonth(11))
+        self.assertIs(day.lastDay(), dateX(2017, 3, 2).lastDay())
+        self.assertIsInstance(day.firstDay(), dateX)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for reading several CSV files merged by date
+"""
+import unittest
+import sys
+import os
+import csv
+import tempfile
+import shutil
+import tracemalloc
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import (dateX, Flight, FlightArray, FlightStream, FlightStreams, loadFlights,
+                              loadFlightFiles, mergeFlights, analyse, resultRecord)
+from benchmarks.history import syntheticRows
+
+
+class TestMultiFile(unittest.TestCase):
+    """Test cases for mergeFlights, FlightArray.merged and loadFlightFiles"""
+
+    def setUp(self):
+        """Set up a history cut into three files"""
+        self.dir = tempfile.mkdtemp()
+        self.dateApply = dateX(2020, 12, 10)
+        self.rows = list(syntheticRows(600, seed=7, errors=0.02))
+        self.whole = self.write("whole.csv", self.rows)
+        cuts = [0, len(self.rows) // 3, len(self.rows) * 2 // 3, len(self.rows)]
+        self.parts = [self.write(f"part_{k}.csv", self.rows[cuts[k]:cuts[k + 1]]) for k in range(3)]
+
+    def tearDown(self):
+        """Remove the directory"""
+        shutil.rmtree(self.dir)
+
+    def write(self, name, rows):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', newline='') as csv_file:
+            csv.writer(csv_file, lineterminator='\n').writerows(rows)
+        return path
+
+    def expected(self):
+        record = resultRecord(analyse(loadFlights(self.whole), self.dateApply, allWindows=True))
+        record['errors'] = sorted(record['errors'])
+        return record
+
+    def record(self, log):
+        record = resultRecord(analyse(log, self.dateApply, allWindows=True))
+        record['errors'] = sorted(record['errors'])
+        record['cancelled'] = sorted(record['cancelled'], key=str)
+        return record
+
+    def test_merge_flights_is_stable(self):
+        """Test that flights of the same day keep the order of their streams"""
+        day = dateX(2020, 3, 5)
+        first = [Flight(day, 'EDI', True, 'LPA', False), Flight(dateX(2020, 4, 7), 'LPA', False, 'GLA', True)]
+        second = [Flight(dateX(2020, 1, 2), 'GLA', True, 'LIS', False), Flight(day, 'LIS', False, 'EDI', True)]
+        merged = list(mergeFlights([first, second]))
+        self.assertEqual([fl.origin for fl in merged], ['GLA', 'EDI', 'LIS', 'LPA'])
+
+    def test_merged_arrays(self):
+        """Test that merging sorted FlightArrays matches sorting all their flights"""
+        parts = [sorted(loadFlights(path).flights, key=Flight.getDate) for path in self.parts]
+        merged = FlightArray.merged([FlightArray(part) for part in parts])
+        self.assertTrue(merged.isSorted())
+        expected = list(mergeFlights(parts))
+        self.assertEqual([(fl.date, fl.origin, fl.originUK, fl.destin, fl.destinUK) for fl in merged],
+                         [(fl.date, fl.origin, fl.originUK, fl.destin, fl.destinUK) for fl in expected])
+        self.assertEqual(len(FlightArray.merged([FlightArray(), merged])), len(merged))
+
+    def test_merged_arrays_keep_no_rows(self):
+        """Test that merging holds no more than the merged arrays, whatever the number of rows"""
+        arrays = [FlightArray(sorted(loadFlights(syntheticRows(20000, seed=k)).flights, key=Flight.getDate))
+                  for k in range(4)]
+        total = sum(len(flights) for flights in arrays)
+        tracemalloc.start()
+        try:
+            merged = FlightArray.merged(arrays)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(merged), total)
+        # 14 bytes a flight in the arrays, with room for their growth, against ~100 for a tuple of each
+        self.assertLess(peak, 24 * total)
+
+    def test_files_match_one_file(self):
+        """Test that the parts give the result of the whole history, loaded or streamed"""
+        expected = self.expected()
+        expected['source'] = ', '.join(self.parts)
+        expected['cancelled'] = sorted(expected['cancelled'], key=str)
+        for entries in (True, False):
+            with self.subTest(entries=entries):
+                log = loadFlightFiles(self.parts, workers=2, entries=entries)
+                self.assertEqual(bool(log.entries), entries)
+                self.assertEqual(self.record(log), expected)
+        stream = FlightStreams(self.parts, sample=1000)
+        record = self.record(stream)
+        self.assertEqual((stream.flightCount, stream.cancelledCount),
+                         (sum(FlightStream(path).flightCount or loadFlights(path).flightCount for path in self.parts),
+                          loadFlights(self.whole).cancelledCount))
+        self.assertEqual(record, expected)
+
+    def test_error_rows_follow_the_files(self):
+        """Test that error rows are numbered through the files one after the other"""
+        rows = [["01/02/20", "EDI", "TRUE", "LIS", "FALSE", "", "", "FALSE"],
+                ["not a date", "EDI", "TRUE", "LIS", "FALSE", "", "", "FALSE"]]
+        paths = [self.write("a.csv", rows), self.write("b.csv", rows)]
+        log = loadFlightFiles(paths)
+        self.assertEqual([er[0] for er in log.errors], [er[0] for er in loadFlights(self.write("ab.csv", rows * 2)).errors])
+
+    def test_single_file_is_loaded_as_it_is(self):
+        """Test that one file goes through the loader unchanged"""
+        log = loadFlightFiles([self.whole], workers=4, entries=False)
+        self.assertEqual(len(log.entries), len(loadFlights(self.whole).entries))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the stage timings of a run (Stopwatch, Result.timings, renderTimings)
+"""
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from term_style import noctyle
+from BPDatesValidator import dateX, Stopwatch, loadFlights, analyse, renderTimings
+from benchmarks.history import syntheticRows
+from tests.test_absence_index import randomHistory
+
+
+class TestStageTimings(unittest.TestCase):
+    """Test cases for the stage timings"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.dateApply = dateX(2020, 12, 10)
+
+    def test_stopwatch_adds_up(self):
+        """Test that laps of the same stage are added together"""
+        timings = {}
+        stopwatch = Stopwatch(timings)
+        stopwatch.lap('a')
+        stopwatch.lap('b')
+        first = timings['a']
+        stopwatch.lap('a')
+        self.assertEqual(list(timings), ['a', 'b'])
+        self.assertGreaterEqual(timings['a'], first)
+
+    def test_analyse_stages(self):
+        """Test that analyse() times every stage, in order"""
+        result = analyse(randomHistory(1), self.dateApply)
+        self.assertEqual(list(result.timings), ['read', 'sort', 'analysis', 'periods', 'index', 'windows'])
+        self.assertTrue(all(seconds >= 0 for seconds in result.timings.values()))
+        result = analyse(randomHistory(1), self.dateApply, allWindows=True)
+        self.assertIn('sliding', result.timings)
+
+    def test_read_includes_parse(self):
+        """Test that the time spent parsing the CSV counts as read"""
+        log = loadFlights(syntheticRows(500))
+        self.assertGreater(log.seconds, 0)
+        result = analyse(log, self.dateApply)
+        self.assertGreaterEqual(result.timings['read'], log.seconds)
+
+    def test_render_timings(self):
+        """Test the stage breakdown printed by --profile"""
+        text = renderTimings({'read': 0.003, 'sort': 0.001}, noctyle)
+        self.assertIn('read           3.000ms  75.0%', text)
+        self.assertIn('total          4.000ms', text)
+        self.assertIn('total', renderTimings({}, noctyle))
+
+
+if __name__ == '__main__':
+    unittest.main()
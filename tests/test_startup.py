@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the startup of the script: lazy imports, the usage error and the CSV argument
+"""
+import unittest
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import shutil
+from datetime import datetime
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import parseApplyDate
+from benchmarks.history import writeHistory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'BPDatesValidator.py')
+
+
+def run(*args, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [SCRIPT] + list(args)
+    return subprocess.run(command, capture_output=True, text=True, cwd=ROOT, env={**os.environ, 'NO_COLOR': '1'})
+
+
+def imported(importtime):
+    return {line.split('|')[-1].strip() for line in importtime.splitlines() if line.startswith('import time:')}
+
+
+class TestStartup(unittest.TestCase):
+    """Test cases for the startup of the script"""
+
+    def test_library_import_is_lazy(self):
+        """Test that importing the module loads none of the modules only some paths need"""
+        code = ("import sys, BPDatesValidator; "
+                "print([name for name in ('csv', 'json', 'argparse', 'glob', '_strptime') if name in sys.modules])")
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+        self.assertEqual(out.stdout.strip(), '[]')
+
+    def test_script_is_the_module(self):
+        """Test that the script imports as bpdates itself, with its month table not built yet"""
+        code = ("import BPDatesValidator, bpdates; "
+                "print(BPDatesValidator is bpdates, bpdates.monthTable.cache_info().currsize, "
+                "len(BPDatesValidator.MONTH_START) - len(bpdates.MONTH_LENGTH))")
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+        self.assertEqual(out.stdout.split(), ['True', '0', '12'])
+        with open(SCRIPT) as script:
+            self.assertLess(len(script.readlines()), 20)
+
+    def test_usage_error_without_argparse(self):
+        """Test that the usage error goes out before argparse or csv are imported"""
+        out = run(importtime=True)
+        self.assertIn('Missing Argument', out.stdout)
+        self.assertIn('DDMMYY', out.stdout)
+        self.assertFalse(imported(out.stderr) & {'argparse', 'csv', 'json'})
+
+    def test_csv_argument(self):
+        """Test the CSV file given after the date, alone or with -i"""
+        directory = tempfile.mkdtemp()
+        try:
+            path = writeHistory(os.path.join(directory, "history.csv"), 40, errors=0)
+            positional = json.loads(run('101220', path, '--format', 'json').stdout)
+            option = json.loads(run('101220', '-i', path, '--format', 'json').stdout)
+            self.assertEqual(positional, option)
+            both = json.loads(run('101220', path, '-i', path, '--format', 'json').stdout)
+            self.assertEqual(both['flights'], 2 * option['flights'])
+            out = run('101220', os.path.join(directory, "missing.csv"))
+            self.assertNotEqual(out.returncode, 0)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_apply_date_matches_strptime(self):
+        """Test that DDMMYY dates are read as strptime reads them"""
+        for text in ('101220', '010170', '311268', '290224', '290223', ' 311299 ', '001220', '311320', '1-1220',
+                     '1012', 'abcdef', '1/1/20'):
+            with self.subTest(text=text):
+                try:
+                    expected = datetime.strptime(text.strip(), '%d%m%y').date()
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        parseApplyDate(text)
+                    continue
+                self.assertEqual(parseApplyDate(text), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
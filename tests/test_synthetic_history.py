@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthetic flight histories of the benchmarks
+"""
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, loadFlights, analyse, parseDate
+from benchmarks.history import syntheticRows, writeHistory
+
+
+class TestSyntheticHistory(unittest.TestCase):
+    """Test cases for syntheticRows and writeHistory"""
+
+    def test_rows_are_valid(self):
+        """Test that every row has 8 columns and a date the script reads"""
+        rows = list(syntheticRows(300))
+        for ro in rows:
+            self.assertEqual(len(ro), 8)
+            self.assertIsNotNone(parseDate(ro[0]))
+        self.assertEqual({len(ro[0]) for ro in rows}, {8, 10, 14})  # all three date formats
+
+    def test_flights_and_cancelled(self):
+        """Test the number of flights and that cancelled rows are added"""
+        log = loadFlights(syntheticRows(500, cancelled=0.1))
+        self.assertEqual(log.flightCount, 500)
+        self.assertGreater(log.cancelledCount, 0)
+        self.assertEqual(log.errors, [])
+        self.assertEqual(loadFlights(syntheticRows(500, cancelled=0)).cancelledCount, 0)
+
+    def test_alternation_errors(self):
+        """Test that errors are only there when asked for"""
+        dateApply = dateX(2020, 12, 10)
+        self.assertEqual(analyse(loadFlights(syntheticRows(400, errors=0)), dateApply).errors, [])
+        self.assertGreater(len(analyse(loadFlights(syntheticRows(400, errors=0.1)), dateApply).errors), 0)
+
+    def test_repeatable(self):
+        """Test that a seed always gives the same history"""
+        self.assertEqual(list(syntheticRows(50, seed=7)), list(syntheticRows(50, seed=7)))
+        self.assertNotEqual(list(syntheticRows(50, seed=7)), list(syntheticRows(50, seed=8)))
+
+    def test_write_history(self):
+        """Test writing a history to a CSV file"""
+        folder = tempfile.mkdtemp()
+        try:
+            path = writeHistory(os.path.join(folder, "history.csv"), 100, cancelled=0)
+            self.assertEqual(loadFlights(path).flightCount, 100)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the buffered, TTY-aware report output
+"""
+import unittest
+import sys
+import os
+import io
+from unittest import mock
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from term_style import ctyle, noctyle, useColor, TermBuffer
+from BPDatesValidator import dateX, analyse, render, grnOrRed
+from tests.test_absence_index import randomHistory
+
+
+class TtyStream(io.StringIO):
+    """StringIO that claims to be a terminal and counts its writes"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def isatty(self):
+        return True
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+class TestTermBuffer(unittest.TestCase):
+    """Test cases for TermBuffer and the plain text style"""
+
+    def test_noctyle_is_empty(self):
+        """Test that noctyle has every ctyle name, all empty"""
+        for name in vars(ctyle):
+            if not name.startswith('__'):
+                self.assertEqual(getattr(noctyle, name), '')
+
+    def test_use_color(self):
+        """Test that colour is only used on a terminal without NO_COLOR"""
+        with mock.patch.dict(os.environ, {'NO_COLOR': ''}):
+            self.assertTrue(useColor(TtyStream()))
+            self.assertFalse(useColor(io.StringIO()))
+        with mock.patch.dict(os.environ, {'NO_COLOR': '1'}):
+            self.assertFalse(useColor(TtyStream()))
+
+    def test_single_write(self):
+        """Test that the buffer writes everything at once on flush"""
+        stream = TtyStream()
+        out = TermBuffer(stream, color=True)
+        out.print('a', 'b')
+        out.write('c')
+        self.assertEqual(stream.writes, 0)
+        out.flush()
+        self.assertEqual(stream.writes, 1)
+        self.assertEqual(stream.getvalue(), 'a\nb\nc')
+        self.assertIs(out.style, ctyle)
+        self.assertIs(TermBuffer(stream, color=False).style, noctyle)
+
+    def test_plain_report(self):
+        """Test that the noctyle report holds no escape codes"""
+        result = analyse(randomHistory(1), dateX(2020, 12, 10))
+        self.assertIn('\033[', render(result))
+        self.assertNotIn('\033[', render(result, noctyle))
+        self.assertEqual(grnOrRed(True, 'EDI', noctyle), 'EDI')
+
+    def test_summary_only(self):
+        """Test that the summary-only report leaves out the flight by flight analysis"""
+        result = analyse(randomHistory(1), dateX(2020, 12, 10))
+        full = render(result, noctyle)
+        summary = render(result, noctyle, summaryOnly=True)
+        self.assertIn('ANALYSING THE FLIGHTS', full)
+        self.assertNotIn('ANALYSING THE FLIGHTS', summary)
+        self.assertNotIn(' from EDI to LIS ', summary)
+        self.assertIn(f'Total outside UK (5Y):  {result.total5Y}d', summary)
+        self.assertTrue(full.endswith(summary.split('\n', 1)[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
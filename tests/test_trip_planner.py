@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the trip planner (trip_planner.py)
+"""
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BPDatesValidator import dateX, Flight, loadFlights, analyse
+from benchmarks.history import syntheticRows
+from term_style import noctyle
+from trip_planner import planTrip, tripRecord, renderTrip
+
+
+def withTrip(flights, departure, days):
+    return flights + [Flight(departure, 'EDI', True, 'LIS', False),
+                      Flight(departure.shiftDay(days), 'LIS', False, 'EDI', True)]
+
+
+def longestTrip(flights, dateApply, departure):
+    """The longest trip found by analysing the history again for every length."""
+    best = None
+    for days in range((dateApply - departure).days + 1):
+        if not all(analyse(withTrip(flights, departure, days), dateApply).limits().values()):
+            break
+        best = days
+    return best
+
+
+class TestTripPlanner(unittest.TestCase):
+    """Test cases for planTrip"""
+
+    def setUp(self):
+        """Set up a history ending in the UK"""
+        self.flights = [Flight(dateX(2019, 3, 5), 'EDI', True, 'LPA', False),
+                        Flight(dateX(2019, 4, 7), 'LPA', False, 'GLA', True)]
+
+    def test_limited_by_any_12_months(self):
+        """Test a trip stopped by the 180 days of a 12-month window"""
+        plan = planTrip(self.flights, dateX(2022, 12, 10), dateX(2021, 6, 1))
+        self.assertEqual((plan.days, plan.dateReturn, plan.limitedBy), (180, dateX(2021, 11, 28), 'any12M'))
+        self.assertEqual(plan.cuntMax, 179)
+        self.assertTrue(all(analyse(withTrip(self.flights, plan.departure, 180), dateX(2022, 12, 10)).limits().values()))
+        self.assertFalse(all(analyse(withTrip(self.flights, plan.departure, 181), dateX(2022, 12, 10)).limits().values()))
+
+    def test_limited_by_12_months_and_until_application(self):
+        """Test a trip stopped by the 90 days of the last 12 months, and one never stopped"""
+        plan = planTrip(self.flights, dateX(2020, 12, 10), dateX(2020, 6, 1), engine='sweep')
+        self.assertEqual((plan.days, plan.limitedBy, plan.total1Y), (89, '12M', 89))
+        plan = planTrip(self.flights, dateX(2020, 12, 10), dateX(2020, 11, 1))
+        self.assertEqual((plan.dateReturn, plan.days, plan.limitedBy), (dateX(2020, 12, 10), 39, None))
+
+    def test_matches_analysing_every_length(self):
+        """Test the planner against analysing the history with every trip length"""
+        rand = random.Random(5)
+        for seed in range(12):
+            dateApply = dateX(2021, rand.randint(1, 12), rand.randint(1, 28))
+            rows = syntheticRows(rand.choice([2, 6, 20, 60]), seed=seed, end=dateApply.shiftDay(-rand.randint(30, 700)),
+                                 years=rand.choice([1, 2, 5, 7]), cancelled=0, errors=0)
+            flights = sorted(loadFlights(rows).flights, key=Flight.getDate)
+            if not flights[-1].destinUK:
+                flights.pop()
+            departure = flights[-1].date.shiftDay(rand.randint(0, 300))
+            if departure >= dateApply:
+                continue
+            for engine in ('prefix', 'sweep'):
+                with self.subTest(seed=seed, engine=engine):
+                    plan = planTrip(flights, dateApply, departure, engine)
+                    self.assertEqual(plan.days, longestTrip(flights, dateApply, departure))
+
+    def test_no_trip_and_bad_departures(self):
+        """Test a history already over a limit, and the departures that can not be planned"""
+        flights = [Flight(dateX(2019, 1, 5), 'EDI', True, 'LPA', False),
+                   Flight(dateX(2020, 6, 7), 'LPA', False, 'GLA', True)]
+        plan = planTrip(flights, dateX(2020, 12, 10), dateX(2020, 7, 1))
+        self.assertEqual((plan.days, plan.dateReturn, plan.limitedBy), (None, None, '5Y'))
+        with self.assertRaises(ValueError):
+            planTrip(self.flights, dateX(2020, 12, 10), dateX(2019, 4, 1))
+        with self.assertRaises(ValueError):
+            planTrip(self.flights, dateX(2020, 12, 10), dateX(2020, 12, 10))
+        with self.assertRaises(ValueError):
+            planTrip(self.flights[:1], dateX(2020, 12, 10), dateX(2020, 1, 1))
+        self.assertEqual(planTrip([], dateX(2020, 12, 10), dateX(2020, 1, 1)).limitedBy, '12M')
+
+    def test_record_and_render(self):
+        """Test the JSON record and the text answer"""
+        plan = planTrip(self.flights, dateX(2022, 12, 10), dateX(2021, 6, 1))
+        self.assertEqual(tripRecord(plan), {'departure': '2021-06-01', 'dateApply': '2022-12-10',
+                                            'dateReturn': '2021-11-28', 'days': 180, 'limitedBy': 'any12M',
+                                            'total5Y': 33 + 180, 'total1Y': 0, 'cuntMax': 179})
+        text = renderTrip(plan, noctyle)
+        self.assertIn('Longest trip:           180 days, flying back on 28/11/2021', text)
+        self.assertIn('any12M', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
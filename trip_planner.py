@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+from term_style import ctyle
+from bpdates import dateX, monthWindowMax, analyse
+
+# Trip planner of the British Passport Abroad Dates Validator.
+#
+# Answers "how long can my next trip be?": given the flights so far, the
+# application date and the day of leaving the UK, finds the latest day to fly
+# back so that the application still keeps all three limits (under 450 days
+# abroad in the 5 years, under 90 in the last 12 months, under 180 in any of
+# the 12-month windows).
+#
+# The history is analysed once. A trip out on day d and back on day r adds
+# r - d days (from d, or from the start of the period when it is crossed) to
+# total5Y and total1Y, the same way the analysis counts them, and the days
+# strictly between the two flights to every 12-month window they overlap, on
+# top of the counts of the absence index already built. All three only grow
+# with r, so the return day is found by a binary search over those sums.
+#
+# Please run script with --plan-trip, eg:
+#   >   BPDatesValidator.py 101220 --plan-trip 010520
+
+
+class TripPlan:
+    # The longest trip leaving on `departure`, back on `dateReturn` after `days`
+    # days, with the rule values then. limitedBy names the limit one more day
+    # would break, None when the trip can last until the application date.
+    # dateReturn and days are None when even a same-day return breaks a limit.
+    def __init__(self, departure, dateApply, dateReturn=None, days=None, limitedBy=None,
+                 total5Y=0, total1Y=0, cuntMax=0):
+        self.departure = departure
+        self.dateApply = dateApply
+        self.dateReturn = dateReturn
+        self.days = days
+        self.limitedBy = limitedBy
+        self.total5Y = total5Y
+        self.total1Y = total1Y
+        self.cuntMax = cuntMax
+
+
+class TripWindows:
+    # The absence index of the history, with a trip's days abroad (those
+    # strictly between its two flights) added on top.
+    def __init__(self, index, dateFrom, dateTo):
+        self.index = index
+        self.dateFrom = dateFrom
+        self.dateTo = dateTo
+
+    def count(self, dateFrom, dateTo):
+        start = max(dateFrom, self.dateFrom, self.index.dateFrom)
+        end = min(dateTo, self.dateTo, self.index.dateTo)
+        return self.index.count(dateFrom, dateTo) + max((end - start).days + 1, 0)
+
+
+def planTrip(flights, dateApply, departure, engine='prefix'):
+    """Return the TripPlan of the longest trip leaving the UK on departure.
+
+    flights is anything analyse() takes; the history has to end in the UK, on or
+    before departure, and departure has to come before dateApply.
+    """
+    result = analyse(flights, dateApply, engine=engine)
+    dateApply, departure = result.dateApply, dateX(departure.year, departure.month, departure.day)
+    if not result.wasUK:
+        raise ValueError(f'the flights end abroad ({result.dateOld}), a trip has to leave from the UK')
+    if len(result.flights) and departure < result.dateOld:
+        raise ValueError(f'the trip leaves on {departure}, before the last flight on {result.dateOld}')
+    if departure >= dateApply:
+        raise ValueError(f'the trip leaves on {departure}, not before the application on {dateApply}')
+
+    d = departure.toordinal()
+    ordinal5Y, ordinal1Y = result.date5Y.toordinal(), result.date1Y.toordinal()
+    # leaving the UK is the first flight after a boundary: the return then counts from the flight
+    done5Y = '5Y' in result.state.boundaries or d > ordinal5Y
+    done1Y = '1Y' in result.state.boundaries or d > ordinal1Y
+
+    def rules(r):
+        total5Y, total1Y = result.total5Y, result.total1Y
+        if r > ordinal5Y:
+            total5Y += r - d if done5Y else r - ordinal5Y
+        if r > ordinal1Y:
+            total1Y += r - d if done1Y else (r - ordinal1Y if done5Y else r - ordinal5Y)
+        # clipped to the period as absenceOrdinals() does, its first day then not counted
+        windows = TripWindows(result.index, dateX.fromordinal(max(d, ordinal5Y) + 1), dateX.fromordinal(r - 1))
+        return total5Y, total1Y, monthWindowMax(windows, result.date5Y)
+
+    def broken(r):
+        total5Y, total1Y, cuntMax = rules(r)
+        for name, value, limit in (('5Y', total5Y, 450), ('12M', total1Y, 90), ('any12M', cuntMax, 180)):
+            if value >= limit:
+                return name
+        return None
+
+    plan = TripPlan(departure, dateApply)
+    plan.limitedBy = broken(d)
+    if plan.limitedBy:
+        plan.total5Y, plan.total1Y, plan.cuntMax = rules(d)
+        return plan
+    low, high = d, dateApply.toordinal()
+    if broken(high) is None:
+        low = high
+    else:
+        # broken(low) is None and broken(high) is not, all the way down
+        while high - low > 1:
+            middle = (low + high) // 2
+            if broken(middle) is None:
+                low = middle
+            else:
+                high = middle
+        plan.limitedBy = broken(high)
+    plan.dateReturn = dateX.fromordinal(low)
+    plan.days = low - d
+    plan.total5Y, plan.total1Y, plan.cuntMax = rules(low)
+    return plan
+
+
+def tripRecord(plan):
+    """Return a TripPlan as a dict of plain values, ready for json.dumps()."""
+    return {
+        'departure': plan.departure.isoformat(),
+        'dateApply': plan.dateApply.isoformat(),
+        'dateReturn': plan.dateReturn.isoformat() if plan.dateReturn is not None else None,
+        'days': plan.days,
+        'limitedBy': plan.limitedBy,
+        'total5Y': plan.total5Y,
+        'total1Y': plan.total1Y,
+        'cuntMax': plan.cuntMax,
+    }
+
+
+def renderTrip(plan, style=ctyle):
+    """Return the text answer of a TripPlan."""
+    c = style
+    lines = [f'\n{c.U}TRIP PLAN:{c.END}',
+             f'Leaving the UK on:      {plan.departure}',
+             f'Applying on:            {plan.dateApply}']
+    if plan.days is None:
+        lines.append(f'{c.RED}No trip is possible, the {plan.limitedBy} limit is already reached{c.END}')
+    else:
+        limit = (f'one more day breaks the {plan.limitedBy} limit' if plan.limitedBy
+                 else 'back for the application at the latest')
+        lines.append(f'Longest trip:           {c.GRN}{plan.days} days{c.END}, '
+                     f'flying back on {c.GRN}{plan.dateReturn}{c.END} {c.G}({limit}){c.END}')
+    lines.append(f'{c.G}-----------------------------------------------{c.END}')
+    lines.append(f'Total outside UK (12M): {plan.total1Y}')
+    lines.append(f'Total outside UK (5Y):  {plan.total5Y}')
+    lines.append(f'Outside UK (any 12-M):  {plan.cuntMax}')
+    lines.append('')
+    return '\n'.join(lines) + '\n'